@@ -1,7 +1,7 @@
 # -*- mode: python ; coding: utf-8 -*-
 from PyInstaller.utils.hooks import collect_all
 
-datas = [('tracker.py', '.'), ('matcher.py', '.'), ('gui.py', '.'), ('zoommeeting.py', '.')]
+datas = [('tracker.py', '.'), ('ocr_engine.py', '.'), ('capture.py', '.'), ('multi_tracker.py', '.'), ('frame_log.py', '.'), ('matcher.py', '.'), ('match_worker.py', '.'), ('matcher_state.py', '.'), ('compact_records.py', '.'), ('normalizer.py', '.'), ('normalization.json', '.'), ('assignment.py', '.'), ('roster_index.py', '.'), ('roster_loader.py', '.'), ('roster_cache.py', '.'), ('roster_watch.py', '.'), ('sheet_fetch.py', '.'), ('phonetic.py', '.'), ('persistence.py', '.'), ('store.py', '.'), ('app_paths.py', '.'), ('gui.py', '.'), ('zoommeeting.py', '.')]
 binaries = []
 hiddenimports = ['selenium', 'webdriver_manager', 'faker', 'pandas', 'openpyxl', 'rapidfuzz', 'pywin32', 'PIL', 'requests', 'pyperclip', 'tkinter', 'tkinter.ttk', 'tkinter.filedialog', 'tkinter.messagebox', 'tkinter.scrolledtext']
 tmp_ret = collect_all('selenium')
@@ -0,0 +1,34 @@
+"""
+App Paths
+Per-user folder for the attendance database and caches, so they do not
+land in whatever directory the app happens to be started from
+"""
+
+import os
+import sys
+
+APP_NAME = "ZoomAttendance"
+
+
+def app_data_dir(*parts):
+    """
+    Per-user data folder of the app (created if missing)
+
+    %LOCALAPPDATA% on Windows, ~/Library/Application Support on macOS and
+    $XDG_DATA_HOME (~/.local/share) elsewhere.
+
+    Args:
+        parts: Subfolders to append
+
+    Returns:
+        Folder path
+    """
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.environ.get('APPDATA') or os.path.expanduser('~')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Application Support')
+    else:
+        base = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    path = os.path.join(base, APP_NAME, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,100 @@
+"""
+Snapshot Assignment
+Maximum-weight one-to-one assignment of detected names to roster entries,
+so two detections in one snapshot cannot both claim the same roll number
+"""
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+
+def _hungarian(cost):
+    """
+    Minimum-cost assignment of every row to a distinct column (rows <= columns)
+
+    Shortest augmenting path version of the Hungarian algorithm with row and
+    column potentials, O(rows^2 * columns); the inner step over columns is
+    vectorized.
+
+    Returns:
+        Column assigned to each row
+    """
+    rows, cols = cost.shape
+    u = np.zeros(rows + 1)
+    v = np.zeros(cols + 1)
+    owner = np.zeros(cols + 1, dtype=np.int64)  # 1-based row holding each column, 0 = free
+    way = np.zeros(cols + 1, dtype=np.int64)
+    for row in range(1, rows + 1):
+        owner[0] = row
+        col = 0
+        min_reduced = np.full(cols + 1, np.inf)
+        used = np.zeros(cols + 1, dtype=bool)
+        while True:
+            used[col] = True
+            current = owner[col]
+            reduced = cost[current - 1] - u[current] - v[1:]
+            free = ~used[1:]
+            better = free & (reduced < min_reduced[1:])
+            min_reduced[1:][better] = reduced[better]
+            way[1:][better] = col
+            candidates = np.flatnonzero(free)
+            next_col = candidates[np.argmin(min_reduced[1:][candidates])] + 1
+            delta = min_reduced[next_col]
+            u[owner[used]] += delta
+            v[used] -= delta
+            min_reduced[~used] -= delta
+            col = next_col
+            if owner[col] == 0:
+                break
+        # Flip the augmenting path
+        while col:
+            previous = way[col]
+            owner[col] = owner[previous]
+            col = previous
+
+    assigned = np.empty(rows, dtype=np.int64)
+    assigned[owner[1:][owner[1:] > 0] - 1] = np.flatnonzero(owner[1:] > 0)
+    return assigned
+
+
+def max_weight_assignment(weights, capacity=1):
+    """
+    Maximum-weight assignment of rows to columns
+
+    Pairs with weight 0 are never assigned, so a row whose only options are
+    below the threshold (weight 0) stays unassigned. Only columns some row
+    can use take part in the solve.
+
+    Args:
+        weights: (rows, columns) array of non-negative weights
+        capacity: Rows each column may take
+
+    Returns:
+        {row: column} for the assigned rows
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.size == 0:
+        return {}
+    columns = np.flatnonzero((weights > 0).any(axis=0))
+    if len(columns) == 0:
+        return {}
+
+    # A column that takes several rows is repeated once per slot
+    slots = np.repeat(columns, capacity)
+    matrix = weights[:, slots]
+
+    if SCIPY_AVAILABLE:
+        rows, cols = linear_sum_assignment(matrix, maximize=True)
+    elif matrix.shape[0] <= matrix.shape[1]:
+        rows = np.arange(matrix.shape[0])
+        cols = _hungarian(-matrix)
+    else:
+        cols = np.arange(matrix.shape[1])
+        rows = _hungarian(-matrix.T)
+
+    return {int(row): int(slots[col]) for row, col in zip(rows, cols) if matrix[row, col] > 0}
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Matcher benchmark
+Generates rosters of 50 to 50k names and OCR-style detections of their
+students, then measures match_name and match_batch throughput and latency
+and the precision and recall of the matches at several thresholds. The
+results are written as JSON, and can be compared with an earlier run to
+catch regressions.
+
+Each result also has the per-strategy hit rates and timings of the
+match_name run, and --strategies benchmarks another strategy pipeline.
+
+Usage: python bench_matcher.py [--sizes 50,500,5000,50000] [--queries 500]
+       [--thresholds 50,60,70,80] [--strategies roll_prefix,exact,fuzzy]
+       [--output results.json] [--baseline old.json]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from bench_roster_index import make_name
+from matcher import DEFAULT_STRATEGIES, RollMatcher
+from roster_index import RosterIndex
+from store import AttendanceStore
+
+DEFAULT_SIZES = (50, 500, 5000, 50000)
+DEFAULT_THRESHOLDS = (50, 60, 70, 80)
+
+# How a detection differs from the roster name it was made from
+NOISE = ("exact", "drop", "double", "case", "host", "roll", "swap", "host+drop")
+
+
+def make_roster(rng, size):
+    """{name: roll} of size distinct generated names, rolls 1..size"""
+    names = []
+    seen = set()
+    while len(names) < size:
+        name = make_name(rng)
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return {name: str(i + 1) for i, name in enumerate(names)}
+
+
+def drop_letter(rng, text):
+    """text without one of its letters"""
+    letters = [i for i, char in enumerate(text) if char.isalpha()]
+    i = rng.choice(letters)
+    return text[:i] + text[i + 1:]
+
+
+def make_detection(rng, roster, names, negative_rate=0.2):
+    """
+    A detected name as OCR would read it
+
+    Args:
+        rng: random.Random
+        roster: {name: roll}
+        names: list(roster), for sampling
+        negative_rate: Share of detections of people not on the roster
+
+    Returns:
+        (text, expected_roll, noise) with expected_roll None for people not on the roster
+    """
+    if rng.random() < negative_rate:
+        while True:
+            name = make_name(rng)
+            if name not in roster:
+                return name, None, "absent"
+
+    name = rng.choice(names)
+    roll = roster[name]
+    noise = rng.choice(NOISE)
+    if noise == "drop":
+        text = drop_letter(rng, name)
+    elif noise == "double":
+        i = rng.randrange(len(name))
+        text = name[:i] + name[i] + name[i:]
+    elif noise == "case":
+        text = name.upper() if rng.random() < 0.5 else name.lower()
+    elif noise == "host":
+        text = f"{name} ({rng.choice(['Host', 'Co-host', 'Me'])})"
+    elif noise == "roll":
+        text = f"{roll}. {name}"
+    elif noise == "swap":
+        text = " ".join(reversed(name.split()))
+    elif noise == "host+drop":
+        text = f"{drop_letter(rng, name)} (Host)"
+    else:
+        text = name
+    return text, roll, noise
+
+
+def latency_summary(times, count):
+    """Throughput and latency percentiles for count names matched in the given times (seconds)"""
+    total = sum(times)
+    times = sorted(t * 1000 for t in times)
+
+    def percentile(q):
+        return times[min(int(len(times) * q), len(times) - 1)]
+
+    return {
+        'throughput_per_s': count / total if total > 0 else 0.0,
+        'latency_ms': {
+            'mean': statistics.mean(times),
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': times[-1],
+        },
+    }
+
+
+def accuracy(detections, results):
+    """
+    Precision and recall of match results
+
+    A match is correct when it has the expected roll number. Wrong students
+    and matches for people not on the roster are false positives; students
+    left unmatched or matched to someone else are false negatives.
+    """
+    tp = fp = fn = 0
+    for (text, expected, _), result in zip(detections, results):
+        matched = result.get('status') == 'matched'
+        if matched and result.get('roll') == expected:
+            tp += 1
+            continue
+        if matched:
+            fp += 1
+        if expected is not None:
+            fn += 1
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {'precision': precision, 'recall': recall, 'f1': f1, 'tp': tp, 'fp': fp, 'fn': fn}
+
+
+def new_matcher(index, threshold, folder, strategies=DEFAULT_STRATEGIES):
+    """Matcher with its own empty store, so no aliases carry over between runs"""
+    handle, path = tempfile.mkstemp(suffix=".db", dir=folder)
+    os.close(handle)
+    store = AttendanceStore(path)
+    matcher = RollMatcher(threshold=threshold, cache_size=0, store=store, strategies=strategies)
+    matcher.use_index(index)
+    matcher.warmup()
+    return matcher, store
+
+
+def run(index, detections, threshold, batch_size, folder, strategies=DEFAULT_STRATEGIES):
+    """
+    Match every detection with match_name, then in snapshots with match_batch
+
+    The match cache is off, so every lookup does the full matching work.
+    Strategy statistics are those of the match_name run.
+
+    Returns:
+        Result dict for one roster size and threshold
+    """
+    texts = [text for text, _, _ in detections]
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        matcher, store = new_matcher(index, threshold, folder, strategies)
+        matcher.reset_strategy_stats()  # Leave out the warmup
+        single, single_times = [], []
+        for text in texts:
+            start = time.perf_counter()
+            single.append(matcher.match_name(text))
+            single_times.append(time.perf_counter() - start)
+        strategy_stats = matcher.strategy_stats()
+        store.close()
+
+        matcher, store = new_matcher(index, threshold, folder, strategies)
+        batched, batch_times = {}, []
+        for i in range(0, len(texts), batch_size):
+            start = time.perf_counter()
+            batched.update(matcher.match_batch(texts[i:i + batch_size]))
+            batch_times.append(time.perf_counter() - start)
+        store.close()
+
+    batch_results = [batched[text] for text in texts]
+    by_noise = {}
+    for detection, result in zip(detections, single):
+        group = by_noise.setdefault(detection[2], ([], []))
+        group[0].append(detection)
+        group[1].append(result)
+    return {
+        'roster_size': len(index),
+        'threshold': threshold,
+        'queries': len(texts),
+        'match_name': latency_summary(single_times, len(texts)),
+        'match_batch': dict(latency_summary(batch_times, len(texts)), batch_size=batch_size),
+        'accuracy': accuracy(detections, single),
+        'batch_accuracy': accuracy(detections, batch_results),
+        'accuracy_by_noise': {noise: accuracy(*by_noise[noise]) for noise in sorted(by_noise)},
+        'strategies': strategy_stats,
+    }
+
+
+def compare(baseline, current, tolerance=0.005, max_slowdown=1.5):
+    """
+    Regressions of current against baseline results
+
+    Args:
+        baseline: Earlier output of main()
+        current: Output of main()
+        tolerance: Largest acceptable drop in precision or recall
+        max_slowdown: Largest acceptable throughput ratio baseline / current
+
+    Returns:
+        List of regression descriptions (empty if there are none)
+    """
+    previous = {(r['roster_size'], r['threshold']): r for r in baseline['results']}
+    problems = []
+    for result in current['results']:
+        key = (result['roster_size'], result['threshold'])
+        old = previous.get(key)
+        if old is None:
+            continue
+        label = f"roster {key[0]}, threshold {key[1]}"
+        for metric in ('precision', 'recall'):
+            if result['accuracy'][metric] < old['accuracy'][metric] - tolerance:
+                problems.append(f"{label}: {metric} {old['accuracy'][metric]:.4f} -> "
+                                f"{result['accuracy'][metric]:.4f}")
+        for mode in ('match_name', 'match_batch'):
+            before, after = old[mode]['throughput_per_s'], result[mode]['throughput_per_s']
+            if after * max_slowdown < before:
+                problems.append(f"{label}: {mode} throughput {before:.0f}/s -> {after:.0f}/s")
+    return problems
+
+
+def main(sizes=DEFAULT_SIZES, query_count=500, thresholds=DEFAULT_THRESHOLDS, batch_size=50, seed=42,
+         strategies=DEFAULT_STRATEGIES):
+    """
+    Run the benchmark
+
+    Args:
+        strategies: Match strategy pipeline to benchmark (see RollMatcher.strategies)
+
+    Returns:
+        {'generated', 'config', 'environment', 'results': [...]} as written to JSON
+    """
+    print("Matcher benchmark")
+    print("=" * 100)
+    print(f"{'Roster':>7} {'Thr':>4} {'name/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'batch/s':>8} {'Precision':>10} {'Recall':>8} {'F1':>6}")
+    print("-" * 100)
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for size in sizes:
+            rng = random.Random(seed + size)
+            roster = make_roster(rng, size)
+            names = list(roster)
+            detections = [make_detection(rng, roster, names) for _ in range(query_count)]
+
+            start = time.perf_counter()
+            index = RosterIndex(roster)
+            build_ms = (time.perf_counter() - start) * 1000
+
+            for threshold in thresholds:
+                result = run(index, detections, threshold, batch_size, folder, strategies)
+                result['index_build_ms'] = build_ms
+                results.append(result)
+                single, acc = result['match_name'], result['accuracy']
+                print(f"{size:>7} {threshold:>4} {single['throughput_per_s']:>8.0f} "
+                      f"{single['latency_ms']['p50']:>8.3f} {single['latency_ms']['p95']:>8.3f} "
+                      f"{single['latency_ms']['p99']:>8.3f} {result['match_batch']['throughput_per_s']:>8.0f} "
+                      f"{acc['precision']:>10.4f} {acc['recall']:>8.4f} {acc['f1']:>6.4f}")
+
+    # Where the match_name time went, over every run
+    totals = {}
+    for result in results:
+        for name, stats in result['strategies'].items():
+            total = totals.setdefault(name, {'runs': 0, 'hits': 0, 'total_ms': 0.0})
+            for key in total:
+                total[key] += stats[key]
+    print("-" * 100)
+    print(f"{'Strategy':<14} {'runs':>8} {'hits':>8} {'hit %':>7} {'mean ms':>9} {'total ms':>10}")
+    for name, total in totals.items():
+        print(f"{name:<14} {total['runs']:>8} {total['hits']:>8} "
+              f"{total['hits'] / total['runs'] * 100 if total['runs'] else 0:>7.1f} "
+              f"{total['total_ms'] / total['runs'] if total['runs'] else 0:>9.4f} {total['total_ms']:>10.1f}")
+
+    return {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'config': {'sizes': list(sizes), 'queries': query_count, 'thresholds': list(thresholds),
+                   'batch_size': batch_size, 'seed': seed, 'noise': list(NOISE),
+                   'strategies': list(strategies)},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpus': os.cpu_count()},
+        'results': results,
+    }
+
+
+def parse_list(text):
+    return tuple(int(value) for value in text.split(',') if value)
+
+
+def parse_names(text):
+    return tuple(value.strip() for value in text.split(',') if value.strip())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark name matching speed and accuracy")
+    parser.add_argument("--sizes", type=parse_list, default=DEFAULT_SIZES, help="Roster sizes, e.g. 50,500")
+    parser.add_argument("--queries", type=int, default=500, help="Detections per roster")
+    parser.add_argument("--thresholds", type=parse_list, default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--batch-size", type=int, default=50, help="Names per match_batch snapshot")
+    parser.add_argument("--strategies", type=parse_names, default=DEFAULT_STRATEGIES,
+                        help="Match strategies in order, e.g. roll_prefix,exact,fuzzy")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Fail if results regressed against this JSON file")
+    args = parser.parse_args()
+
+    report = main(args.sizes, args.queries, args.thresholds, args.batch_size, args.seed, args.strategies)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            problems = compare(json.load(f), report)
+        for problem in problems:
+            print(f"REGRESSION: {problem}")
+        sys.exit(1 if problems else 0)
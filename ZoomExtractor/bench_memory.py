@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark
+Simulates a long attendance session against a large roster and measures,
+with tracemalloc, the memory held by the roster index and by everything
+the matcher accumulates over the session (match records, aliases and the
+match cache). The results are written as JSON and can be compared with an
+earlier run.
+
+Usage: python bench_memory.py [--roster 100000] [--hours 8] [--interval 10]
+       [--participants 150] [--assign] [--output results.json] [--baseline old.json]
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from bench_matcher import drop_letter, make_detection, make_roster
+from matcher import RollMatcher
+from roster_index import RosterIndex
+from store import AttendanceStore
+
+
+def ocr_read(rng, text, error_rate):
+    """text as one OCR pass reads it: usually as is, sometimes with one letter dropped or doubled"""
+    if rng.random() >= error_rate:
+        return text
+    if rng.random() < 0.5:
+        return drop_letter(rng, text)
+    i = rng.randrange(len(text))
+    return text[:i] + text[i] + text[i:]
+
+
+def traced_mb():
+    """Memory currently traced by tracemalloc, in MB"""
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] / (1024 * 1024)
+
+
+def main(roster_size=100000, hours=8.0, interval=10.0, participants=150, error_rate=0.02,
+         churn=0.002, assign=False, seed=42):
+    """
+    Run the benchmark
+
+    Args:
+        roster_size: Students on the roster
+        hours: Simulated session length
+        interval: Seconds between participant list snapshots
+        participants: People in the meeting at any time
+        error_rate: Share of names OCR misreads in a snapshot
+        churn: Chance per snapshot that a participant leaves and someone else joins
+        assign: Resolve detections claiming the same student, as the GUI does (on
+            large rosters its per-snapshot score matrices dominate the peak and
+            the run time, but are freed after each snapshot)
+        seed: Random seed
+
+    Returns:
+        {'generated', 'config', 'environment', 'results'} as written to JSON
+    """
+    rng = random.Random(seed)
+    roster = make_roster(rng, roster_size)
+    names = list(roster)
+    snapshots = int(hours * 3600 / interval)
+    print(f"Memory benchmark: {roster_size} students, {snapshots} snapshots of {participants} participants")
+
+    with tempfile.TemporaryDirectory() as folder:
+        tracemalloc.start()
+        start_mb = traced_mb()
+        index = RosterIndex(roster)
+        index_mb = traced_mb() - start_mb
+
+        store = AttendanceStore(os.path.join(folder, "attendance.db"))
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            matcher = RollMatcher(store=store)
+            matcher.use_index(index)
+            loaded_mb = traced_mb()
+
+            # Display names of the people in the meeting, students (as they
+            # typed their names) and guests
+            meeting = [make_detection(rng, roster, names, negative_rate=0.1)[0] for _ in range(participants)]
+            started = time.perf_counter()
+            for _ in range(snapshots):
+                for i in range(participants):
+                    if rng.random() < churn:
+                        meeting[i] = make_detection(rng, roster, names, negative_rate=0.1)[0]
+                snapshot = [ocr_read(rng, name, error_rate) for name in meeting]
+                matcher.match_batch(snapshot, assign=assign)
+            elapsed = time.perf_counter() - started
+
+        session_mb = traced_mb() - loaded_mb
+        peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+        state = matcher.snapshot()
+        records = len(state.matched_records) + len(state.persistent_records)
+        result = {
+            'index_mb': index_mb,
+            'session_mb': session_mb,
+            'peak_mb': peak_mb,
+            'bytes_per_record': session_mb * 1024 * 1024 / records if records else 0.0,
+            'matched_records': len(state.matched_records),
+            'persistent_records': len(state.persistent_records),
+            'cache_entries': matcher.cache_stats()['size'],
+            'session_seconds': elapsed,
+        }
+        store.close()
+
+    print(f"Roster index:   {result['index_mb']:8.1f} MB")
+    print(f"Session:        {result['session_mb']:8.1f} MB for {result['matched_records']} matched records, "
+          f"{result['persistent_records']} aliases and {result['cache_entries']} cached matches")
+    print(f"Per record:     {result['bytes_per_record']:8.0f} bytes")
+    print(f"Peak traced:    {result['peak_mb']:8.1f} MB")
+    print(f"Simulated in {elapsed:.1f} s")
+
+    return {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'config': {'roster_size': roster_size, 'hours': hours, 'interval': interval,
+                   'participants': participants, 'error_rate': error_rate, 'churn': churn,
+                   'assign': assign, 'seed': seed},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'results': result,
+    }
+
+
+def compare(baseline, current):
+    """Lines describing the memory change from baseline to current results"""
+    lines = []
+    for metric in ('index_mb', 'session_mb', 'peak_mb', 'bytes_per_record'):
+        before, after = baseline['results'][metric], current['results'][metric]
+        change = (after - before) / before * 100 if before else 0.0
+        lines.append(f"{metric}: {before:.1f} -> {after:.1f} ({change:+.1f}%)")
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure matcher memory over a simulated session")
+    parser.add_argument("--roster", type=int, default=100000, help="Students on the roster")
+    parser.add_argument("--hours", type=float, default=8.0, help="Simulated session length")
+    parser.add_argument("--interval", type=float, default=10.0, help="Seconds between snapshots")
+    parser.add_argument("--participants", type=int, default=150, help="People in the meeting")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Share of names misread per snapshot")
+    parser.add_argument("--churn", type=float, default=0.002, help="Chance per snapshot a participant is replaced")
+    parser.add_argument("--assign", action="store_true", help="Resolve conflicting claims in each snapshot")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with the results in this JSON file")
+    args = parser.parse_args()
+
+    report = main(args.roster, args.hours, args.interval, args.participants, args.error_rate,
+                  args.churn, args.assign, args.seed)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            for line in compare(json.load(f), report):
+                print(line)
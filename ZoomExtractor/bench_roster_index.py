@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Roster index benchmark
+Compares the pruned lookup used for large rosters with an exhaustive scan:
+recall (same name and score as the scan) and per-lookup latency.
+
+Usage: python bench_roster_index.py [roster_size] [queries] [threshold]
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from rapidfuzz import fuzz, process
+
+from roster_index import CandidatePruner, sort_tokens
+
+SYLLABLES = ["ra", "hi", "mo", "sa", "fa", "ak", "ash", "em", "on", "ja", "hid", "nu", "sr", "at", "ta",
+             "nv", "ir", "ul", "is", "lam", "kh", "an", "ch", "ow", "dh", "ury", "ss", "ain", "me", "he", "di"]
+
+
+def make_name(rng):
+    """Random Bengali-style full name"""
+    words = ("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+             for _ in range(rng.randint(1, 3)))
+    return " ".join(words)
+
+
+def make_query(rng, names):
+    """A roster name with OCR-like noise, or an unrelated name"""
+    if rng.random() < 0.2:
+        return make_name(rng)
+    name = rng.choice(names)
+    op = rng.choice(["drop", "double", "swap", "case", "none"])
+    i = rng.randrange(len(name))
+    if op == "drop":
+        return name[:i] + name[i + 1:]
+    if op == "double":
+        return name[:i] + name[i] + name[i:]
+    if op == "swap":
+        return " ".join(reversed(name.split()))
+    if op == "case":
+        return name.upper()
+    return name
+
+
+def main(roster_size=50000, query_count=500, threshold=60):
+    rng = random.Random(42)
+    names = []
+    seen = set()
+    while len(names) < roster_size:
+        name = make_name(rng)
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    choices = [sort_tokens(name) for name in names]
+    queries = [sort_tokens(make_query(rng, names)) for _ in range(query_count)]
+
+    start = time.perf_counter()
+    pruner = CandidatePruner(choices)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    exhaustive, pruned = [], []
+    scan_times, pruned_times = [], []
+    for query in queries:
+        start = time.perf_counter()
+        result = process.extractOne(query, choices, scorer=fuzz.ratio, score_cutoff=threshold)
+        scan_times.append(time.perf_counter() - start)
+        exhaustive.append(None if result is None else (result[2], result[1]))
+
+        start = time.perf_counter()
+        pruned.append(pruner.best(query, threshold))
+        pruned_times.append(time.perf_counter() - start)
+
+    same = sum(1 for a, b in zip(exhaustive, pruned) if a == b)
+
+    def summary(times):
+        times = sorted(t * 1000 for t in times)
+        return f"mean {statistics.mean(times):.3f} ms   p50 {times[len(times) // 2]:.3f} ms   " \
+               f"p95 {times[int(len(times) * 0.95)]:.3f} ms"
+
+    print("Roster index benchmark")
+    print("=" * 60)
+    print(f"Roster: {roster_size} names, {query_count} queries, threshold {threshold}")
+    print(f"Index build:  {build_ms:.1f} ms")
+    print(f"Exhaustive:   {summary(scan_times)}")
+    print(f"Pruned:       {summary(pruned_times)}")
+    print(f"Recall:       {same}/{query_count} identical to the exhaustive scan ({same / query_count * 100:.2f}%)")
+    return same == query_count
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    sys.exit(0 if main(*args) else 1)
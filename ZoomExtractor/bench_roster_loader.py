@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Roster loader benchmark
+Loads a generated roster as CSV, TSV, Excel and text, with the vectorized
+loader and with the previous row-by-row code, and checks both give the
+same roster.
+
+Usage: python bench_roster_loader.py [rows] [formats...]
+"""
+
+import contextlib
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from bench_roster_index import make_name
+from roster_loader import load_roster_file
+
+
+def legacy_sheet_roster(df):
+    """Previous load_from_google_sheet loop over a sheet read with a header row"""
+    df = df.dropna(how='all').dropna(axis=1, how='all').reset_index(drop=True)
+    header_row_idx, name_col_idx, roll_col_idx = 0, -1, -1
+    for idx in range(min(5, len(df))):
+        row_str = ' '.join(str(val).strip().lower() for val in df.iloc[idx] if pd.notna(val))
+        if 'name' in row_str or 'roll' in row_str or 'id' in row_str:
+            for col_idx, val in enumerate(df.iloc[idx]):
+                if pd.isna(val):
+                    continue
+                val_str = str(val).strip().lower()
+                if 'name' in val_str:
+                    name_col_idx = col_idx
+                elif 'roll' in val_str or 'id' in val_str:
+                    roll_col_idx = col_idx
+            if name_col_idx != -1 and roll_col_idx != -1:
+                header_row_idx = idx
+                break
+    if name_col_idx == -1 or roll_col_idx == -1:
+        name_col_idx, roll_col_idx, header_row_idx = 0, min(1, len(df.columns) - 1), -1
+    df_data = df.iloc[header_row_idx + 1 if header_row_idx >= 0 else 0:].reset_index(drop=True)
+
+    records = {}
+    for _, row in df_data.iterrows():
+        name_val, roll_val = row.iloc[name_col_idx], row.iloc[roll_col_idx]
+        name = str(name_val).strip() if pd.notna(name_val) else ''
+        roll = str(roll_val).strip() if pd.notna(roll_val) else ''
+        if name and roll and name.lower() != 'nan' and roll.lower() != 'nan' and name != 'None' and roll != 'None':
+            if len(name) > 1 and len(roll) >= 1:
+                records[name] = roll
+    return records
+
+
+def legacy_text_roster(path):
+    """Previous load_from_file loop, printing a line per roster row"""
+    records = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            match = re.match(r'^(\d+)[\.\s\t]+(.+)$', line)
+            if match:
+                records[match.group(2).strip()] = match.group(1).strip()
+                print(f"  Line {line_num}: '{match.group(2).strip()}' → Roll {match.group(1).strip()}")
+                continue
+            parts = line.rsplit(maxsplit=1)
+            if len(parts) >= 2 and (parts[1].strip().isdigit() or len(parts[1].strip()) <= 3):
+                records[parts[0].strip()] = parts[1].strip()
+                print(f"  Line {line_num}: '{parts[0].strip()}' → Roll {parts[1].strip()}")
+                continue
+            print(f"  Line {line_num}: Skipped (unrecognized format): {line}")
+    return records
+
+
+def write_roster(path, fmt, names, rolls):
+    """Write the roster in one format (sheets get a title row and an extra column)"""
+    if fmt == 'txt':
+        with open(path, 'w', encoding='utf-8') as f:
+            for i, (name, roll) in enumerate(zip(names, rolls)):
+                f.write(f"{roll}. {name}\n" if i % 2 else f"{name} {roll}\n")
+        return
+    df = pd.DataFrame({'Name': names, 'Roll': rolls, 'Email': [f"s{roll}@example.edu" for roll in rolls]})
+    if fmt == 'xlsx':
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, index=False, sep='\t' if fmt == 'tsv' else ',')
+
+
+def read_legacy(path, fmt):
+    """Roster the way the previous code read this format"""
+    if fmt == 'txt':
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            return legacy_text_roster(path)
+    if fmt == 'xlsx':
+        return legacy_sheet_roster(pd.read_excel(path))
+    return legacy_sheet_roster(pd.read_csv(path, sep='\t' if fmt == 'tsv' else ','))
+
+
+def main(rows=100000, formats=('csv', 'tsv', 'txt', 'xlsx')):
+    rng = random.Random(7)
+    names = [make_name(rng) for _ in range(rows)]
+    rolls = [str(i + 1) for i in range(rows)]
+
+    print("Roster loader benchmark")
+    print("=" * 60)
+    print(f"Roster: {rows} rows")
+    same = True
+    with tempfile.TemporaryDirectory() as folder:
+        for fmt in formats:
+            path = os.path.join(folder, f"roster.{fmt}")
+            write_roster(path, fmt, names, rolls)
+
+            start = time.perf_counter()
+            legacy = read_legacy(path, fmt)
+            legacy_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            records, count = load_roster_file(path)
+            loader_ms = (time.perf_counter() - start) * 1000
+
+            identical = records == legacy and list(records) == list(legacy)
+            same = same and identical
+            print(f"{fmt:<5} row-by-row {legacy_ms:9.1f} ms   vectorized {loader_ms:9.1f} ms   "
+                  f"{legacy_ms / loader_ms:5.1f}x   {len(records)} names   "
+                  f"{'identical' if identical else 'DIFFERENT'}")
+    return same
+
+
+if __name__ == "__main__":
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    sys.exit(0 if main(row_count, tuple(sys.argv[2:]) or ('csv', 'tsv', 'txt', 'xlsx')) else 1)
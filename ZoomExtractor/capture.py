@@ -0,0 +1,504 @@
+"""
+Screen Capture Backends
+Pluggable screen grabbers for the tracker, with a grab-latency benchmark
+used to pick the fastest one at startup
+"""
+
+import contextlib
+import ctypes
+import ctypes.util
+import os
+import time
+
+import numpy as np
+
+try:
+    from mss import mss
+    MSS_AVAILABLE = True
+except ImportError:
+    MSS_AVAILABLE = False
+
+
+class CaptureBackend:
+    """
+    Base class for screen grabbers
+
+    A backend is opened in the thread that will use it (mss and Xlib handles
+    are not thread safe) and grab() returns a BGRA numpy array for a region
+    dict with 'top', 'left', 'width' and 'height'.
+    """
+
+    name = 'base'
+
+    @classmethod
+    def is_available(cls):
+        """Check whether this backend can run on this machine"""
+        return False
+
+    def open(self):
+        """Acquire native resources"""
+
+    def grab(self, region):
+        """Capture a region as a BGRA numpy array (height x width x 4)"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release native resources"""
+
+    def list_windows(self):
+        """
+        List visible top-level windows
+
+        Returns:
+            List of (title, region) tuples, or None if the backend can't enumerate windows
+        """
+        return None
+
+    def benchmark(self, region, repeats=10):
+        """
+        Measure grab latency for a region
+
+        Args:
+            region: Region dict to grab
+            repeats: Number of timed grabs (one untimed warmup grab is done first)
+
+        Returns:
+            dict with median and best latency in milliseconds
+        """
+        self.grab(region)
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            self.grab(region)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return {
+            'backend': self.name,
+            'median_ms': timings[len(timings) // 2],
+            'best_ms': timings[0],
+        }
+
+
+class MSSBackend(CaptureBackend):
+    """Cross-platform capture through the mss package"""
+
+    name = 'mss'
+
+    @classmethod
+    def is_available(cls):
+        return MSS_AVAILABLE
+
+    def __init__(self):
+        self.sct = None
+
+    def open(self):
+        self.sct = mss()
+
+    def grab(self, region):
+        return np.array(self.sct.grab(region))
+
+    def close(self):
+        if self.sct:
+            self.sct.close()
+            self.sct = None
+
+
+# Xlib constants
+_ZPIXMAP = 2
+_ALL_PLANES = 0xFFFFFFFF  # Only the low 32 bits are used by the server
+_IS_VIEWABLE = 2
+_IPC_PRIVATE = 0
+_IPC_CREAT = 0o1000
+_IPC_RMID = 0
+
+
+class _XImage(ctypes.Structure):
+    # Leading fields only - the image is always accessed through a pointer
+    _fields_ = [
+        ('width', ctypes.c_int),
+        ('height', ctypes.c_int),
+        ('xoffset', ctypes.c_int),
+        ('format', ctypes.c_int),
+        ('data', ctypes.c_void_p),
+        ('byte_order', ctypes.c_int),
+        ('bitmap_unit', ctypes.c_int),
+        ('bitmap_bit_order', ctypes.c_int),
+        ('bitmap_pad', ctypes.c_int),
+        ('depth', ctypes.c_int),
+        ('bytes_per_line', ctypes.c_int),
+        ('bits_per_pixel', ctypes.c_int),
+        ('red_mask', ctypes.c_ulong),
+        ('green_mask', ctypes.c_ulong),
+        ('blue_mask', ctypes.c_ulong),
+    ]
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ('shmseg', ctypes.c_ulong),
+        ('shmid', ctypes.c_int),
+        ('shmaddr', ctypes.c_void_p),
+        ('readOnly', ctypes.c_int),
+    ]
+
+
+class _XWindowAttributes(ctypes.Structure):
+    _fields_ = [
+        ('x', ctypes.c_int),
+        ('y', ctypes.c_int),
+        ('width', ctypes.c_int),
+        ('height', ctypes.c_int),
+        ('border_width', ctypes.c_int),
+        ('depth', ctypes.c_int),
+        ('visual', ctypes.c_void_p),
+        ('root', ctypes.c_ulong),
+        ('class_', ctypes.c_int),
+        ('bit_gravity', ctypes.c_int),
+        ('win_gravity', ctypes.c_int),
+        ('backing_store', ctypes.c_int),
+        ('backing_planes', ctypes.c_ulong),
+        ('backing_pixel', ctypes.c_ulong),
+        ('save_under', ctypes.c_int),
+        ('colormap', ctypes.c_ulong),
+        ('map_installed', ctypes.c_int),
+        ('map_state', ctypes.c_int),
+        ('all_event_masks', ctypes.c_long),
+        ('your_event_mask', ctypes.c_long),
+        ('do_not_propagate_mask', ctypes.c_long),
+        ('override_redirect', ctypes.c_int),
+        ('screen', ctypes.c_void_p),
+    ]
+
+
+_X_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+
+
+@_X_ERROR_HANDLER
+def _ignore_x_errors(display, event):
+    # The default Xlib handler exits the process on errors such as BadWindow
+    # when a window disappears while we are enumerating it. Only installed
+    # around our own calls (X11Backend._x_errors_ignored) so Tk keeps its handler
+    return 0
+
+
+def _load_library(name):
+    path = ctypes.util.find_library(name)
+    return ctypes.CDLL(path, use_errno=True) if path else None
+
+
+def _bind_xlib(xlib, xext, libc):
+    """Declare the Xlib/XShm/SysV signatures used by X11Backend"""
+    p, ul, i, u = ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int, ctypes.c_uint
+    img = ctypes.POINTER(_XImage)
+    shm = ctypes.POINTER(_XShmSegmentInfo)
+    signatures = [
+        (xlib, 'XOpenDisplay', [ctypes.c_char_p], p),
+        (xlib, 'XCloseDisplay', [p], i),
+        (xlib, 'XDefaultRootWindow', [p], ul),
+        (xlib, 'XDefaultScreen', [p], i),
+        (xlib, 'XDefaultVisual', [p, i], p),
+        (xlib, 'XDefaultDepth', [p, i], i),
+        (xlib, 'XSync', [p, i], i),
+        (xlib, 'XFree', [p], i),
+        (xlib, 'XSetErrorHandler', [p], p),
+        (xlib, 'XGetImage', [p, ul, i, i, u, u, ul, i], img),
+        (xlib, 'XDestroyImage', [img], i),
+        (xlib, 'XQueryTree', [p, ul, ctypes.POINTER(ul), ctypes.POINTER(ul),
+                              ctypes.POINTER(ctypes.POINTER(ul)), ctypes.POINTER(u)], i),
+        (xlib, 'XFetchName', [p, ul, ctypes.POINTER(ctypes.c_char_p)], i),
+        (xlib, 'XGetWindowAttributes', [p, ul, ctypes.POINTER(_XWindowAttributes)], i),
+        (xlib, 'XTranslateCoordinates', [p, ul, ul, i, i, ctypes.POINTER(i), ctypes.POINTER(i),
+                                         ctypes.POINTER(ul)], i),
+        (xext, 'XShmQueryExtension', [p], i),
+        (xext, 'XShmCreateImage', [p, p, u, i, p, shm, u, u], img),
+        (xext, 'XShmAttach', [p, shm], i),
+        (xext, 'XShmDetach', [p, shm], i),
+        (xext, 'XShmGetImage', [p, ul, img, i, i, ul], i),
+        (libc, 'shmget', [i, ctypes.c_size_t, i], i),
+        (libc, 'shmat', [i, p, i], p),
+        (libc, 'shmdt', [p], i),
+        (libc, 'shmctl', [i, i, p], i),
+    ]
+    for lib, fname, argtypes, restype in signatures:
+        func = getattr(lib, fname)
+        func.argtypes = argtypes
+        func.restype = restype
+
+
+class X11Backend(CaptureBackend):
+    """
+    Direct Xlib capture for Linux, including headless Xvfb servers
+
+    Uses the MIT-SHM extension so the server writes pixels straight into a
+    shared memory segment that numpy reads without a copy through the X
+    socket. Falls back to plain XGetImage when MIT-SHM is unavailable
+    (remote displays, servers started with -extension MIT-SHM).
+    """
+
+    name = 'x11'
+
+    _libs = None
+
+    @classmethod
+    def _load(cls):
+        if cls._libs is None:
+            xlib, xext, libc = _load_library('X11'), _load_library('Xext'), _load_library('c')
+            if not (xlib and xext and libc):
+                cls._libs = ()
+            else:
+                _bind_xlib(xlib, xext, libc)
+                cls._libs = (xlib, xext, libc)
+        return cls._libs
+
+    @classmethod
+    def is_available(cls):
+        return bool(os.environ.get('DISPLAY')) and bool(cls._load())
+
+    def __init__(self, display=None):
+        """
+        Args:
+            display: X display name (defaults to $DISPLAY)
+        """
+        self.display_name = display
+        self.display = None
+        self.root = None
+        self.use_shm = False
+        self._image = None
+        self._shminfo = None
+        self._size = None
+
+    def open(self):
+        self.xlib, self.xext, self.libc = self._load()
+        name = self.display_name.encode() if self.display_name else None
+        self.display = self.xlib.XOpenDisplay(name)
+        if not self.display:
+            raise RuntimeError(f"Cannot open X display {self.display_name or os.environ.get('DISPLAY')}")
+        self.root = self.xlib.XDefaultRootWindow(self.display)
+        self.use_shm = bool(self.xext.XShmQueryExtension(self.display))
+
+    @contextlib.contextmanager
+    def _x_errors_ignored(self, sync=True):
+        """
+        Ignore X errors raised by the calls inside the block, then put back
+        the handler that was installed before (Tk's, or the Xlib default)
+
+        Args:
+            sync: Wait for the server before restoring the handler. Requests
+                without a reply report their errors asynchronously; requests
+                with one (XGetImage, XShmGetImage) report them before returning
+        """
+        previous = self.xlib.XSetErrorHandler(_ignore_x_errors)
+        try:
+            yield
+        finally:
+            if sync:
+                self.xlib.XSync(self.display, 0)
+            self.xlib.XSetErrorHandler(previous)
+
+    def _release_shm(self):
+        if self._image:
+            self.xext.XShmDetach(self.display, ctypes.byref(self._shminfo))
+            self.xlib.XSync(self.display, 0)
+            self.libc.shmdt(self._shminfo.shmaddr)
+            self.xlib.XFree(self._image)
+        self._image = None
+        self._shminfo = None
+        self._size = None
+
+    def _ensure_shm_image(self, width, height):
+        """(Re)create the shared memory image when the region size changes"""
+        if self._size == (width, height):
+            return True
+        self._release_shm()
+
+        screen = self.xlib.XDefaultScreen(self.display)
+        shminfo = _XShmSegmentInfo()
+        image = self.xext.XShmCreateImage(
+            self.display,
+            self.xlib.XDefaultVisual(self.display, screen),
+            self.xlib.XDefaultDepth(self.display, screen),
+            _ZPIXMAP, None, ctypes.byref(shminfo), width, height
+        )
+        if not image:
+            return False
+
+        size = image.contents.bytes_per_line * height
+        shminfo.shmid = self.libc.shmget(_IPC_PRIVATE, size, _IPC_CREAT | 0o600)
+        if shminfo.shmid < 0:
+            self.xlib.XFree(image)
+            return False
+        shminfo.shmaddr = self.libc.shmat(shminfo.shmid, None, 0)
+        image.contents.data = shminfo.shmaddr
+        shminfo.readOnly = 0
+
+        # Remote servers refuse the attach with BadAccess
+        with self._x_errors_ignored():
+            attached = self.xext.XShmAttach(self.display, ctypes.byref(shminfo))
+        # Mark for removal now; the segment lives until both sides detach
+        self.libc.shmctl(shminfo.shmid, _IPC_RMID, None)
+        if not attached:
+            self.libc.shmdt(shminfo.shmaddr)
+            self.xlib.XFree(image)
+            return False
+
+        self._image = image
+        self._shminfo = shminfo
+        self._size = (width, height)
+        return True
+
+    def _to_array(self, image, width, height, copy):
+        ximage = image.contents
+        if ximage.bits_per_pixel != 32:
+            raise RuntimeError(f"Unsupported X11 pixel format: {ximage.bits_per_pixel} bpp")
+        stride = ximage.bytes_per_line
+        buffer = (ctypes.c_ubyte * (stride * height)).from_address(ximage.data)
+        frame = np.frombuffer(buffer, dtype=np.uint8).reshape(height, stride // 4, 4)[:, :width]
+        return frame.copy() if copy else frame
+
+    def grab(self, region):
+        x, y = int(region['left']), int(region['top'])
+        width, height = int(region['width']), int(region['height'])
+
+        if self.use_shm and self._ensure_shm_image(width, height):
+            with self._x_errors_ignored(sync=False):
+                grabbed = self.xext.XShmGetImage(self.display, self.root, self._image, x, y, _ALL_PLANES)
+            if grabbed:
+                # The shared buffer is overwritten by the next grab
+                return self._to_array(self._image, width, height, copy=True)
+            self.use_shm = False
+            self._release_shm()
+
+        # A region outside the screen fails with BadMatch
+        with self._x_errors_ignored(sync=False):
+            image = self.xlib.XGetImage(self.display, self.root, x, y, width, height, _ALL_PLANES, _ZPIXMAP)
+        if not image:
+            raise RuntimeError(f"XGetImage failed for region {region}")
+        try:
+            return self._to_array(image, width, height, copy=True)
+        finally:
+            self.xlib.XDestroyImage(image)
+
+    def close(self):
+        if self.display:
+            self._release_shm()
+            self.xlib.XCloseDisplay(self.display)
+            self.display = None
+
+    def list_windows(self):
+        windows = []
+        with self._x_errors_ignored():
+            self._collect_windows(self.root, windows)
+        return windows
+
+    def _collect_windows(self, window, windows):
+        """Walk the window tree, recording viewable windows that have a title"""
+        root_ret, parent_ret = ctypes.c_ulong(), ctypes.c_ulong()
+        children = ctypes.POINTER(ctypes.c_ulong)()
+        count = ctypes.c_uint()
+        if not self.xlib.XQueryTree(self.display, window, ctypes.byref(root_ret), ctypes.byref(parent_ret),
+                                    ctypes.byref(children), ctypes.byref(count)):
+            return
+        try:
+            for idx in range(count.value):
+                child = children[idx]
+                attrs = _XWindowAttributes()
+                if not self.xlib.XGetWindowAttributes(self.display, child, ctypes.byref(attrs)):
+                    continue
+                if attrs.map_state != _IS_VIEWABLE:
+                    continue
+
+                title = ctypes.c_char_p()
+                if self.xlib.XFetchName(self.display, child, ctypes.byref(title)) and title.value:
+                    x, y, dummy = ctypes.c_int(), ctypes.c_int(), ctypes.c_ulong()
+                    self.xlib.XTranslateCoordinates(self.display, child, self.root, 0, 0,
+                                                    ctypes.byref(x), ctypes.byref(y), ctypes.byref(dummy))
+                    windows.append((title.value.decode('utf-8', 'replace'), {
+                        "top": y.value,
+                        "left": x.value,
+                        "width": attrs.width,
+                        "height": attrs.height
+                    }))
+                    self.xlib.XFree(title)
+                else:
+                    # Window managers reparent clients into untitled frames
+                    self._collect_windows(child, windows)
+        finally:
+            if children:
+                self.xlib.XFree(children)
+
+
+# Backends in order of preference when benchmarks tie
+BACKENDS = [X11Backend, MSSBackend]
+
+
+def available_backends():
+    """Backend classes usable on this machine"""
+    return [backend for backend in BACKENDS if backend.is_available()]
+
+
+def get_backend(name):
+    """Open a backend by name"""
+    for backend in BACKENDS:
+        if backend.name == name:
+            if not backend.is_available():
+                raise ValueError(f"Capture backend '{name}' is not available")
+            instance = backend()
+            instance.open()
+            return instance
+    raise ValueError(f"Unknown capture backend '{name}'")
+
+
+def select_backend(region=None, repeats=5):
+    """
+    Benchmark every available backend and return the fastest one, opened
+
+    Must be called from the thread that will grab frames.
+
+    Args:
+        region: Region to benchmark with (defaults to a 640x360 area at the origin)
+        repeats: Timed grabs per backend
+
+    Returns:
+        Opened CaptureBackend instance
+    """
+    region = region or {"top": 0, "left": 0, "width": 640, "height": 360}
+    best, best_ms = None, None
+
+    for backend_cls in available_backends():
+        backend = backend_cls()
+        try:
+            backend.open()
+            result = backend.benchmark(region, repeats=repeats)
+        except Exception as e:
+            print(f"Capture backend '{backend_cls.name}' failed: {e}")
+            backend.close()
+            continue
+
+        print(f"Capture backend '{backend.name}': median {result['median_ms']:.2f} ms, best {result['best_ms']:.2f} ms")
+        if best is None or result['median_ms'] < best_ms:
+            if best:
+                best.close()
+            best, best_ms = backend, result['median_ms']
+        else:
+            backend.close()
+
+    if best is None:
+        raise RuntimeError("No screen capture backend available")
+
+    print(f"Using capture backend: {best.name}")
+    return best
+
+
+if __name__ == "__main__":
+    print("Capture backend benchmark")
+    print("=" * 40)
+    for backend_cls in available_backends():
+        backend = backend_cls()
+        try:
+            backend.open()
+            result = backend.benchmark({"top": 0, "left": 0, "width": 640, "height": 360}, repeats=30)
+            print(f"{result['backend']:<8} median {result['median_ms']:.2f} ms   best {result['best_ms']:.2f} ms")
+        except Exception as e:
+            print(f"{backend_cls.name:<8} failed: {e}")
+        finally:
+            backend.close()
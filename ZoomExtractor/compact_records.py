@@ -0,0 +1,283 @@
+"""
+Compact Records
+Column-wise storage for the match records a long session accumulates: every
+detected name variant keeps a row of small integer ids into a shared string
+pool plus a numeric confidence, instead of a dict of its own
+"""
+
+import math
+from collections.abc import Mapping
+
+import numpy as np
+
+# Record fields in the order records are given back; all but confidence are text
+FIELDS = ('matched_name', 'roll', 'confidence', 'status', 'session_id', 'learned', 'method', 'roster')
+TEXT_FIELDS = tuple(field for field in FIELDS if field != 'confidence')
+_TEXT_COLUMN = {field: column for column, field in enumerate(TEXT_FIELDS)}
+
+# Tables rebuild their columns once superseded rows outnumber live ones by this much
+COMPACT_MIN_GARBAGE = 1024
+
+# Writes go to a per-table overlay that is folded into the shared base map once
+# it outgrows this or the square root of the base size, so a write copies
+# O(sqrt(n)) entries instead of the whole {name: row} map
+OVERLAY_MIN_SIZE = 64
+
+_ABSENT = object()
+
+
+class StringPool:
+    """Append-only table of distinct strings, each stored once and referred to by id"""
+
+    def __init__(self):
+        # Id 0 is a missing field, id 1 is None
+        self.strings = [_ABSENT, None]
+        self.ids = {None: 1}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def id(self, text):
+        """Id of text, adding it to the pool if it is new"""
+        i = self.ids.get(text)
+        if i is None:
+            i = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return i
+
+
+class _Columns:
+    """Row storage shared by a table and the tables derived from it"""
+
+    __slots__ = ('pool', 'text', 'confidence', 'integral', 'length')
+
+    def __init__(self, capacity=64):
+        self.pool = StringPool()
+        self.text = np.zeros((capacity, len(TEXT_FIELDS)), dtype=np.int32)
+        self.confidence = np.zeros(capacity, dtype=np.float64)
+        self.integral = np.zeros(capacity, dtype=bool)  # The confidence was given as an int
+        self.length = 0
+
+    def append(self, ids, confidence, integral):
+        """Add a row, growing the arrays as needed; returns its row number"""
+        row = self.length
+        if row == len(self.confidence):
+            # Rows below length never change, so tables still reading the old arrays stay correct
+            self.text = np.concatenate([self.text, np.zeros_like(self.text)])
+            self.confidence = np.concatenate([self.confidence, np.zeros_like(self.confidence)])
+            self.integral = np.concatenate([self.integral, np.zeros_like(self.integral)])
+        self.text[row] = ids
+        self.confidence[row] = confidence
+        self.integral[row] = integral
+        self.length = row + 1
+        return row
+
+
+class RecordTable(Mapping):
+    """
+    Read-only {detected_name: record} mapping stored column-wise
+
+    Text fields are pool ids (so a roll number or session id shared by many
+    rows is stored once) and confidences are one float64 column, given back
+    as ints where they were stored as ints. Records are rebuilt as dicts when
+    read, so callers never see the columns. Records that do not fit the
+    columns (other fields or value types) are kept as they are.
+
+    Tables are immutable: updated() returns a new table. Rows are only ever
+    appended to the shared columns, so the old table stays valid. The
+    {name: row} map is split into a base shared by derived tables and a small
+    overlay of the names each table changed, so deriving a table costs the
+    size of the overlay rather than of the whole table.
+    """
+
+    def __init__(self, records=None):
+        """
+        Build a table
+
+        Args:
+            records: Optional {detected_name: record} mapping to copy
+        """
+        self._columns = _Columns()
+        self._length = 0
+        self._rows = {}  # Base {name: row}, shared with derived tables and never changed
+        self._extra = {}  # Base {name: record} of records that do not fit the columns
+        self._overlay = {}  # {name: row or record} written since the base was built
+        self._size = 0
+        if records:
+            self._write(records.items())
+            self._merge()
+
+    def _encode(self, record):
+        """(text ids, confidence, integral) of a record, or None if it does not fit the columns"""
+        confidence = record.get('confidence')
+        if (not isinstance(confidence, (int, float)) or isinstance(confidence, bool)
+                or not set(record) <= set(FIELDS)):
+            return None
+        ids = []
+        for field in TEXT_FIELDS:
+            value = record.get(field, _ABSENT)
+            if value is _ABSENT:
+                ids.append(0)
+            elif value is None or isinstance(value, str):
+                ids.append(self._columns.pool.id(value))
+            else:
+                return None
+        return ids, confidence, isinstance(confidence, int)
+
+    def _entry(self, name):
+        """Row number or kept record of name, or _ABSENT"""
+        entry = self._overlay.get(name, _ABSENT)
+        if entry is _ABSENT:
+            entry = self._rows.get(name, _ABSENT)
+            if entry is _ABSENT:
+                entry = self._extra.get(name, _ABSENT)
+        return entry
+
+    def _write(self, items):
+        """Store (detected_name, record) pairs in this table's overlay (only while it is being built)"""
+        columns = self._columns
+        for name, record in items:
+            entry = self._entry(name)
+            encoded = self._encode(record)
+            if encoded is None:
+                self._overlay[name] = dict(record)
+            else:
+                ids, confidence, integral = encoded
+                if (isinstance(entry, int) and columns.confidence[entry] == confidence
+                        and columns.integral[entry] == integral and columns.text[entry].tolist() == ids):
+                    continue  # Unchanged, so no superseded row is left behind
+                self._overlay[name] = columns.append(ids, confidence, integral)
+            if entry is _ABSENT:
+                self._size += 1
+        self._length = columns.length
+
+    def _merge(self):
+        """Fold the overlay into new base maps (only while the table is being built)"""
+        overlay = self._overlay
+        if not overlay:
+            return
+        rows = {name: row for name, row in self._rows.items() if name not in overlay}
+        extra = {name: record for name, record in self._extra.items() if name not in overlay}
+        for name, entry in overlay.items():
+            if isinstance(entry, dict):
+                extra[name] = entry
+            else:
+                rows[name] = entry
+        self._rows, self._extra, self._overlay = rows, extra, {}
+
+    def updated(self, records):
+        """
+        Table with {detected_name: record} added or replaced
+
+        Args:
+            records: Mapping of new records
+
+        Returns:
+            New RecordTable (this one is unchanged)
+
+        Writers must not derive tables concurrently (RollMatcher holds its
+        state_lock); readers need no lock.
+        """
+        table = RecordTable.__new__(RecordTable)
+        table._rows = self._rows
+        table._extra = self._extra
+        table._overlay = dict(self._overlay)
+        table._size = self._size
+        if self._columns.length == self._length:
+            table._columns = self._columns
+        else:
+            # A table derived from this one already appended here; start over from the rows
+            table._columns = _Columns()
+            table._rows, table._extra, table._overlay = {}, {}, {}
+            table._size = 0
+            table._write((name, self[name]) for name in self)
+            table._merge()
+        table._length = table._columns.length
+        table._write(records.items())
+        if table._length - len(table) > max(len(table), COMPACT_MIN_GARBAGE):
+            return RecordTable(table)
+        if len(table._overlay) > max(OVERLAY_MIN_SIZE, math.isqrt(len(table._rows) + len(table._extra))):
+            table._merge()
+        return table
+
+    def removed(self, names):
+        """
+        Table without the records of names
+
+        Returns:
+            New RecordTable (this one is unchanged); it shares this table's columns
+        """
+        names = set(names)
+        table = RecordTable.__new__(RecordTable)
+        table._columns = self._columns
+        table._length = self._length
+        table._rows = {name: row for name, row in self._rows.items() if name not in names}
+        table._extra = {name: record for name, record in self._extra.items() if name not in names}
+        table._overlay = {name: entry for name, entry in self._overlay.items() if name not in names}
+        table._merge()
+        table._size = len(table._rows) + len(table._extra)
+        return table
+
+    def __getitem__(self, name):
+        entry = self._entry(name)
+        if entry is _ABSENT:
+            raise KeyError(name)
+        if isinstance(entry, dict):
+            return dict(entry)
+        columns = self._columns
+        strings = columns.pool.strings
+        ids = columns.text[entry].tolist()
+        record = {}
+        for field in FIELDS:
+            if field == 'confidence':
+                confidence = columns.confidence[entry]
+                record[field] = int(confidence) if columns.integral[entry] else float(confidence)
+            elif ids[_TEXT_COLUMN[field]]:
+                record[field] = strings[ids[_TEXT_COLUMN[field]]]
+        return record
+
+    def __contains__(self, name):
+        return name in self._overlay or name in self._rows or name in self._extra
+
+    def __iter__(self):
+        overlay = self._overlay
+        for name in self._rows:
+            if name not in overlay:
+                yield name
+        for name in self._extra:
+            if name not in overlay:
+                yield name
+        yield from overlay
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f"RecordTable({dict(self)!r})"
+
+
+class MatchEntry:
+    """A memoized match: the fields of its result and its candidates (see RollMatcher._match)"""
+
+    __slots__ = ('matched_name', 'roll', 'confidence', 'status', 'options', 'floor', 'ceiling')
+
+    def __init__(self, result, candidates):
+        self.matched_name = result['matched_name']
+        self.roll = result['roll']
+        self.confidence = result['confidence']
+        self.status = result['status']
+        self.options, self.floor, self.ceiling = candidates
+
+    @property
+    def candidates(self):
+        """(options, floor, ceiling) as given to the constructor"""
+        return self.options, self.floor, self.ceiling
+
+    def result(self):
+        """The match result as a new dict"""
+        return {
+            'matched_name': self.matched_name,
+            'roll': self.roll,
+            'confidence': self.confidence,
+            'status': self.status,
+        }
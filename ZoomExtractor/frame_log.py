@@ -0,0 +1,179 @@
+"""
+Frame Recorder Module
+Fixed-size in-memory history of recent frames and OCR/match decisions,
+dumped to a single file when an attendance result is disputed
+"""
+
+import json
+import threading
+import time
+import zipfile
+import zlib
+from collections import deque
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+
+class FrameRecorder:
+    def __init__(self, capacity=240, scale=0.5, max_bytes=32 * 1024 * 1024):
+        """
+        Initialize recorder
+
+        Args:
+            capacity: Number of frames kept (oldest are dropped first)
+            scale: Downsampling factor applied to stored frames
+            max_bytes: Upper bound on compressed frame bytes held in memory
+        """
+        self.capacity = capacity
+        self.scale = scale
+        self.max_bytes = max_bytes
+        self.frames = deque(maxlen=capacity)
+        self.stored_bytes = 0
+        self.frame_count = 0  # Total frames ever recorded, used as a sequence number
+        self.lock = threading.Lock()
+
+    def _compress(self, frame):
+        """Downsample to grayscale and deflate; returns (bytes, shape)"""
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+        if self.scale != 1:
+            frame = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        # Level 1 is several times faster than the default and text panels still compress well
+        return zlib.compress(np.ascontiguousarray(frame).data, 1), frame.shape
+
+    def record(self, frame, boxes, readings, region_id=None):
+        """
+        Append a processed frame
+
+        Args:
+            frame: Captured screenshot (BGRA/BGR/gray numpy array)
+            boxes: (x1, y1, x2, y2) tile box per row, in full-size frame pixels
+            readings: read_tile() result per row (None for rows that failed)
+            region_id: Region key when several regions are tracked
+        """
+        data, shape = self._compress(frame)
+        rows = []
+        for row, (box, reading) in enumerate(zip(boxes, readings)):
+            reading = reading or {}
+            rows.append({
+                'row': row,
+                'box': [int(v) for v in box],
+                'lang': reading.get('lang'),
+                'candidates': list(reading.get('candidates', [])),
+                'chosen': reading.get('text'),
+                'name': reading.get('name'),
+            })
+
+        entry = {
+            'time': time.time(),
+            'region': region_id,
+            'shape': shape,
+            'data': data,
+            'rows': rows,
+            'matches': {},
+        }
+
+        with self.lock:
+            if len(self.frames) == self.capacity:
+                self.stored_bytes -= len(self.frames[0]['data'])
+            self.frames.append(entry)
+            self.stored_bytes += len(data)
+            self.frame_count += 1
+            entry['seq'] = self.frame_count
+
+            # Enforce the byte budget too, in case frames are unusually large
+            while self.stored_bytes > self.max_bytes and len(self.frames) > 1:
+                self.stored_bytes -= len(self.frames.popleft()['data'])
+
+    def record_image(self, data, boxes, readings, region_id=None):
+        """
+        Append a frame given as encoded image bytes (e.g. a browser screenshot PNG)
+
+        Args:
+            data: PNG or JPEG bytes
+            boxes, readings, region_id: As for record()
+        """
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError("Could not decode the image")
+        self.record(frame, boxes, readings, region_id=region_id)
+
+    def record_matches(self, matches, region_id=None):
+        """
+        Attach match results to the newest frame that contains each name
+
+        Args:
+            matches: {detected_name: match_result} as returned by RollMatcher.match_batch
+            region_id: Region the names came from, if several are tracked
+        """
+        with self.lock:
+            pending = dict(matches)
+            for entry in reversed(self.frames):
+                if not pending:
+                    break
+                if region_id is not None and entry['region'] != region_id:
+                    continue
+                for row in entry['rows']:
+                    name = row['name']
+                    if name in pending:
+                        match = pending.pop(name)
+                        entry['matches'][name] = {
+                            'matched_name': match.get('matched_name'),
+                            'roll': match.get('roll'),
+                            'confidence': match.get('confidence'),
+                            'status': match.get('status'),
+                        }
+
+    def __len__(self):
+        return len(self.frames)
+
+    def dump(self, path=None):
+        """
+        Write the buffered history to a single zip file
+
+        The archive has a manifest.json with every frame's tile boxes, OCR
+        candidates, chosen strings and match results, and one PNG per frame.
+
+        Args:
+            path: Output file (defaults to frames_<timestamp>.zip)
+
+        Returns:
+            Path written
+        """
+        if path is None:
+            path = f"frames_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+
+        # record_matches() keeps adding to the newest frames' matches, so
+        # everything the manifest needs is copied while the lock is held
+        with self.lock:
+            frames = [(entry['data'], entry['shape'], {
+                'seq': entry['seq'],
+                'time': datetime.fromtimestamp(entry['time']).isoformat(),
+                'region': entry['region'],
+                'image': None,
+                'rows': [dict(row, candidates=list(row['candidates'])) for row in entry['rows']],
+                'matches': dict(entry['matches']),
+            }) for entry in self.frames]
+
+        manifest = {
+            'generated': datetime.now().isoformat(),
+            'scale': self.scale,
+            'frames': [],
+        }
+
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for data, shape, frame_entry in frames:
+                image = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(shape)
+                ok, png = cv2.imencode('.png', image)
+                image_name = f"frames/{frame_entry['seq']:06d}.png"
+                if ok:
+                    archive.writestr(image_name, png.tobytes())
+                    frame_entry['image'] = image_name
+                manifest['frames'].append(frame_entry)
+
+            archive.writestr('manifest.json', json.dumps(manifest, indent=2, ensure_ascii=False))
+
+        print(f"Dumped {len(frames)} frames to {path}")
+        return path
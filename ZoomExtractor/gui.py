@@ -7,15 +7,31 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
+import os
 import threading
+import multiprocessing
 from datetime import datetime
 import pandas as pd
 import requests
+from app_paths import app_data_dir
+from match_worker import MatchWorker
 from matcher import RollMatcher
+from roster_cache import RosterCache
+from roster_watch import RosterWatcher
+from sheet_fetch import SheetFetcher
+from normalizer import default_normalizer
+from store import AttendanceStore
 import time
 import queue
 import pyperclip
 
+# Recent participant panel screenshots need OpenCV
+try:
+    from frame_log import FrameRecorder
+    FRAME_RECORDER_AVAILABLE = True
+except ImportError:
+    FRAME_RECORDER_AVAILABLE = False
+
 # Import zoommeeting functionality
 try:
     from faker import Faker
@@ -30,6 +46,9 @@ except ImportError:
     ZOOM_MEETING_AVAILABLE = False
     print("Warning: Zoom meeting functionality not available. Install selenium and faker.")
 
+# Slider changes are applied once it has been still this long
+THRESHOLD_DEBOUNCE_MS = 300
+
 
 class AttendanceApp:
     def __init__(self, root):
@@ -43,7 +62,22 @@ class AttendanceApp:
         pass
         
         # Initialize components
-        self.matcher = RollMatcher()
+        # Attendance history lives in SQLite; the old JSON file is imported once
+        self.store = AttendanceStore(os.path.join(app_data_dir(), "attendance.db"))
+        try:
+            self.store.import_legacy_json("attendance_persistence.json")
+        except Exception as e:
+            print(f"Warning: Could not import attendance_persistence.json: {e}")
+        self.matcher = RollMatcher(store=self.store, roster_cache=RosterCache(),
+                                   sheet_fetcher=SheetFetcher(app_data_dir("sheet_cache")))
+        self.roster_watcher = None  # Applies edits to the loaded roster file
+        self.match_worker = MatchWorker(self.matcher)  # Matches snapshots off the monitor thread
+        self.finish_thread = None  # Matches the snapshots left when tracking stops
+        self.session_ended = False  # The matcher's session was closed by stop_tracking
+        self.live_names = []  # Participants in the live table
+        self.frame_recorder = None  # Recent participant panel screenshots, while enabled
+        self.threshold_job = None  # Pending debounced threshold change
+        self.reclassifying = False  # A threshold change is being applied on a worker thread
         
         # State
         self.is_tracking = False
@@ -62,6 +96,13 @@ class AttendanceApp:
         self.create_tabs()
         self.create_status_bar()
         
+        # Warm up matching in the background while the user is on the setup tab
+        self.start_warmup()
+        
+        # Queued store writes are committed on a timer and at exit
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(int(self.store.flush_interval * 1000), self.flush_store)
+        
     def create_menu(self):
         """Create menu bar"""
         menubar = tk.Menu(self.root)
@@ -75,8 +116,9 @@ class AttendanceApp:
         file_menu.add_separator()
         file_menu.add_command(label="Export to Excel", command=self.export_excel, accelerator="Ctrl+E")
         file_menu.add_command(label="Export to CSV", command=self.export_csv, accelerator="Ctrl+Shift+E")
+        file_menu.add_command(label="Save Recent Frames...", command=self.save_recent_frames)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit, accelerator="Ctrl+Q")
+        file_menu.add_command(label="Exit", command=self.on_close, accelerator="Ctrl+Q")
         
         # Help menu
         help_menu = tk.Menu(menubar, tearoff=0)
@@ -88,8 +130,8 @@ class AttendanceApp:
         self.root.bind('<Control-o>', lambda e: self.load_roll_file())
         self.root.bind('<Control-e>', lambda e: self.export_excel())
         self.root.bind('<Control-E>', lambda e: self.export_excel())
-        self.root.bind('<Control-q>', lambda e: self.root.quit())
-        self.root.bind('<Control-Q>', lambda e: self.root.quit())
+        self.root.bind('<Control-q>', lambda e: self.on_close())
+        self.root.bind('<Control-Q>', lambda e: self.on_close())
         
     def create_tabs(self):
         """Create tabbed interface"""
@@ -189,13 +231,23 @@ class AttendanceApp:
                                                bootstyle="round-toggle")
         continuous_save_check.grid(row=1, column=0, columnspan=3, sticky=tk.W, pady=5)
         
+        # Frame recording option
+        self.frame_recording_var = tk.BooleanVar(value=False)
+        frame_recording_check = ttk.Checkbutton(frame_settings, 
+                                               text="Keep Recent Frames (screenshots of the participant list)", 
+                                               variable=self.frame_recording_var, 
+                                               command=self.toggle_frame_recording,
+                                               bootstyle="round-toggle")
+        frame_recording_check.grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=5)
+        
         # Add help text
         help_label = ttk.Label(frame_settings, 
                               text="Tip: Higher threshold = stricter matching\n"
-                              "Continuous save protects against data loss",
+                              "Continuous save protects against data loss\n"
+                              "Recent frames can be saved (File menu) when a result is disputed",
                               font=('Arial', 8), 
                               foreground='gray')
-        help_label.grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=5)
+        help_label.grid(row=3, column=0, columnspan=3, sticky=tk.W, pady=5)
         
         frame_settings.columnconfigure(1, weight=1)
         
@@ -325,18 +377,49 @@ class AttendanceApp:
         """Load roll number file"""
         filepath = filedialog.askopenfilename(
             title="Select Roll Number File",
-            filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")]
+            filetypes=[("Roster Files", "*.txt *.csv *.tsv *.xlsx *.xls"), ("Text Files", "*.txt"),
+                       ("Spreadsheets", "*.csv *.tsv *.xlsx *.xls"), ("All Files", "*.*")]
         )
         
         if filepath:
             try:
+                self.stop_roster_watcher()
                 count = self.matcher.load_from_file(filepath)
                 self.roll_file_loaded = True
                 self.roll_status.config(text=f"✓ {count} records loaded", foreground="green")
                 self.log(f"Loaded {count} roll numbers from file", "success")
+                self.start_warmup()
+                self.roster_watcher = RosterWatcher(self.matcher, filepath, on_change=self.roster_file_changed)
+                self.roster_watcher.start()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load file:\n{e}")
                 
+    def stop_roster_watcher(self):
+        """Stop applying edits from the previously loaded roster file"""
+        if self.roster_watcher is not None:
+            self.roster_watcher.stop()
+            self.roster_watcher = None
+    
+    def roster_file_changed(self, changes):
+        """Called from the watcher thread after edits to the roster file were applied"""
+        def update():
+            count = len(self.matcher.database)
+            self.roll_status.config(text=f"✓ {count} records loaded", foreground="green")
+            self.log(f"Roster file changed: {len(changes['added'])} added, {len(changes['removed'])} removed, "
+                     f"{len(changes['renamed'])} renamed", "success")
+            for name, result in changes['rematched'].items():
+                if result.get('status') == 'matched':
+                    self.log(f"Now matched: {name} -> {result['matched_name']} ({result['roll']})", "success")
+        self.root.after(0, update)
+    
+    def roster_updated(self, count):
+        """Called from a background thread when a cached roster was replaced by a newer download"""
+        def update():
+            self.roll_status.config(text=f"✓ {count} records loaded", foreground="green")
+            self.log(f"Roster changed since it was cached; reloaded {count} roll numbers", "success")
+            self.start_warmup()
+        self.root.after(0, update)
+    
     def load_google_sheet(self):
         """Load roll numbers from Google Sheet"""
         # Create a dialog to get the Google Sheet URL
@@ -366,11 +449,13 @@ class AttendanceApp:
             url = url_var.get().strip()
             if url:
                 try:
-                    count = self.matcher.load_from_google_sheet(url)
+                    self.stop_roster_watcher()
+                    count = self.matcher.load_from_google_sheet(url, on_update=self.roster_updated)
                     self.roll_file_loaded = True
                     self.roll_status.config(text=f"✓ {count} records loaded", foreground="green")
                     self.log(f"Loaded {count} roll numbers from Google Sheet", "success")
                     dialog.destroy()
+                    self.start_warmup()
                 except Exception as e:
                     messagebox.showerror("Error", f"Failed to load Google Sheet:\n{e}")
             else:
@@ -385,24 +470,51 @@ class AttendanceApp:
         # Bind Enter key to load
         entry.bind('<Return>', lambda e: load_sheet())
         
+    def flush_store(self):
+        """Commit saved records older than their flush interval, then check again later"""
+        try:
+            self.matcher.flush_due()
+        except Exception as e:
+            print(f"Warning: Could not save attendance data: {e}")
+        self.root.after(int(self.store.flush_interval * 1000), self.flush_store)
+        
+    def on_close(self):
+        """Stop tracking, commit pending attendance data and exit"""
+        if self.is_tracking:
+            self.stop_tracking()
+        if self.finish_thread is not None:
+            # Snapshots still queued are matched and saved before exiting
+            self.finish_thread.join()
+            self.tracking_finished()
+        self.stop_roster_watcher()
+        try:
+            self.store.close()
+        except Exception as e:
+            print(f"Warning: Could not save attendance data: {e}")
+        self.root.destroy()
+        
+    def start_warmup(self):
+        """Warm up the matcher in a background thread and report how long it took"""
+        def run():
+            try:
+                elapsed = self.matcher.warmup()
+                self.root.after(0, lambda: self.log(f"Matcher warmup finished in {elapsed * 1000:.0f} ms", "info"))
+            except Exception as e:
+                message = f"Warmup failed: {e}"  # e is unbound once the except block ends
+                self.root.after(0, lambda: self.log(message, "warning"))
+        
+        threading.Thread(target=run, daemon=True).start()
+        
     def copy_attendance_to_clipboard(self):
         """Copy attendance data to clipboard in the specified format"""
         try:
             # Get matched participants with roll numbers from both current session and persistent records
+            # (one snapshot, so matching can go on while it is read)
+            state = self.matcher.snapshot()
             matched_participants = []
             
-            # Add current session records
-            for name, match_data in self.matcher.matched_records.items():
-                if match_data.get('status') == 'matched' and match_data.get('roll') and match_data.get('roll') != 'N/A':
-                    try:
-                        roll_num = int(match_data['roll'])
-                        matched_participants.append(roll_num)
-                    except ValueError:
-                        # Skip if roll number is not a valid integer
-                        continue
-            
-            # Add persistent records
-            for name, match_data in self.matcher.persistent_records.items():
+            # This session's results, and persistent records of names without one
+            for name, match_data in state.all_records().items():
                 if match_data.get('status') == 'matched' and match_data.get('roll') and match_data.get('roll') != 'N/A':
                     try:
                         roll_num = int(match_data['roll'])
@@ -458,6 +570,12 @@ class AttendanceApp:
             return
         
         try:
+            # Each meeting is recorded as a session of its own
+            if self.session_ended:
+                self.matcher.new_session()
+                self.session_ended = False
+                self.tree.delete(*self.tree.get_children())
+                self.update_stats(0, 0, 0)
             self.stop_event.clear()
             self.meeting_active = True
             self.is_tracking = True
@@ -478,6 +596,7 @@ class AttendanceApp:
             self.meeting_thread.start()
             
             # Start participant monitoring thread
+            self.match_worker.start()
             monitor_thread = threading.Thread(target=self._monitor_participants, daemon=True)
             monitor_thread.start()
             
@@ -489,16 +608,36 @@ class AttendanceApp:
         self.stop_event.set()
         self.meeting_active = False
         self.is_tracking = False
-        self.btn_start.config(state=tk.NORMAL)
         self.btn_stop.config(state=tk.DISABLED)
         self.log("Meeting stopped", "warning")
-        self.status_bar.config(text="Ready")
+        self.status_bar.config(text="Matching remaining participants...")
+        
+        # Snapshots still queued are matched first, so the report includes them
+        def finish():
+            self.match_worker.stop()
+            self.root.after(0, self.tracking_finished)
+        
+        self.finish_thread = threading.Thread(target=finish, daemon=True)
+        self.finish_thread.start()
+        
+    def tracking_finished(self):
+        """End the session and show the report once queued snapshots are matched (Tk thread)"""
+        if self.finish_thread is None:
+            return
+        self.finish_thread = None
+        # Close this meeting's presence intervals and commit pending writes
+        self.store.end_session(self.matcher.session_id)
+        self.session_ended = True
         self.generate_report()
+        self.btn_start.config(state=tk.NORMAL)
+        self.status_bar.config(text="Ready")
         
     def reset_data(self):
         """Reset all data"""
         if messagebox.askyesno("Confirm", "Reset all attendance data?"):
-            self.matcher.matched_records = {}
+            # Later results go to a new session; earlier ones stay in the store
+            self.matcher.new_session()
+            self.session_ended = False
             self.tree.delete(*self.tree.get_children())
             self.update_stats(0, 0, 0)
             # Reset refresh counter
@@ -510,10 +649,45 @@ class AttendanceApp:
     # with the new Zoom meeting approach
         
     def update_threshold(self, value):
-        """Update match threshold"""
+        """Show the slider's threshold and apply it once the slider settles"""
         val = int(float(value))
         self.threshold_label.config(text=str(val))
-        self.matcher.threshold = val
+        if self.threshold_job is not None:
+            self.root.after_cancel(self.threshold_job)
+        self.threshold_job = self.root.after(THRESHOLD_DEBOUNCE_MS, self.apply_threshold)
+        
+    def apply_threshold(self):
+        """Re-classify earlier detections at the slider's threshold on a worker thread"""
+        self.threshold_job = None
+        # A running re-classification applies the latest value when it finishes
+        if self.reclassifying:
+            return
+        val = int(self.threshold_var.get())
+        if val == self.matcher.threshold:
+            return
+        self.reclassifying = True
+        
+        def run():
+            try:
+                self.matcher.threshold = val
+            except Exception as e:
+                message = f"Error applying threshold: {e}"
+                self.root.after(0, lambda: self.log(message, "error"))
+            self.root.after(0, self.threshold_applied)
+        
+        threading.Thread(target=run, daemon=True).start()
+        
+    def threshold_applied(self):
+        """Show the re-classified participants (called on the Tk thread)"""
+        self.reclassifying = False
+        # Earlier detections were re-classified without scoring them again
+        records = self.matcher.snapshot().matched_records
+        shown = {name: records[name] for name in self.live_names if name in records}
+        if shown:
+            self.update_participant_list(shown)
+        # The slider may have moved again meanwhile
+        if self.threshold_job is None:
+            self.apply_threshold()
         
     def toggle_continuous_save(self):
         """Toggle continuous save feature"""
@@ -523,11 +697,43 @@ class AttendanceApp:
         else:
             self.log("Continuous save disabled", "warning")
         
+    def toggle_frame_recording(self):
+        """Toggle keeping recent participant list screenshots"""
+        if not self.frame_recording_var.get():
+            self.frame_recorder = None
+            self.log("Frame recording disabled", "warning")
+            return
+        if not FRAME_RECORDER_AVAILABLE:
+            self.frame_recording_var.set(False)
+            messagebox.showerror("Error", "Frame recording is not available. Please install opencv-python.")
+            return
+        self.frame_recorder = FrameRecorder()
+        self.log("Frame recording enabled", "success")
+        
+    def save_recent_frames(self):
+        """Save the recent frames and their match results to a zip file"""
+        recorder = self.frame_recorder
+        if recorder is None or len(recorder) == 0:
+            messagebox.showinfo("Info", "No recent frames to save. Enable Keep Recent Frames in the Setup tab.")
+            return
+        path = filedialog.asksaveasfilename(
+            defaultextension=".zip",
+            filetypes=[("Zip files", "*.zip"), ("All files", "*.*")],
+            initialfile=f"frames_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        )
+        if path:
+            try:
+                recorder.dump(path)
+                self.log(f"Saved {len(recorder)} recent frames to {path}", "success")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save frames:\n{e}")
+        
     # Removed on_tracker_update method as it's no longer needed
     # with the new Zoom meeting approach
             
     def update_participant_list(self, matches):
         """Update participant treeview - show all matched participants"""
+        self.live_names = list(matches)
         self.tree.delete(*self.tree.get_children())
         
         matched_count = 0
@@ -607,7 +813,8 @@ class AttendanceApp:
             filename = "attendance_report.txt"
             
             # Generate report content using combined records
-            stats = self.matcher.get_statistics() if self.roll_file_loaded else None
+            state = self.matcher.snapshot()
+            stats = self.matcher.get_statistics(state) if self.roll_file_loaded else None
             
             report = "=" * 60 + "\n"
             report += "ZOOM ATTENDANCE REPORT\n"
@@ -628,17 +835,15 @@ class AttendanceApp:
             # Get matched participants from both current session and persistent records
             matched_participants = []
             
-            # Add current session records
-            for name, match_data in self.matcher.matched_records.items():
-                if match_data.get('status') == 'matched' and match_data.get('roll') and match_data.get('roll') != 'N/A':
-                    matched_participants.append((name, match_data['roll']))
+            seen_rolls = set()
             
-            # Add persistent records
-            for name, match_data in self.matcher.persistent_records.items():
+            # This session's results, and persistent records of names without one
+            for name, match_data in state.all_records().items():
                 if match_data.get('status') == 'matched' and match_data.get('roll') and match_data.get('roll') != 'N/A':
                     # Check if this participant is already in the list to avoid duplicates
-                    if not any(roll == match_data['roll'] for _, roll in matched_participants):
+                    if match_data['roll'] not in seen_rolls:
                         matched_participants.append((name, match_data['roll']))
+                        seen_rolls.add(match_data['roll'])
             
             # Sort by roll number
             matched_participants.sort(key=lambda x: x[1])
@@ -657,7 +862,8 @@ class AttendanceApp:
         
     def generate_report(self):
         """Generate session report with only matched participants"""
-        stats = self.matcher.get_statistics() if self.roll_file_loaded else None
+        state = self.matcher.snapshot()
+        stats = self.matcher.get_statistics(state) if self.roll_file_loaded else None
         
         report = "=" * 60 + "\n"
         report += "ZOOM ATTENDANCE REPORT\n"
@@ -677,17 +883,15 @@ class AttendanceApp:
         # Get matched participants from both current session and persistent records
         matched_participants = []
         
-        # Add current session records
-        for name, match_data in self.matcher.matched_records.items():
-            if match_data.get('status') == 'matched' and match_data.get('roll') and match_data.get('roll') != 'N/A':
-                matched_participants.append((name, match_data['roll']))
+        seen_rolls = set()
         
-        # Add persistent records
-        for name, match_data in self.matcher.persistent_records.items():
+        # This session's results, and persistent records of names without one
+        for name, match_data in state.all_records().items():
             if match_data.get('status') == 'matched' and match_data.get('roll') and match_data.get('roll') != 'N/A':
                 # Check if this participant is already in the list to avoid duplicates
-                if not any(roll == match_data['roll'] for _, roll in matched_participants):
+                if match_data['roll'] not in seen_rolls:
                     matched_participants.append((name, match_data['roll']))
+                    seen_rolls.add(match_data['roll'])
         
         # Sort by roll number
         matched_participants.sort(key=lambda x: x[1])
@@ -1065,91 +1269,101 @@ class AttendanceApp:
             ]
             
             names = []
+            rows = []  # (element, text as scraped, name) for the frame recorder
+            normalizer = default_normalizer()
             for sel in name_selectors:
                 try:
                     elems = driver.find_elements(By.CSS_SELECTOR, sel)
                     for e in elems:
                         text = e.text.strip()
                         if text and text not in names and len(text) > 1:
-                            # Clean up the participant name
-                            # Remove (Host, me) and similar annotations
-                            import re
-                            text = re.sub(r'\(.*?(?:Host|Me|me).*?\)', '', text, flags=re.IGNORECASE).strip()
-                            
-                            # Filter out unwanted UI elements
-                            unwanted_patterns = [
-                                'Unmute', 'start Video', 'Participants', 'chat', 'Reactions', 
-                                'Share Screen', 'more', 'leave', 'Pleader', 'upgrade your browser',
-                                'update your browder', 'Speaker', 'Gallery View', 'Participant (',
-                                'Mute', 'Turn off', 'NEW', 'Invite', 'Record', 'Security', 'Manage Participants',
-                                'Stop Video', 'Batch-72-01'
-                            ]
-                            
-                            is_unwanted = False
-                            for pattern in unwanted_patterns:
-                                if pattern.lower() in text.lower():
-                                    is_unwanted = True
-                                    break
-                            
-                            # Also filter out text with numbers in parentheses like "(3)"
-                            if re.search(r'\(\s*\d+\s*\)', text):
-                                is_unwanted = True
-                                
-                            if not is_unwanted and text and text not in names:
-                                names.append(text)
+                            # Drop (Host, me) annotations; UI labels and counters come back empty
+                            name = normalizer.clean_scraped(text)
+                            if name and name not in names:
+                                names.append(name)
+                                rows.append((e, text, name))
                     if names:
                         break
                 except Exception:
                     pass
             
+            if self.frame_recorder is not None and rows:
+                self._record_frame(driver, rows)
+            
             return names
             
         except Exception as e:
             self.log(f"Error fetching participants: {e}")
             return []
     
+    def _record_frame(self, driver, rows):
+        """Keep a screenshot of the participant list with the names read from it"""
+        try:
+            ratio = driver.execute_script("return window.devicePixelRatio") or 1
+            boxes = []
+            for element, _, _ in rows:
+                rect = element.rect
+                boxes.append((rect['x'] * ratio, rect['y'] * ratio,
+                              (rect['x'] + rect['width']) * ratio, (rect['y'] + rect['height']) * ratio))
+            readings = [{'text': text, 'name': name} for _, text, name in rows]
+            self.frame_recorder.record_image(driver.get_screenshot_as_png(), boxes, readings)
+        except Exception as e:
+            self.log(f"Could not record frame: {e}")
+    
     def _monitor_participants(self):
-        """Monitor participant queue and update UI continuously"""
+        """Route participant snapshots to the match worker and its results to the UI"""
         while not self.stop_event.is_set():
             try:
-                # Process all available participant data in the queue
-                processed = False
+                # Hand all available participant data to the match worker
                 while not self.participants_queue.empty():
                     try:
                         participants = self.participants_queue.get_nowait()
                         if participants:
+                            self.store.update_presence(self.matcher.session_id, participants)
                             # Match names if roll file loaded
                             if self.roll_file_loaded:
-                                matches = self.matcher.match_batch(participants)
+                                self.match_worker.submit(participants)
                             else:
                                 matches = {name: {'matched_name': name, 'roll': 'N/A', 'confidence': 0, 'status': 'no_db'} 
                                           for name in participants}
-                            
-                            # Update UI
-                            self.root.after(0, lambda m=matches: self.update_participant_list(m))
-                            
-                            # Log event
-                            self.root.after(0, lambda p=len(participants): self.log(f"Participants updated: {p} detected"))
-                            
-                            # Continuous save if enabled
-                            if self.continuous_save_enabled:
-                                self.root.after(0, self.save_continuous_report)
-                            
-                            processed = True
+                                self.show_matches(participants, matches)
                     except queue.Empty:
                         break
                 
-                # If we processed data, add a small delay to prevent excessive CPU usage
-                if processed:
-                    time.sleep(0.1)
+                # Show matched snapshots as they come back (waiting a little for one)
+                try:
+                    participants, matches, error = self.match_worker.results.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                if error is not None:
+                    self.log(f"Error matching participants: {error}")
                 else:
-                    # If no data, wait a bit longer
-                    time.sleep(0.5)
+                    self.show_matches(participants, matches)
                     
             except Exception as e:
                 self.log(f"Error in participant monitor: {e}")
                 time.sleep(1)  # Wait longer on error to prevent spam
     
+    def show_matches(self, participants, matches):
+        """Schedule the UI updates for one matched snapshot (called from the monitor thread)"""
+        recorder = self.frame_recorder
+        if recorder is not None:
+            recorder.record_matches(matches)
+        
+        # Update UI
+        self.root.after(0, lambda m=matches: self.update_participant_list(m))
+        
+        # Log event, with the snapshots still waiting to be matched
+        waiting = self.match_worker.depth()
+        message = f"Participants updated: {len(participants)} detected"
+        if waiting:
+            message += f" ({waiting} snapshots waiting)"
+        self.root.after(0, lambda: self.log(message))
+        
+        # Continuous save if enabled
+        if self.continuous_save_enabled:
+            self.root.after(0, self.save_continuous_report)
+    
     def show_help(self):
         """Show user guide dialog"""
         help_text = (
@@ -1164,7 +1378,9 @@ class AttendanceApp:
             "   - Click '⏹ Stop' to end tracking\n\n"
             "3. REPORTS TAB:\n"
             "   - View attendance report\n"
-            "   - Export to Excel/CSV or copy to clipboard\n\n"
+            "   - Export to Excel/CSV or copy to clipboard\n"
+            "   - With Keep Recent Frames on, File > Save Recent Frames saves the\n"
+            "     last participant list screenshots to check a disputed result\n\n"
             "Keyboard Shortcuts:\n"
             "   Ctrl+O - Load Roll Numbers\n"
             "   Ctrl+E - Export to Excel\n"
@@ -1190,4 +1406,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # The match worker's scoring process starts from this executable when frozen
+    multiprocessing.freeze_support()
     main()
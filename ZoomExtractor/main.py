@@ -2,6 +2,7 @@
 Main Entry Point - Zoom Attendance System
 """
 
+import multiprocessing
 import sys
 import tkinter as tk
 from gui import AttendanceApp
@@ -19,4 +20,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # The match worker's scoring process starts from this executable when frozen
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,184 @@
+"""
+Match Worker
+Matches participant snapshots on a thread of its own, so the live monitor
+only routes data: snapshots go in with submit() and their match maps come
+back through a result queue. Fuzzy scoring of large batches against large
+rosters runs in a separate process, where it does not compete with the Tk
+thread for the GIL.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from roster_index import PRUNE_MIN_SIZE, RosterIndex
+
+# A batch is scored in the worker process when it has at least this many
+# texts to score and the roster has at least PROCESS_MIN_ROSTER names
+PROCESS_MIN_TEXTS = 16
+PROCESS_MIN_ROSTER = PRUNE_MIN_SIZE
+
+# (fingerprint, RosterIndex) kept by the scoring process between batches
+_process_index = None
+
+
+def _process_best_matches(fingerprint, database, texts, folded, score_cutoff):
+    """
+    RosterIndex.best_matches in the scoring process
+
+    Args:
+        fingerprint: Fingerprint of the roster to score against
+        database: The roster's {name: roll_number}, or None to use the index
+            the process kept. The index is rebuilt here, reusing the forms of
+            names the previous roster had, so only the dict crosses processes
+        texts, folded, score_cutoff: As for best_matches
+
+    Returns:
+        best_matches' list, or None if the process does not have that roster
+    """
+    global _process_index
+    if database is not None:
+        previous = _process_index[1] if _process_index is not None else None
+        _process_index = (fingerprint, RosterIndex(database, base=previous))
+    elif _process_index is None or _process_index[0] != fingerprint:
+        return None
+    return _process_index[1].best_matches(texts, folded=folded, score_cutoff=score_cutoff)
+
+
+class MatchWorker:
+    def __init__(self, matcher, assign=True, use_process=True, process_min_texts=PROCESS_MIN_TEXTS,
+                 process_min_roster=PROCESS_MIN_ROSTER):
+        """
+        Initialize worker
+
+        Args:
+            matcher: RollMatcher to match snapshots with
+            assign: Resolve detections claiming the same student (see match_batch)
+            use_process: Score large batches in a separate process
+            process_min_texts: Fewest texts scored in the process
+            process_min_roster: Smallest roster scored in the process
+        """
+        self.matcher = matcher
+        self.assign = assign
+        self.use_process = use_process
+        self.process_min_texts = process_min_texts
+        self.process_min_roster = process_min_roster
+        self.snapshots = queue.Queue()
+        self.results = queue.Queue()  # (participants, matches, error) per snapshot, in order
+        self.thread = None
+        self.executor = None
+        self.sent_fingerprint = None  # Roster the scoring process holds
+
+        self.lock = threading.Lock()
+        self.stopped = False  # Set by stop(); snapshots submitted after it are dropped
+        self.submitted = 0
+        self.processed = 0
+        self.max_depth = 0
+        self.wait_time = 0.0
+        self.match_time = 0.0
+        self.process_calls = 0
+
+    def start(self):
+        """Start matching submitted snapshots on a background thread"""
+        if self.thread is None:
+            self.results = queue.Queue()  # Results an earlier run left uncollected belong to that run
+            with self.lock:
+                self.stopped = False
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop once the snapshots already submitted are matched (waits for them)"""
+        with self.lock:
+            self.stopped = True
+            if self.thread is not None:
+                self.snapshots.put(None)
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def submit(self, participants):
+        """
+        Queue a snapshot of participant names; its result arrives on self.results
+
+        Returns:
+            True if queued, False if the worker was stopped (the snapshot is dropped)
+        """
+        with self.lock:
+            if self.stopped:
+                return False
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, self.submitted - self.processed)
+            # Queued under the lock so nothing lands behind stop()'s sentinel
+            self.snapshots.put((time.perf_counter(), list(participants)))
+        return True
+
+    def depth(self):
+        """Snapshots submitted and not yet matched (including one being matched)"""
+        with self.lock:
+            return self.submitted - self.processed
+
+    def stats(self):
+        """Get queue depth and timing statistics"""
+        with self.lock:
+            return {
+                'depth': self.submitted - self.processed,
+                'max_depth': self.max_depth,
+                'processed': self.processed,
+                'mean_wait_ms': self.wait_time / self.processed * 1000 if self.processed else 0.0,
+                'mean_match_ms': self.match_time / self.processed * 1000 if self.processed else 0.0,
+                'process_calls': self.process_calls,
+            }
+
+    def _run(self):
+        while True:
+            item = self.snapshots.get()
+            if item is None:
+                return
+            submitted_at, participants = item
+            started = time.perf_counter()
+            try:
+                matches = self.matcher.match_batch(participants, assign=self.assign, scorer=self._score)
+                error = None
+            except Exception as e:
+                matches, error = None, e
+            finished = time.perf_counter()
+            with self.lock:
+                self.processed += 1
+                self.wait_time += started - submitted_at
+                self.match_time += finished - started
+            self.results.put((participants, matches, error))
+
+    def _score(self, index, texts, folded, score_cutoff):
+        """Scorer for match_batch: index.best_matches, in the scoring process for large batches"""
+        if (not self.use_process or len(texts) < self.process_min_texts
+                or len(index) < self.process_min_roster):
+            return index.best_matches(texts, folded=folded, score_cutoff=score_cutoff)
+        try:
+            if self.executor is None:
+                # A fresh interpreter, since forking a process with a GUI running is unsafe
+                self.executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+                self.sent_fingerprint = None
+            # The roster is only sent when it changed, as a dict the process indexes itself
+            sent = dict(index.database) if self.sent_fingerprint != index.fingerprint else None
+            result = self.executor.submit(
+                _process_best_matches, index.fingerprint, sent, texts, folded, score_cutoff).result()
+            if result is None:
+                result = self.executor.submit(
+                    _process_best_matches, index.fingerprint, dict(index.database), texts, folded,
+                    score_cutoff).result()
+            self.sent_fingerprint = index.fingerprint
+            with self.lock:
+                self.process_calls += 1
+            return result
+        except Exception as e:
+            print(f"Warning: Scoring process failed ({e}); scoring on the worker thread")
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+            return index.best_matches(texts, folded=folded, score_cutoff=score_cutoff)
@@ -3,85 +3,335 @@ Name-to-Roll Number Matcher
 Handles fuzzy matching of detected names to roll numbers
 """
 
-from rapidfuzz import fuzz, process
+from rapidfuzz import fuzz
+import io
+import math
 import re
-import requests
+import numpy as np
 import pandas as pd
-import json
-import os
+import threading
+import time
+from collections import Counter, OrderedDict
 from datetime import datetime
+from assignment import max_weight_assignment
+from compact_records import MatchEntry
+from matcher_state import MatcherState
+from normalizer import default_normalizer
+from persistence import AttendanceJournal
+from roster_index import RosterIndex
+from roster_loader import load_roster_file, roster_from_frame
+from sheet_fetch import SheetFetcher
+
+# Roll number at the start ("3. Name", "3 Name") or end ("Name 3") of a display name
+LIST_ROLL_PATTERN = re.compile(r'^(\d+)\.?\s+(.+)$')
+END_ROLL_PATTERN = re.compile(r'^(.+)\s+(\d+)$')
+
+# A trailing number after these words is a UI counter, not a roll number
+FORBIDDEN_ROLL_WORDS = ['participant', 'meeting', 'room', 'group', 'section', 'level', 'session']
+
+# A roster name that sounds like the detected name is accepted if its spelling
+# score is at least PHONETIC_MIN_SCORE and no other name is spelled closer; its
+# confidence is raised halfway towards PHONETIC_AGREEMENT_SCORE
+PHONETIC_MIN_SCORE = 75
+PHONETIC_AGREEMENT_SCORE = 90
+
+# Candidate scores down to this are kept with every match, so a later
+# threshold change re-classifies earlier detections without scoring them again
+RECLASSIFY_FLOOR = 50
+
+# Gate of candidates that are accepted at any threshold (roll numbers, exact names)
+ACCEPT_ALWAYS = math.inf
+
+# Match strategies after the alias lookup: name -> (method, matches the name as
+# detected rather than preprocessed). match_name runs the enabled ones in order
+# and stops once a match is accepted at the current threshold; the "_raw" steps
+# only run when preprocessing changed the name
+STRATEGY_STEPS = {
+    'roll_prefix': ('_roll_prefix_options', True),
+    'roll_suffix': ('_roll_suffix_options', True),
+    'exact': ('_exact_options', False),
+    'fuzzy': ('_fuzzy_options', False),
+    'phonetic': ('_phonetic_options', False),
+    'exact_raw': ('_exact_options', True),
+    'fuzzy_raw': ('_fuzzy_options', True),
+    'phonetic_raw': ('_phonetic_options', True),
+}
+DEFAULT_STRATEGIES = tuple(STRATEGY_STEPS)
 
 class RollMatcher:
-    def __init__(self, threshold=60):
+    def __init__(self, threshold=60, cache_size=4096, store=None, normalizer=None, roster_cache=None,
+                 sheet_fetcher=None, strategies=DEFAULT_STRATEGIES,
+                 persistence_file="attendance_persistence.json"):
         """
         Initialize matcher
         
         Args:
             threshold: Minimum similarity score (0-100) for matching
+            cache_size: Number of detected names whose match result is memoized
+            store: Optional AttendanceStore; when given, history lives in it and
+                persistent_records only holds this session's matches
+            normalizer: NameNormalizer for preprocess_name (defaults to the
+                rules in normalization.json)
+            roster_cache: Optional RosterCache; when given, loaded rosters and
+                their indexes are reused across launches
+            sheet_fetcher: SheetFetcher for Google Sheet downloads (defaults to
+                one that keeps no local copy)
+            strategies: Match strategies to run after the alias lookup, in
+                order (names from STRATEGY_STEPS)
+            persistence_file: JSON snapshot (and journal) of persistent records
+                when there is no store
         """
-        self.threshold = threshold
-        self.database = {}  # {name: roll_number}
-        self.matched_records = {}  # {detected_name: (matched_name, roll, confidence)}
+        # Match results by raw detected name; cleared whenever an input to matching changes
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        # Runs, options found, hits and time per match strategy (see strategy_stats())
+        self.strategy_counts = {}
+        self.strategy_lock = threading.Lock()
+        self.strategies = strategies
+        
+        self._threshold = threshold
+        self.normalizer = normalizer or default_normalizer()
+        # Roster index and match records, replaced as a whole on every change (see snapshot())
+        self.state = MatcherState()
+        self.state_lock = threading.Lock()
+        self.roster_cache = roster_cache
+        self.roster_lock = threading.Lock()  # Serializes roster swaps and incremental changes
+        self.sheet_fetcher = sheet_fetcher or SheetFetcher(folder=None)
         
         # Initialize persistent storage
-        self.persistent_records = {}  # Persistent storage for matched records
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.persistence_file = "attendance_persistence.json"
+        self.persistence_file = persistence_file
+        self.journal = None
+        self.store = store
+        if store is not None:
+            store.start_session(self.session_id)
         self.load_persistent_records()
+        self.warmup_time = None
+        
+    def snapshot(self):
+        """
+        Current roster and match records as one MatcherState
+        
+        The state never changes, so it can be read from any thread without
+        locking while matching goes on; later changes swap in a new state.
+        """
+        return self.state
+    
+    def _update_state(self, change):
+        """Swap in change(current state), so concurrent writers never lose each other's updates"""
+        with self.state_lock:
+            self.state = change(self.state)
+    
+    @property
+    def index(self):
+        """RosterIndex of the loaded roster"""
+        return self.state.index
+    
+    @index.setter
+    def index(self, index):
+        self._update_state(lambda state: state.replace(index=index))
+    
+    @property
+    def matched_records(self):
+        """Read-only {detected_name: match_result} of this session's batches"""
+        return self.state.matched_records
+    
+    @matched_records.setter
+    def matched_records(self, records):
+        self._update_state(lambda state: state.replace(matched_records=records))
+    
+    @property
+    def persistent_records(self):
+        """Read-only {detected_name: record} of remembered matches"""
+        return self.state.persistent_records
+    
+    @persistent_records.setter
+    def persistent_records(self, records):
+        self._update_state(lambda state: state.replace(persistent_records=records))
+    
+    @property
+    def database(self):
+        """Read-only {name: roll_number} view of the loaded roster"""
+        return self.index.database
+    
+    @database.setter
+    def database(self, records):
+        # Build the new index completely before swapping it in
+        self.use_index(RosterIndex(records))
+    
+    def use_index(self, index):
+        """Swap in a prebuilt RosterIndex as the loaded roster"""
+        with self.roster_lock:
+            self.index = index
+            self.clear_cache()
+        if self.store is not None:
+            self.store.save_roster(self.session_id, self.index.database, self.index.fingerprint)
+    
+    @property
+    def threshold(self):
+        """Minimum similarity score (0-100) for matching"""
+        return self._threshold
+    
+    @threshold.setter
+    def threshold(self, value):
+        if value != self._threshold:
+            self._threshold = value
+            self.reclassify()
+    
+    @property
+    def corrections(self):
+        """Read-only {wrong: correct} table applied by preprocess_name"""
+        return self.normalizer.corrections
+    
+    @corrections.setter
+    def corrections(self, table):
+        self.normalizer = self.normalizer.with_corrections(table)
+        self.clear_cache()
+    
+    def clear_cache(self):
+        """Forget all memoized match results"""
+        with self.cache_lock:
+            self.cache.clear()
+    
+    def cache_stats(self):
+        """Get match cache statistics"""
+        with self.cache_lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'size': len(self.cache),
+                'max_size': self.cache_size,
+                'hit_rate': (self.cache_hits / lookups * 100) if lookups > 0 else 0
+            }
+    
+    def _cache_get(self, detected_name):
+        """Cached result for a detected name, or None (counts the hit or miss)"""
+        with self.cache_lock:
+            entry = self.cache.get(detected_name)
+            if entry is None:
+                self.cache_misses += 1
+                return None
+            self.cache.move_to_end(detected_name)
+            self.cache_hits += 1
+        return entry.result()
+    
+    def _cache_put(self, index, detected_name, result, candidates):
+        """Memoize a result and its candidates unless the roster was replaced while they were computed"""
+        with self.cache_lock:
+            if index is not self.index or self.cache_size <= 0:
+                return
+            self.cache[detected_name] = MatchEntry(result, candidates)
+            self.cache.move_to_end(detected_name)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+    
+    def reclassify(self):
+        """
+        Apply the current threshold to every detection matched so far
+        
+        Each memoized match keeps its candidates (see _match), so the result
+        at another threshold is the first candidate whose gate reaches it,
+        found for all detections at once without scoring anything again.
+        Detections whose candidates do not cover the threshold (an alias
+        above it, a cutoff that was higher, or a pipeline that stopped at a
+        match below it), and this session's results no longer memoized, are
+        matched again.
+        
+        Nothing is saved while re-classifying: persistent records are not
+        rewritten (as aliases they already only apply while their confidence
+        meets the threshold), and results only this threshold accepts are not
+        learned as aliases. Statistics and exports take this session's
+        results over persistent records, so they follow the re-classification.
+        
+        Returns:
+            {detected_name: match_result} for the detections whose result changed
+        """
+        threshold = self.threshold
+        index = self.index
+        with self.cache_lock:
+            entries = list(self.cache.items())
+        
+        # One row of gates per detection, padded with -inf
+        width = max((len(entry.options) for _, entry in entries), default=0)
+        gates = np.full((len(entries), max(width, 1)), -np.inf)
+        floors = np.empty(len(entries))
+        ceilings = np.empty(len(entries))
+        for row, (_, entry) in enumerate(entries):
+            gates[row, :len(entry.options)] = [option[3] for option in entry.options]
+            floors[row] = entry.floor
+            ceilings[row] = entry.ceiling
+        accepted = gates >= threshold
+        chosen = np.where(accepted.any(axis=1), accepted.argmax(axis=1), -1)
+        covered = (floors <= threshold) & (threshold <= ceilings)
+        
+        changed = {}
+        uncovered = []
+        for row, (name, entry) in enumerate(entries):
+            if not covered[row]:
+                uncovered.append(name)
+                continue
+            option = entry.options[chosen[row]] if chosen[row] >= 0 else None
+            if option is None:
+                if entry.status != 'unknown' and index:
+                    changed[name] = {'matched_name': name, 'roll': 'N/A', 'confidence': 0, 'status': 'unknown'}
+            elif (entry.status != 'matched' or entry.matched_name != option[0]
+                    or entry.confidence != option[1]):
+                changed[name] = self._accept(index, name, option[0], option[1], option[2], deferred={})
         
+        with self.cache_lock:
+            if index is self.index:
+                for name, result in changed.items():
+                    if name in self.cache:
+                        self.cache[name] = MatchEntry(result, self.cache[name].candidates)
+                for name in uncovered:
+                    self.cache.pop(name, None)
+            # This session's results without usable candidates are matched again
+            rematch = [name for name in self.matched_records if name not in self.cache]
+        for name in rematch:
+            result, candidates = self._match(index, name, deferred={})
+            self._cache_put(index, name, result, candidates)
+            changed[name] = result
+        
+        recorded = {name: result for name, result in changed.items() if name in self.matched_records}
+        if recorded:
+            self._update_state(lambda state: state.with_matches(recorded))
+            if self.store is not None:
+                self.store.update_results(self.session_id, recorded)
+        print(f"Threshold {threshold}: re-classified {len(entries)} detections, "
+              f"{len(changed)} changed, {len(rematch)} matched again")
+        return changed
+    
     def load_from_file(self, filepath):
         """
-        Load names and roll numbers from text file
+        Load names and roll numbers from a roster file
         
-        Supports multiple formats:
-        - "Fahad Akash 08" (Name followed by roll)
-        - "1. Jahid" or "1	Jahid" (Roll followed by name)
+        Supports:
+        - CSV, TSV and Excel files with name and roll columns (header optional)
+        - Text files with "Fahad Akash 08" (name followed by roll) or
+          "1. Jahid" / "1	Jahid" (roll followed by name) lines
+        
+        With a roster cache, a file unchanged since it was last loaded (same
+        modification time and size) is not parsed or indexed again.
         
         Returns:
             Number of records loaded
         """
-        self.database = {}
-        count = 0
-        
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    # Try Format 1: "1. Name" or "1	Name" or "1 Name"
-                    # Pattern: number (with optional dot/tab) followed by name
-                    match = re.match(r'^(\d+)[\.\s\t]+(.+)$', line)
-                    if match:
-                        roll = match.group(1).strip()
-                        name = match.group(2).strip()
-                        self.database[name] = roll
-                        count += 1
-                        print(f"  Line {line_num}: '{name}' → Roll {roll}")
-                        continue
-                    
-                    # Try Format 2: "Name RollNumber" (roll at end)
-                    parts = line.rsplit(maxsplit=1)
-                    if len(parts) >= 2:
-                        # Check if last part is a number or could be roll number
-                        potential_roll = parts[1].strip()
-                        name = parts[0].strip()
-                        
-                        # Accept if it looks like a roll number
-                        if potential_roll.isdigit() or len(potential_roll) <= 3:
-                            self.database[name] = potential_roll
-                            count += 1
-                            print(f"  Line {line_num}: '{name}' → Roll {potential_roll}")
-                            continue
-                    
-                    # If we get here, format not recognized
-                    print(f"  Line {line_num}: Skipped (unrecognized format): {line}")
-                        
+            if self.roster_cache is None:
+                records, count = load_roster_file(filepath)
+                index, from_cache = RosterIndex(records), False
+            else:
+                index, count, from_cache = self.roster_cache.load_file(filepath, load_roster_file)
         except Exception as e:
             raise Exception(f"Error reading file: {e}")
         
-        print(f"\n✓ Loaded {count} records from {filepath}")
+        self.use_index(index)
+        print(f"\n✓ Loaded {count} records from {filepath}{' (cached)' if from_cache else ''}")
         return count
     
     def load_from_text(self, text):
@@ -91,7 +341,7 @@ class RollMatcher:
         Args:
             text: Multi-line string with name-roll pairs
         """
-        self.database = {}
+        records = {}
         count = 0
         
         for line in text.split('\n'):
@@ -103,11 +353,144 @@ class RollMatcher:
             if len(parts) >= 2:
                 name = parts[0].strip()
                 roll = parts[1].strip()
-                self.database[name] = roll
+                records[name] = roll
                 count += 1
         
+        self.database = records
         return count
     
+    def add_student(self, name, roll):
+        """Add a student (or change a student's roll number) without reloading the roster"""
+        return self.update_roster(added={name: roll})
+    
+    def remove_student(self, name):
+        """Remove a student without reloading the roster"""
+        return self.update_roster(removed=[name])
+    
+    def rename_student(self, old_name, new_name):
+        """Rename a student, keeping their roll number and place in the roster"""
+        return self.update_roster(renamed={old_name: new_name})
+    
+    def update_roster(self, added=None, removed=(), renamed=None):
+        """
+        Apply roster changes in place of a full reload
+        
+        The index is updated from the current one, and only the memoized
+        results the changes can affect are dropped: those with a removed,
+        renamed or re-numbered student among their candidates, and those
+        the new names could match. Unknown detections among them are
+        matched again at once.
+        
+        Args:
+            added: {name: roll} to add (an existing name gets the new roll)
+            removed: Names to remove
+            renamed: {old_name: new_name}
+        
+        Returns:
+            {detected_name: match_result} for detections matched again
+        
+        Raises:
+            KeyError: If a removed or renamed name is not on the roster
+        """
+        added = dict(added or {})
+        renamed = dict(renamed or {})
+        with self.roster_lock:
+            index = self.index
+            records = dict(index.database)
+            for name in list(removed) + list(renamed):
+                if name not in records:
+                    raise KeyError(f"'{name}' is not on the roster")
+            if renamed:
+                records = {renamed.get(name, name): roll for name, roll in records.items()}
+            for name in removed:
+                del records[name]
+            records.update(added)
+            
+            # Students whose results are no longer valid, and names that are new to matching
+            gone = set(removed) | set(renamed) | {name for name, roll in added.items()
+                                                  if index.database.get(name, roll) != roll}
+            new = {name: records[name] for name in list(added) + list(renamed.values())
+                   if name not in index.database}
+            
+            new_index = index.updated(records)
+            self.index = new_index
+            if self.store is not None:
+                self.store.save_roster(self.session_id, new_index.database, new_index.fingerprint)
+            
+            stale, unknown = self._stale_results(gone, RosterIndex(new))
+            print(f"Roster updated: {len(new)} new, {len(removed)} removed, {len(renamed)} renamed; "
+                  f"{len(stale)} memoized results dropped")
+            
+            rematched = {}
+            for name in unknown:
+                rematched[name], candidates = self._match(new_index, name)
+                self._cache_put(new_index, name, rematched[name], candidates)
+            self._update_state(lambda state: state.with_matches(rematched))
+        return rematched
+    
+    def _stale_results(self, gone, new_index):
+        """
+        Drop memoized results that a roster change can affect
+        
+        A result goes if any of its candidates is a student that is gone, or
+        if a new student could become one of them (scoring at least the
+        floor of its candidates), so kept candidates stay complete for
+        reclassify().
+        
+        Args:
+            gone: Students whose results are no longer valid
+            new_index: RosterIndex of only the students that are new to matching
+        
+        Returns:
+            (dropped detected names, dropped names that were unknown)
+        """
+        with self.cache_lock:
+            cached = list(self.cache.items())
+        stale = []
+        unknown = []
+        for name, entry in cached:
+            floor = entry.floor
+            if floor == -math.inf:
+                # Aliases and empty rosters: only a new student scoring above them matters
+                floor = min((option[3] for option in entry.options), default=0)
+            if (any(option[0] in gone for option in entry.options)
+                    or self._new_match(new_index, name, floor)):
+                stale.append(name)
+                if entry.status != 'matched':
+                    unknown.append(name)
+        with self.cache_lock:
+            for name in stale:
+                self.cache.pop(name, None)
+        return stale, unknown
+    
+    def _new_match(self, new_index, detected_name, bar):
+        """
+        Whether a new student could be detected_name's match
+        
+        Checks the detected name against the new students only, the way
+        _match would: roll numbers, exact names, sound-alikes and fuzzy
+        scores reaching bar. It errs towards True, which only costs a re-match.
+        """
+        if not new_index:
+            return False
+        stripped = detected_name.strip()
+        for pattern in (LIST_ROLL_PATTERN, END_ROLL_PATTERN):
+            match = pattern.match(stripped)
+            if match:
+                roll = match.group(1) if pattern is LIST_ROLL_PATTERN else match.group(2)
+                if new_index.find_roll(roll) is not None:
+                    return True
+        for text in {self.preprocess_name(detected_name), detected_name}:
+            if new_index.find_exact(text) is not None:
+                return True
+            phonetic = new_index.best_phonetic(text)
+            if phonetic and phonetic[1] >= PHONETIC_MIN_SCORE:
+                return True
+            if (new_index.best_match(text, score_cutoff=bar)
+                    or new_index.best_match(text.lower(), folded=True, score_cutoff=bar)):
+                return True
+        return False
+    
     def match_name(self, detected_name):
         """
         Match a detected name to database
@@ -115,230 +498,305 @@ class RollMatcher:
         Priority:
         1. Roll number found in text (e.g. "15 Fahad") -> 100% match
         2. Fuzzy name matching (e.g. "Fahad") -> Score based match
+        
+        The steps after the alias lookup run as the strategies pipeline
+        (see the strategies property and strategy_stats()).
+        
+        Results are memoized by the raw detected name until the roster or
+        corrections change; a threshold change re-classifies them.
+        """
+        result = self._cache_get(detected_name)
+        if result is not None:
+            return result
+        index = self.index
+        result, candidates = self._match(index, detected_name)
+        self._cache_put(index, detected_name, result, candidates)
+        return result
+    
+    def _match(self, index, detected_name, scores=None, deferred=None):
         """
-        if not self.database:
+        match_name against a given index
+        
+        Args:
+            index: RosterIndex to match against
+            detected_name: Name as detected
+            scores: Optional {(text, folded): (roster_name, score)} precomputed by match_batch
+            deferred: Optional dict collecting the persistent record to save
+                (see _save) instead of saving it
+        
+        Returns:
+            (result, candidates) where candidates is (options, floor, ceiling):
+            at any threshold t with floor <= t <= ceiling, the result is the
+            first option (matched_name, confidence, method, gate, strategy) with
+            gate >= t, or unknown if there is none
+        """
+        if not index:
             return {
                 'matched_name': None,
                 'roll': 'N/A',
                 'confidence': 0,
                 'status': 'unknown'
-            }
+            }, ((), -math.inf, math.inf)
+        
+        # STRATEGY 0: This exact string was matched before (this or an earlier session)
+        floor = min(self.threshold, RECLASSIFY_FLOOR)
+        started = time.perf_counter()
+        record = self._alias_record(index, detected_name)
+        self._count_strategy('alias', time.perf_counter() - started, int(record is not None))
+        if record is not None and record.get('confidence', 0) >= self.threshold:
+            self._count_hit('alias')
+            result = self._use_alias(detected_name, record, deferred)
+            return result, self._alias_candidates(result)
+        if record is not None:
+            # A lower threshold would accept the alias instead of what follows
+            floor = max(floor, math.nextafter(record.get('confidence', 0), math.inf))
         
         # Preprocess the detected name
         processed_name = self.preprocess_name(detected_name)
         print(f"Matching name: '{detected_name}' -> processed: '{processed_name}'")
         
-        # STRATEGY 1: Look for Roll Number in the Zoom Name
-        # Only do this if the detected name looks like it might contain a roll number
-        # (e.g., "3. Name" or "Name 3" but not "Participants (3)")
-        import re
+        options, ceiling = self._run_strategies(index, detected_name, processed_name, self.threshold, scores)
+        result = self._select(index, detected_name, options, self.threshold, deferred)
+        return result, (tuple(options), floor, ceiling)
+    
+    @property
+    def strategies(self):
+        """Names of the match strategies match_name runs, in order (see STRATEGY_STEPS)"""
+        return self._strategies
+    
+    @strategies.setter
+    def strategies(self, names):
+        names = tuple(names)
+        unknown = [name for name in names if name not in STRATEGY_STEPS]
+        if unknown:
+            raise ValueError(f"Unknown match strategies: {', '.join(unknown)}")
+        self._strategies = names
+        self.clear_cache()  # Memoized results came from the old pipeline
+    
+    def _run_strategies(self, index, detected_name, processed_name, threshold, scores=None):
+        """
+        Candidate options from the enabled strategies, in pipeline order
         
-        # Create a reverse lookup map (Roll -> Name)
-        roll_to_name = {v: k for k, v in self.database.items()}
+        The pipeline stops at the first option accepted at threshold, as soon
+        as no later strategy could put an option ahead of it (only a phonetic
+        step goes ahead of the fuzzy option found for the same form of the
+        name). Steps on the name as detected are skipped when preprocessing
+        did not change it.
         
-        # Look for roll numbers in common formats
-        # Format 1: "3. Name" or "3 Name"
-        # Format 2: "Name 3"
+        Returns:
+            (options, ceiling): list of (matched_name, confidence, method,
+            gate, strategy), most preferred first, and the highest threshold
+            they decide - the accepted option's gate if the pipeline stopped
+            early, else inf. reclassify() matches again above the ceiling.
+        """
+        steps = [strategy for strategy in self._strategies
+                 if not (strategy.endswith('_raw') and processed_name == detected_name)]
+        options = []
+        for position, strategy in enumerate(steps):
+            method, as_detected = STRATEGY_STEPS[strategy]
+            text = detected_name if as_detected else processed_name
+            started = time.perf_counter()
+            found = getattr(self, method)(index, text, strategy, options, scores)
+            self._count_strategy(strategy, time.perf_counter() - started, len(found) - len(options))
+            options = found
+            accepted = next((option for option in options if option[3] >= threshold), None)
+            if accepted is not None and accepted[4].replace('fuzzy', 'phonetic') not in steps[position + 1:]:
+                return options, accepted[3]
+        return options, math.inf
+    
+    def _count_strategy(self, strategy, seconds, found):
+        """Add one run of a strategy, which found this many options, to the statistics"""
+        with self.strategy_lock:
+            counts = self.strategy_counts.setdefault(
+                strategy, {'runs': 0, 'found': 0, 'hits': 0, 'seconds': 0.0})
+            counts['runs'] += 1
+            counts['found'] += found
+            counts['seconds'] += seconds
+    
+    def _count_hit(self, strategy):
+        """Count a match result decided by a strategy's option"""
+        with self.strategy_lock:
+            self.strategy_counts[strategy]['hits'] += 1
+    
+    def strategy_stats(self):
+        """
+        Get per-strategy match statistics
         
+        Returns:
+            {strategy: {'runs', 'found', 'hits', 'hit_rate', 'total_ms', 'mean_ms'}}
+            in pipeline order ('alias' first), where found counts candidate
+            options and hits counts the results a strategy decided
+        """
+        with self.strategy_lock:
+            counts = {name: dict(values) for name, values in self.strategy_counts.items()}
+        order = ('alias',) + self._strategies
+        stats = {}
+        for name in sorted(counts, key=lambda name: order.index(name) if name in order else len(order)):
+            values = counts[name]
+            stats[name] = {
+                'runs': values['runs'],
+                'found': values['found'],
+                'hits': values['hits'],
+                'hit_rate': values['hits'] / values['runs'] * 100 if values['runs'] else 0,
+                'total_ms': values['seconds'] * 1000,
+                'mean_ms': values['seconds'] * 1000 / values['runs'] if values['runs'] else 0,
+            }
+        return stats
+    
+    def reset_strategy_stats(self):
+        """Forget the per-strategy statistics"""
+        with self.strategy_lock:
+            self.strategy_counts.clear()
+    
+    def _roll_prefix_options(self, index, detected_name, strategy, options, scores=None):
+        """
+        Roll number at the start of the detected name ("3. Name"), accepted at any threshold
+        
+        Returns:
+            options plus (matched_name, 100, 'roll', ACCEPT_ALWAYS, strategy) if there is one
+        """
         # Check if this looks like a numbered list item (e.g., "3. Name")
-        list_pattern = r'^(\d+)\.?\s+(.+)$'
-        list_match = re.match(list_pattern, detected_name.strip())
+        list_match = LIST_ROLL_PATTERN.match(detected_name.strip())
         
         if list_match:
             roll_num = list_match.group(1)
-            name_part = list_match.group(2)
+            matched_db_name = index.find_roll(roll_num)
             # Check if this roll number exists in our database
-            if roll_num in roll_to_name:
-                matched_db_name = roll_to_name[roll_num]
+            if matched_db_name is not None:
                 print(f"  ✓ FOUND ROLL NUMBER MATCH (list format): {roll_num} -> {matched_db_name}")
-                result = {
-                    'matched_name': matched_db_name,
-                    'roll': self.database[matched_db_name],
-                    'confidence': 100,  # Perfect match by ID
-                    'status': 'matched'
-                }
-                # Add to persistent records
-                self.add_to_persistent_records(detected_name, result)
-                return result
+                return options + [(matched_db_name, 100, 'roll', ACCEPT_ALWAYS, strategy)]  # Perfect match by ID
+        return options
+    
+    def _roll_suffix_options(self, index, detected_name, strategy, options, scores=None):
+        """
+        Roll number at the end of the detected name ("Name 3"), accepted at any threshold
+        
+        Names ending in a UI counter ("Participants 3", "Room 3") are skipped.
         
+        Returns:
+            options plus (matched_name, 100, 'roll', ACCEPT_ALWAYS, strategy) if there is one
+        """
         # Check if this ends with a roll number (e.g., "Name 3")
         # But avoid matching things like "Participants (3)" or "Room 3"
-        end_pattern = r'^(.+)\s+(\d+)$'
-        end_match = re.match(end_pattern, detected_name.strip())
+        end_match = END_ROLL_PATTERN.match(detected_name.strip())
         
         if end_match:
             name_part = end_match.group(1)
             roll_num = end_match.group(2)
             # Only accept if the roll number is in our database AND the name part looks reasonable
             # (avoid matching generic terms like "Participants", "Room", "Meeting", etc.)
-            forbidden_words = ['participant', 'meeting', 'room', 'group', 'section', 'level', 'session']
             name_lower = name_part.lower()
-            is_forbidden = any(word in name_lower for word in forbidden_words)
+            is_forbidden = any(word in name_lower for word in FORBIDDEN_ROLL_WORDS)
+            matched_db_name = index.find_roll(roll_num)
             
-            if roll_num in roll_to_name and len(name_part) > 3 and not is_forbidden:
-                matched_db_name = roll_to_name[roll_num]
+            if matched_db_name is not None and len(name_part) > 3 and not is_forbidden:
                 print(f"  ✓ FOUND ROLL NUMBER MATCH (end format): {roll_num} -> {matched_db_name}")
-                result = {
-                    'matched_name': matched_db_name,
-                    'roll': self.database[matched_db_name],
-                    'confidence': 100,  # Perfect match by ID
-                    'status': 'matched'
-                }
-                # Add to persistent records
-                self.add_to_persistent_records(detected_name, result)
-                return result
-
-        # STRATEGY 2: Case-insensitive Fuzzy Name Matching
-        # First, try case-insensitive matching for exact matches
-        detected_lower = processed_name.lower()
-        for db_name in self.database.keys():
-            if db_name.lower() == detected_lower:
-                print(f"  ✓ FOUND EXACT CASE-INSENSITIVE MATCH: '{processed_name}' -> '{db_name}'")
-                result = {
-                    'matched_name': db_name,
-                    'roll': self.database[db_name],
-                    'confidence': 95,  # High confidence for exact match with case difference
-                    'status': 'matched'
-                }
-                # Add to persistent records
-                self.add_to_persistent_records(detected_name, result)
-                return result
-        
-        # Then use fuzzy matching with case normalization
-        result = process.extractOne(
-            processed_name,
-            self.database.keys(),
-            scorer=fuzz.token_sort_ratio
-        )
-        
-        # Also try case-folded version for better matching
-        result_folded = process.extractOne(
-            processed_name.lower(),
-            [name.lower() for name in self.database.keys()],
-            scorer=fuzz.token_sort_ratio
-        )
+                return options + [(matched_db_name, 100, 'roll', ACCEPT_ALWAYS, strategy)]  # Perfect match by ID
+        return options
+    
+    def _exact_options(self, index, text, strategy, options, scores=None):
+        """
+        Exact case-insensitive match of one form of the name, accepted at any threshold
+        
+        Returns:
+            options plus (matched_name, 95, 'exact', ACCEPT_ALWAYS, strategy) if there is one
+        """
+        label = " (fallback)" if strategy.endswith('_raw') else ""
+        db_name = index.find_exact(text)
+        if db_name is not None:
+            print(f"  ✓ FOUND EXACT CASE-INSENSITIVE MATCH{label}: '{text}' -> '{db_name}'")
+            return options + [(db_name, 95, 'exact', ACCEPT_ALWAYS, strategy)]  # High confidence for exact match with case difference
+        return options
+    
+    def _fuzzy_options(self, index, text, strategy, options, scores=None):
+        """
+        Closest spelling of one form of the name, accepted at thresholds up to its score
+        
+        The name is scored with and without case normalization and the
+        better score is kept. Scores below RECLASSIFY_FLOOR (or the
+        threshold, if lower) are not kept.
+        
+        Args:
+            index: RosterIndex to match against
+            text: Form of the name being matched (preprocessed or as detected)
+            strategy: Name of this step, recorded with its option
+            options: Options found by earlier steps
+            scores: Optional precomputed best matches (see _match)
+        
+        Returns:
+            options plus (matched_name, score, 'fuzzy', score, strategy) if there is one
+        """
+        label = " (fallback)" if strategy.endswith('_raw') else ""
+        
+        # Only matches reaching the cutoff are returned, which lets large rosters prune
+        if scores is not None:
+            result = scores[(text, False)]
+            result_folded = scores[(text.lower(), True)]
+        else:
+            cutoff = min(self.threshold, RECLASSIFY_FLOOR)
+            result = index.best_match(text, score_cutoff=cutoff)
+            result_folded = index.best_match(text.lower(), folded=True, score_cutoff=cutoff)
         
         # Choose the better match
-        use_folded = False
-        if result_folded and (not result or result_folded[1] > result[1]):
-            use_folded = True
-            # Find the original case version of the matched name
-            matched_name_folded = result_folded[0]
-            matched_name_original = None
-            for name in self.database.keys():
-                if name.lower() == matched_name_folded:
-                    matched_name_original = name
-                    break
-            
-            if matched_name_original and result_folded[1] >= self.threshold:
-                print(f"  Found case-insensitive fuzzy match: '{matched_name_original}' with score {result_folded[1]}")
-                print(f"  Match accepted (threshold: {self.threshold})")
-                result_obj = {
-                    'matched_name': matched_name_original,
-                    'roll': self.database[matched_name_original],
-                    'confidence': result_folded[1],
-                    'status': 'matched'
-                }
-                # Add to persistent records
-                self.add_to_persistent_records(detected_name, result_obj)
-                return result_obj
+        use_folded = bool(result_folded) and (not result or result_folded[1] > result[1])
+        if use_folded:
+            result = result_folded
+        if not result:
+            return options
+        matched_name, score = result
+        print(f"  Found {'case-insensitive ' if use_folded else ''}fuzzy match{label}: "
+              f"'{matched_name}' with score {score}")
+        return options + [(matched_name, score, 'fuzzy', score, strategy)]
+    
+    def _phonetic_options(self, index, text, strategy, options, scores=None):
+        """
+        Best roster name that sounds like one form of the name ("Shail"/"Sahil")
         
-        if result and not use_folded:
-            matched_name, score, _ = result
-            print(f"  Found fuzzy match: '{matched_name}' with score {score}")
-            
-            if score >= self.threshold:
-                print(f"  Match accepted (threshold: {self.threshold})")
-                result_obj = {
-                    'matched_name': matched_name,
-                    'roll': self.database[matched_name],
-                    'confidence': score,
-                    'status': 'matched'
-                }
-                # Add to persistent records
-                self.add_to_persistent_records(detected_name, result_obj)
-                return result_obj
-            else:
-                print(f"  Match rejected (below threshold: {self.threshold})")
+        Accepted at thresholds up to its confidence. It goes ahead of the
+        fuzzy option found for the same form unless that name is spelled
+        closer.
         
-        # If no match found, try with original name as fallback
-        if processed_name != detected_name:
-            print(f"  Trying fallback with original name: '{detected_name}'")
-            
-            # Try case-insensitive matching first
-            detected_lower = detected_name.lower()
-            for db_name in self.database.keys():
-                if db_name.lower() == detected_lower:
-                    print(f"  ✓ FOUND EXACT CASE-INSENSITIVE MATCH (fallback): '{detected_name}' -> '{db_name}'")
-                    result_obj = {
-                        'matched_name': db_name,
-                        'roll': self.database[db_name],
-                        'confidence': 95,  # High confidence for exact match with case difference
-                        'status': 'matched'
-                    }
-                    # Add to persistent records
-                    self.add_to_persistent_records(detected_name, result_obj)
-                    return result_obj
-            
-            result = process.extractOne(
-                detected_name,
-                self.database.keys(),
-                scorer=fuzz.token_sort_ratio
-            )
-            
-            # Also try case-folded version for better matching
-            result_folded = process.extractOne(
-                detected_name.lower(),
-                [name.lower() for name in self.database.keys()],
-                scorer=fuzz.token_sort_ratio
-            )
-            
-            # Choose the better match
-            use_folded = False
-            if result_folded and (not result or result_folded[1] > result[1]):
-                use_folded = True
-                # Find the original case version of the matched name
-                matched_name_folded = result_folded[0]
-                matched_name_original = None
-                for name in self.database.keys():
-                    if name.lower() == matched_name_folded:
-                        matched_name_original = name
-                        break
-                
-                if matched_name_original and result_folded[1] >= self.threshold:
-                    print(f"  Found case-insensitive fuzzy match (fallback): '{matched_name_original}' with score {result_folded[1]}")
-                    print(f"  Match accepted (threshold: {self.threshold})")
-                    result_obj = {
-                        'matched_name': matched_name_original,
-                        'roll': self.database[matched_name_original],
-                        'confidence': result_folded[1],
-                        'status': 'matched'
-                    }
-                    # Add to persistent records
-                    self.add_to_persistent_records(detected_name, result_obj)
-                    return result_obj
-            
-            if result and not use_folded:
-                matched_name, score, _ = result
-                print(f"  Fallback found match: '{matched_name}' with score {score}")
-                
-                if score >= self.threshold:
-                    print(f"  Fallback match accepted (threshold: {self.threshold})")
-                    result_obj = {
-                        'matched_name': matched_name,
-                        'roll': self.database[matched_name],
-                        'confidence': score,
-                        'status': 'matched'
-                    }
-                    # Add to persistent records
-                    self.add_to_persistent_records(detected_name, result_obj)
-                    return result_obj
-                else:
-                    print(f"  Fallback match rejected (below threshold: {self.threshold})")
-            else:
-                print("  No match found with original name")
+        Returns:
+            options with (matched_name, confidence, 'phonetic', confidence, strategy) if there is one
+        """
+        label = " (fallback)" if strategy.endswith('_raw') else ""
+        phonetic = index.best_phonetic(text)
+        if not phonetic or phonetic[1] < PHONETIC_MIN_SCORE:
+            return options
+        spelling = phonetic[1]
+        confidence = max(spelling, (spelling + PHONETIC_AGREEMENT_SCORE) / 2)
+        print(f"  Found phonetic match{label}: '{phonetic[0]}' "
+              f"(spelling {spelling:.1f}, confidence {confidence:.1f})")
+        option = (phonetic[0], confidence, 'phonetic', confidence, strategy)
+        
+        # Only a name spelled even closer can still beat it
+        fuzzy_step = strategy.replace('phonetic', 'fuzzy')
+        for position, other in enumerate(options):
+            if other[4] == fuzzy_step:
+                if other[1] > spelling:
+                    break
+                return options[:position] + [option] + options[position:]
+        return options + [option]
+    
+    def _select(self, index, detected_name, options, threshold, deferred=None):
+        """
+        Result for the first option accepted at threshold (added to persistent records)
         
-        print(f"  No match found, returning as unknown")
+        Args:
+            index: RosterIndex the options came from
+            detected_name: Name as detected
+            options: (matched_name, confidence, method, gate, strategy) in order of preference
+            threshold: Minimum gate accepted
+            deferred: Optional dict collecting the record to save (see _save)
+        """
+        for matched_name, confidence, method, gate, strategy in options:
+            if gate >= threshold:
+                self._count_hit(strategy)
+                print(f"  Match accepted: '{matched_name}' ({method}, confidence {confidence:.1f}, "
+                      f"threshold: {threshold})")
+                return self._accept(index, detected_name, matched_name, confidence, method, deferred)
+        
+        print(f"  No match at or above threshold ({threshold}), returning as unknown")
         result_obj = {
             'matched_name': detected_name,
             'roll': 'N/A',
@@ -347,71 +805,305 @@ class RollMatcher:
         }
         return result_obj
     
-    def preprocess_name(self, name):
-        """Preprocess name to handle common OCR issues"""
-        if not name:
-            return ""
-            
-        # 1. Remove leading/trailing noise characters
-        name = name.strip('| [](){}<>.,:;-_')
-        
-        # 2. Remove specific noise patterns using regex
-        # Remove vertical bars inside text
-        name = name.replace('|', '')
-        
-        # Remove (Host, me) and variations - handles missing opening parenthesis too
-        name = re.sub(r'\(?.*?(?:Host|Me|me).*?\)?', '', name, flags=re.IGNORECASE)
-        
-        # Remove "GBR", "ED" and other common short noise words
-        name = re.sub(r'\b(?:GBR|ED|ER|ft)\b', '', name, flags=re.IGNORECASE)
-        
-        # Clean up multiple spaces
-        name = ' '.join(name.split())
-        
-        # 3. Apply specific name corrections
-        corrections = {
-            'Farhad': 'Fahad',
-            'Farad': 'Fahad',
-            'atash': 'Akash',
-            'Akas': 'Akash',
-            'Akashhh': 'Akash',
-            'Akashh': 'Akash',
-            'Fahad Akas': 'Fahad Akash',
+    def _accept(self, index, detected_name, matched_name, confidence, method, deferred=None):
+        """Build a matched result and add it to persistent records"""
+        result_obj = {
+            'matched_name': matched_name,
+            'roll': index.database[matched_name],
+            'confidence': confidence,
+            'status': 'matched'
+        }
+        # Add to persistent records
+        self._save(detected_name, result_obj, method, index.fingerprint, deferred)
+        return result_obj
+    
+    def _save(self, detected_name, result, method, roster, deferred=None):
+        """Add a result to persistent records, or to deferred {detected_name: (result, method, roster)}"""
+        if deferred is None:
+            self.add_to_persistent_records(detected_name, result, method=method, roster=roster)
+        else:
+            deferred[detected_name] = (result, method, roster)
+    
+    def _alias_record(self, index, detected_name):
+        """
+        Persisted match for this exact detected string that still fits the roster
+        
+        The alias is only trusted while its student is still on the roster
+        with the same roll number. Fuzzy aliases also need the roster they
+        were scored against, since a student added later might score higher.
+        Assigned records (see match_batch) depended on the rest of their
+        snapshot and are never reused. Whether its confidence meets the
+        threshold is left to the caller.
+        
+        Returns:
+            Record dict, or None if there is no usable alias
+        """
+        record = self._find_record(detected_name)
+        if not record or record.get('status') != 'matched' or record.get('method') == 'assigned':
+            return None
+        matched_name = record.get('matched_name')
+        if matched_name not in index.database or index.database[matched_name] != record.get('roll'):
+            return None
+        if record.get('method') in ('fuzzy', 'phonetic') and record.get('roster') != index.fingerprint:
+            return None
+        return record
+    
+    def _match_alias(self, index, detected_name, deferred=None):
+        """
+        Reuse a persisted match for this exact detected string
+        
+        Returns:
+            Match result dict, or None if there is no usable alias or its
+            confidence is below the threshold
+        """
+        started = time.perf_counter()
+        record = self._alias_record(index, detected_name)
+        if record is None or record.get('confidence', 0) < self.threshold:
+            return None  # Counted by the _match that follows
+        self._count_strategy('alias', time.perf_counter() - started, 1)
+        self._count_hit('alias')
+        return self._use_alias(detected_name, record, deferred)
+    
+    def _use_alias(self, detected_name, record, deferred=None):
+        """Result for an accepted alias record"""
+        print(f"  ✓ FOUND ALIAS: '{detected_name}' -> '{record['matched_name']}' "
+              f"({record.get('method', 'unknown')} match, session {record.get('session_id', 'unknown')})")
+        result_obj = {
+            'matched_name': record['matched_name'],
+            'roll': record['roll'],
+            'confidence': record['confidence'],
+            'status': 'matched'
         }
+        if detected_name not in self.persistent_records:
+            # Alias from the store's history: record the match for this session too
+            self._save(detected_name, result_obj, record.get('method'), record.get('roster'), deferred)
+        return result_obj
+    
+    def _alias_candidates(self, result):
+        """Candidates of an alias match: only thresholds up to its confidence are covered"""
+        option = (result['matched_name'], result['confidence'], 'alias', result['confidence'], 'alias')
+        return (option,), -math.inf, result['confidence']
+    
+    def warmup(self):
+        """
+        Run every matching code path once so the first real match is fast
         
-        # Apply corrections
-        for wrong, correct in corrections.items():
-            if wrong in name:
-                name = name.replace(wrong, correct)
+        Compiles the preprocessing regexes and runs the fuzzy scorer against
+        the loaded roster's index. Does not touch any records.
         
-        return name.strip()
+        Returns:
+            Elapsed seconds
+        """
+        start = time.perf_counter()
+        probe = self.preprocess_name("| Warmup Probe (Host, me) ED")
+        fuzz.token_sort_ratio(probe, probe)
+        index = self.index
+        if index:
+            index.find_exact(probe)
+            index.best_match(probe)
+            index.best_match(probe.lower(), folded=True)
+        self.warmup_time = time.perf_counter() - start
+        return self.warmup_time
+    
+    def preprocess_name(self, name):
+        """Preprocess name to handle common OCR issues (rules from the normalizer)"""
+        return self.normalizer.preprocess(name)
     
-    def match_batch(self, detected_names):
+    def match_batch(self, detected_names, assign=False, max_aliases=1, scorer=None):
         """
         Match multiple names at once
         
         Args:
             detected_names: List of names
+            assign: Treat the names as one snapshot and assign them jointly,
+                so at most max_aliases of them claim the same student; new
+                persistent records are only saved once the snapshot is assigned
+            max_aliases: Detections one student may take when assign=True
+            scorer: Optional replacement for index.best_matches in score_batch
             
         Returns:
             dict: {detected_name: match_result}
         """
+        index = self.index
+        deferred = {} if assign and index else None
         results = {}
-        for name in detected_names:
-            results[name] = self.match_name(name)
-            self.matched_records[name] = results[name]
+        misses = []
+        for name in dict.fromkeys(detected_names):
+            results[name] = self._cache_get(name)
+            if results[name] is None and index:
+                results[name] = self._match_alias(index, name, deferred)
+                if results[name] is not None:
+                    self._cache_put(index, name, results[name], self._alias_candidates(results[name]))
+            if results[name] is None:
+                misses.append(name)
+        
+        # Only names with no cached result or alias are scored, and only if a fuzzy step runs
+        if misses:
+            scores = None
+            if 'fuzzy' in self.strategies or 'fuzzy_raw' in self.strategies:
+                scores = self.score_batch(index, misses, scorer)
+            for name in misses:
+                results[name], candidates = self._match(index, name, scores, deferred)
+                self._cache_put(index, name, results[name], candidates)
+        
+        if assign and index:
+            assigned = self.assign_snapshot(index, results, max_aliases)
+            self._save_assigned(index, results, assigned, deferred)
+            results = assigned
+        
+        self._update_state(lambda state: state.with_matches(results))
+        if self.store is not None:
+            self.store.record_detections(self.session_id, results)
         
         return results
     
+    def assign_snapshot(self, index, results, max_aliases=1):
+        """
+        Resolve detections in one snapshot that claim the same student
+        
+        Every name is first matched on its own. If more than max_aliases of
+        them land on one student, the snapshot is solved as a maximum-weight
+        assignment over the detection x roster score matrix (scores below the
+        threshold count as 0): the closest detections keep the student and
+        the others move to their next best student or become unknown.
+        Nothing is saved here (see _save_assigned).
+        
+        Args:
+            index: RosterIndex the results were matched against
+            results: {detected_name: match_result} matched independently
+            max_aliases: Detections one student may take
+        
+        Returns:
+            {detected_name: match_result}
+        """
+        matched = [name for name, result in results.items() if result.get('status') == 'matched']
+        claims = Counter(results[name]['matched_name'] for name in matched)
+        if not claims or max(claims.values()) <= max_aliases:
+            # Every name already has its own best student, which is optimal
+            return results
+        
+        # Best score of any form of each name against every roster name
+        rows_by_text = {}
+        for row, name in enumerate(matched):
+            for text in {name, self.preprocess_name(name)}:
+                rows_by_text.setdefault((text, False), []).append(row)
+                rows_by_text.setdefault((text.lower(), True), []).append(row)
+        weights = np.zeros((len(matched), len(index)))
+        for folded in (False, True):
+            keys = [key for key in rows_by_text if key[1] == folded]
+            scores = index.score_matrix([text for text, _ in keys], folded=folded, score_cutoff=self.threshold)
+            for key, text_scores in zip(keys, scores):
+                for row in rows_by_text[key]:
+                    np.maximum(weights[row], text_scores, out=weights[row])
+        
+        # Exact, roll number, phonetic and alias matches count with their own confidence
+        for row, name in enumerate(matched):
+            col = index.positions[results[name]['matched_name']]
+            weights[row, col] = max(weights[row, col], results[name]['confidence'])
+        
+        assigned = max_weight_assignment(weights, capacity=max_aliases)
+        results = dict(results)
+        for row, name in enumerate(matched):
+            col = assigned.get(row)
+            if col is None:
+                print(f"  '{name}' lost '{results[name]['matched_name']}' to a closer detection, returning as unknown")
+                results[name] = {
+                    'matched_name': name,
+                    'roll': 'N/A',
+                    'confidence': 0,
+                    'status': 'unknown'
+                }
+            elif index.names[col] != results[name]['matched_name']:
+                print(f"  '{name}' lost '{results[name]['matched_name']}' to a closer detection, "
+                      f"reassigned to '{index.names[col]}'")
+                results[name] = {
+                    'matched_name': index.names[col],
+                    'roll': index.rolls[col],
+                    'confidence': float(weights[row, col]),
+                    'status': 'matched'
+                }
+        return results
+    
+    def _save_assigned(self, index, results, assigned, deferred):
+        """
+        Save a snapshot's persistent records once assign_snapshot has settled it
+        
+        Unchanged results are saved as they were matched. A reassigned
+        detection's record becomes its assigned result (method 'assigned',
+        which depends on who else was in the snapshot and so is never reused
+        as an alias), and a detection that lost its student has its record
+        removed, so exports and statistics do not keep the claim. Changed
+        detections are dropped from the cache, so the next snapshot matches
+        them on their own again.
+        
+        Args:
+            index: RosterIndex the results were matched against
+            results: {detected_name: match_result} matched independently
+            assigned: assign_snapshot's {detected_name: match_result}
+            deferred: {detected_name: (result, method, roster)} collected while matching
+        """
+        for name, result in assigned.items():
+            if result == results[name]:
+                if name in deferred:
+                    self.add_to_persistent_records(name, *deferred[name])
+                continue
+            with self.cache_lock:
+                self.cache.pop(name, None)
+            if result['status'] == 'matched':
+                self.add_to_persistent_records(name, result, method='assigned', roster=index.fingerprint)
+            else:
+                self._forget_record(name)
+    
+    def score_batch(self, index, names, scorer=None):
+        """
+        Best fuzzy match for every form of every name, in two scoring calls
+        
+        Covers the preprocessed and original forms, each scored against the
+        original and lowercased roster choices, so _match never has to call
+        the scorer itself. Gives the same (name, score) as index.best_match
+        with the cutoff _fuzzy_options uses (None where nothing reaches it).
+        
+        Args:
+            index: RosterIndex to score against
+            names: Detected names
+            scorer: Optional scorer(index, texts, folded, score_cutoff) giving
+                what index.best_matches would (e.g. from another process)
+        
+        Returns:
+            {(text, folded): (roster_name, score)}
+        """
+        if scorer is None:
+            def scorer(index, texts, folded, score_cutoff):
+                return index.best_matches(texts, folded=folded, score_cutoff=score_cutoff)
+        
+        texts = set()
+        for name in names:
+            texts.add(name)
+            texts.add(self.preprocess_name(name))
+        texts = list(texts)
+        folded_texts = list({text.lower() for text in texts})
+        
+        cutoff = min(self.threshold, RECLASSIFY_FLOOR)
+        scores = dict(zip([(text, False) for text in texts], scorer(index, texts, False, cutoff)))
+        scores.update(zip([(text, True) for text in folded_texts], scorer(index, folded_texts, True, cutoff)))
+        return scores
+    
     def get_all_matches(self):
         """Get all matched records"""
         return dict(self.matched_records)
     
-    def get_statistics(self):
-        """Get matching statistics"""
+    def get_statistics(self, state=None):
+        """
+        Get matching statistics
+        
+        Args:
+            state: MatcherState to count (defaults to a fresh snapshot)
+        """
+        if self.store is not None:
+            return self.store.session_stats(self.session_id)
+        
         # Combine current session records with persistent records for statistics
-        all_records = dict(self.matched_records)
-        all_records.update(self.persistent_records)
+        all_records = (state or self.snapshot()).all_records()
         
         total = len(all_records)
         matched = sum(1 for r in all_records.values() if r['status'] == 'matched')
@@ -424,17 +1116,22 @@ class RollMatcher:
             'match_rate': (matched / total * 100) if total > 0 else 0
         }
     
-    def export_attendance(self):
+    def export_attendance(self, state=None):
         """
         Export attendance data
         
+        Args:
+            state: MatcherState to export (defaults to a fresh snapshot)
+        
         Returns:
             List of dicts for DataFrame conversion
         """
         data = []
-        # Combine current session records with persistent records
-        all_records = dict(self.matched_records)
-        all_records.update(self.persistent_records)
+        if self.store is not None:
+            all_records = self.store.session_records(self.session_id)
+        else:
+            # Combine current session records with persistent records
+            all_records = (state or self.snapshot()).all_records()
         
         for detected_name, match in all_records.items():
             data.append({
@@ -447,12 +1144,18 @@ class RollMatcher:
         
         return data
     
-    def load_from_google_sheet(self, sheet_url):
+    def load_from_google_sheet(self, sheet_url, on_update=None):
         """
         Load names and roll numbers from Google Sheet
         
+        With a roster cache, a previously loaded copy of the sheet is used at
+        once and the sheet is downloaded again in the background; if it
+        changed, the new roster replaces the cached one.
+        
         Args:
             sheet_url: Google Sheets URL
+            on_update: Called with the new record count when a background
+                download replaced the cached roster
         
         Returns:
             Number of records loaded
@@ -469,89 +1172,41 @@ class RollMatcher:
             else:
                 raise ValueError("Invalid Google Sheets URL format")
             
-            # Load CSV data using pandas
-            df = pd.read_csv(csv_url)
+            def download():
+                data, status = self.sheet_fetcher.fetch(csv_url)
+                if status == 'not_modified':
+                    print("Google Sheet unchanged since the last download")
+                elif status == 'offline':
+                    print("Google Sheet unreachable; using the last downloaded copy")
+                return data
             
-            # Clear existing database
-            self.database = {}
-            count = 0
+            def parse(data):
+                # Every cell as text; the header row is found among the data
+                return roster_from_frame(pd.read_csv(io.BytesIO(data), header=None, dtype=str))
             
-            # Remove completely empty rows and columns
-            df = df.dropna(how='all').dropna(axis=1, how='all')
-            
-            # If dataframe is empty, raise an error
-            if df.empty:
-                raise ValueError("No data found in Google Sheet")
-            
-            # Reset index after dropping rows
-            df = df.reset_index(drop=True)
-            
-            # Find the header row (first row with 'name' and 'roll' or similar)
-            header_row_idx = 0
-            name_col_idx = -1
-            roll_col_idx = -1
-            
-            # Look for header row in first 5 rows
-            for idx in range(min(5, len(df))):
-                row_values = [str(val).strip().lower() for val in df.iloc[idx] if pd.notna(val)]
-                row_str = ' '.join(row_values)
-                
-                # Check if this row contains header-like values
-                if 'name' in row_str or 'roll' in row_str or 'id' in row_str:
-                    # Find name and roll columns in this row
-                    for col_idx, val in enumerate(df.iloc[idx]):
-                        if pd.isna(val):
-                            continue
-                        val_str = str(val).strip().lower()
-                        if 'name' in val_str:
-                            name_col_idx = col_idx
-                        elif 'roll' in val_str or 'id' in val_str:
-                            roll_col_idx = col_idx
-                    
-                    if name_col_idx != -1 and roll_col_idx != -1:
-                        header_row_idx = idx
-                        break
-            
-            # If we couldn't find proper headers, use the first row as data and assume first two columns
-            if name_col_idx == -1 or roll_col_idx == -1:
-                name_col_idx = 0
-                roll_col_idx = min(1, len(df.columns) - 1)
-                header_row_idx = -1  # No header row
-            
-            # Slice dataframe to start from after header row
-            data_start_idx = header_row_idx + 1 if header_row_idx >= 0 else 0
-            df_data = df.iloc[data_start_idx:].reset_index(drop=True)
-            
-            # Get column names
-            if header_row_idx >= 0 and name_col_idx < len(df.columns) and roll_col_idx < len(df.columns):
-                actual_name_col = df.columns[name_col_idx]
-                actual_roll_col = df.columns[roll_col_idx]
+            if self.roster_cache is None:
+                records, count = parse(download())
+                self.database = records
+                source = "Google Sheet"
             else:
-                # Use positional indexing
-                actual_name_col = df_data.columns[name_col_idx]
-                actual_roll_col = df_data.columns[roll_col_idx]
-            
-            # Process each row
-            for _, row in df_data.iterrows():
-                # Skip if either column is missing
-                if name_col_idx >= len(row) or roll_col_idx >= len(row):
-                    continue
-                    
-                name_val = row.iloc[name_col_idx] if name_col_idx < len(row) else None
-                roll_val = row.iloc[roll_col_idx] if roll_col_idx < len(row) else None
+                # A background refresh may finish before the cached roster is swapped in
+                swap_lock = threading.Lock()
                 
-                # Convert to string and strip
-                name = str(name_val).strip() if pd.notna(name_val) else ''
-                roll = str(roll_val).strip() if pd.notna(roll_val) else ''
+                def replace(index, count):
+                    with swap_lock:
+                        # Unless another roster was loaded in the meantime
+                        if self.index is not cached_index:
+                            return
+                        self.use_index(index)
+                    if on_update is not None:
+                        on_update(count)
                 
-                # Skip empty rows
-                if name and roll and name.lower() != 'nan' and roll.lower() != 'nan' and name != 'None' and roll != 'None':
-                    # Additional check to ensure we have meaningful data
-                    if len(name) > 1 and len(roll) >= 1:
-                        self.database[name] = roll
-                        count += 1
-            
-            print(f"\n✓ Loaded {count} records from Google Sheet")
+                with swap_lock:
+                    cached_index, count, from_cache = self.roster_cache.load_download(
+                        csv_url, download, parse, replace)
+                    self.use_index(cached_index)
+                source = "cached Google Sheet" if from_cache else "Google Sheet"
+            print(f"\n✓ Loaded {count} records from {source}")
             print("Loaded records:")
             for name, roll in list(self.database.items())[:10]:  # Show first 10 records
                 print(f"  {name} -> {roll}")
@@ -563,46 +1218,151 @@ class RollMatcher:
             raise Exception(f"Error loading Google Sheet: {e}")
     
     # Persistence methods
-    def add_to_persistent_records(self, detected_name, match_result):
-        """Add a matched record to persistent storage"""
+    def add_to_persistent_records(self, detected_name, match_result, method=None, roster=None):
+        """
+        Add a matched record to persistent storage
+        
+        Records double as the alias index checked first by match_name, so each
+        one keeps its provenance: how it was matched ('roll', 'exact', 'fuzzy'),
+        the session that first matched it and when, and the roster fingerprint
+        it was last matched against.
+        """
         # Only store matched records, not unknown ones
         if match_result.get('status') == 'matched':
-            self.persistent_records[detected_name] = match_result
-            self.save_persistent_records()
+            record = dict(match_result)
+            existing = self._find_record(detected_name)
+            if (existing and existing.get('matched_name') == record['matched_name']
+                    and existing.get('roll') == record['roll'] and 'session_id' in existing):
+                # Same student as before: keep where the alias was first learned
+                record['session_id'] = existing['session_id']
+                record['learned'] = existing.get('learned')
+            else:
+                record['session_id'] = self.session_id
+                record['learned'] = datetime.now().isoformat()
+            record['method'] = method or 'unknown'
+            if roster is not None:
+                record['roster'] = roster
+            self._update_state(lambda state: state.with_records({detected_name: record}))
+            if self.store is not None:
+                self.store.record_match(self.session_id, detected_name, record)
+                return
+            try:
+                journal = self._get_journal()
+                journal.append(detected_name, record)
+                if journal.needs_compaction():
+                    self.save_persistent_records()
+            except Exception as e:
+                print(f"Warning: Could not save persistent record: {e}")
+    
+    def new_session(self):
+        """
+        Start a new attendance session
+        
+        Clears this session's results. With a store, earlier sessions stay in
+        it (and keep serving aliases); without one, persistent records are kept.
+        """
+        session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if session_id == self.session_id.split('-')[0]:
+            # Started within the same second as the current session
+            count = int(self.session_id.split('-')[1]) + 1 if '-' in self.session_id else 2
+            session_id = f"{session_id}-{count}"
+        
+        if self.store is not None:
+            self.store.end_session(self.session_id)
+            self.session_id = session_id
+            self.store.start_session(self.session_id)
+            if self.index:
+                self.store.save_roster(self.session_id, self.index.database, self.index.fingerprint)
+            self._update_state(lambda state: state.replace(matched_records={}, persistent_records={}))
+        else:
+            self.session_id = session_id
+            self.matched_records = {}
+        self.clear_cache()
+    
+    def _find_record(self, detected_name):
+        """Persistent record for a detected name from this session, else from the store's history"""
+        record = self.persistent_records.get(detected_name)
+        if record is None and self.store is not None:
+            record = self.store.find_alias(detected_name)
+        return record
+    
+    def _forget_record(self, detected_name):
+        """Remove a detected name's persistent record, and this session's saved copy of it"""
+        if detected_name not in self.persistent_records:
+            return
+        self._update_state(lambda state: state.without_records([detected_name]))
+        if self.store is not None:
+            self.store.forget_match(self.session_id, detected_name)
+            return
+        try:
+            self._get_journal().remove(detected_name)
+        except Exception as e:
+            print(f"Warning: Could not remove persistent record: {e}")
+    
+    def _get_journal(self):
+        """Journal for the current persistence_file (reopened if the path changed)"""
+        if self.journal is None or self.journal.snapshot_path != self.persistence_file:
+            if self.journal is not None:
+                self.journal.close()
+            self.journal = AttendanceJournal(self.persistence_file)
+        return self.journal
     
     def load_persistent_records(self):
-        """Load persistent records from file"""
+        """Load persistent records from the snapshot file and its journal"""
+        if self.store is not None:
+            # History stays in the store and is queried per name
+            self.persistent_records = {}
+            self.clear_cache()
+            return
         try:
-            if os.path.exists(self.persistence_file):
-                with open(self.persistence_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # Load records but filter by current session or recent sessions
-                    self.persistent_records = data.get('records', {})
-                    print(f"Loaded {len(self.persistent_records)} persistent records")
-            else:
-                self.persistent_records = {}
+            journal = self._get_journal()
+            self.persistent_records = journal.load()
+            self.clear_cache()  # Cached matches may rely on records that are gone
+            if self.persistent_records:
+                print(f"Loaded {len(self.persistent_records)} persistent records")
+            if journal.needs_compaction():
+                self.save_persistent_records()
         except Exception as e:
             print(f"Warning: Could not load persistent records: {e}")
             self.persistent_records = {}
     
     def save_persistent_records(self):
-        """Save persistent records to file"""
+        """
+        Write all persistent records to the snapshot file
+        
+        Matches are journaled as they happen, so this is only needed to
+        compact the journal (done automatically as it grows) or at shutdown.
+        """
+        if self.store is not None:
+            self.store.flush()
+            return
         try:
-            data = {
-                'session_id': self.session_id,
-                'timestamp': datetime.now().isoformat(),
-                'records': self.persistent_records
-            }
-            with open(self.persistence_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            self._get_journal().compact(dict(self.persistent_records), self.session_id)
         except Exception as e:
             print(f"Warning: Could not save persistent records: {e}")
     
+    def flush_persistent_records(self):
+        """fsync any journaled records not yet on disk"""
+        if self.store is not None:
+            self.store.flush()
+        elif self.journal is not None:
+            self.journal.sync()
+    
+    def flush_due(self):
+        """Sync saved records that have waited longer than the store's or journal's interval (call periodically)"""
+        if self.store is not None:
+            self.store.flush_due()
+        elif self.journal is not None:
+            self.journal.flush_due()
+    
     def clear_persistent_records(self):
         """Clear all persistent records"""
         self.persistent_records = {}
+        self.clear_cache()  # So repeat names are matched (and recorded) again
+        if self.store is not None:
+            self.store.clear_matches()
+            return
         try:
-            if os.path.exists(self.persistence_file):
-                os.remove(self.persistence_file)
+            self._get_journal().clear()
         except Exception as e:
             print(f"Warning: Could not clear persistent records file: {e}")
\ No newline at end of file
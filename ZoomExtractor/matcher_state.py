@@ -0,0 +1,68 @@
+"""
+Matcher State
+Immutable snapshot of a RollMatcher's roster and match records. Writers
+build a new state and swap it in; readers keep whichever state they took,
+so they see a consistent view without taking a lock.
+"""
+
+from compact_records import RecordTable
+from roster_index import RosterIndex
+
+
+def _frozen(records):
+    """Read-only table of records (states share each other's tables as they are)"""
+    if isinstance(records, RecordTable):
+        return records
+    return RecordTable(records)
+
+
+class MatcherState:
+    def __init__(self, index=None, matched_records=None, persistent_records=None):
+        """
+        Build a state
+
+        Args:
+            index: Loaded RosterIndex (defaults to an empty roster)
+            matched_records: {detected_name: match_result} from this session's batches
+            persistent_records: {detected_name: record} of remembered matches
+
+        The record mappings are copied into RecordTables, which hand out a
+        new dict per read, so records in a state are never modified.
+        """
+        self.index = index if index is not None else RosterIndex({})
+        self.matched_records = _frozen(matched_records)
+        self.persistent_records = _frozen(persistent_records)
+
+    @property
+    def database(self):
+        """Read-only {name: roll_number} view of the roster"""
+        return self.index.database
+
+    def replace(self, **changes):
+        """Copy of this state with some of index, matched_records and persistent_records replaced"""
+        fields = {
+            'index': self.index,
+            'matched_records': self.matched_records,
+            'persistent_records': self.persistent_records,
+        }
+        fields.update(changes)
+        return MatcherState(**fields)
+
+    def with_matches(self, results):
+        """Copy of this state with {detected_name: match_result} added to matched_records"""
+        return self.replace(matched_records=self.matched_records.updated(results))
+
+    def with_records(self, records):
+        """Copy of this state with {detected_name: record} added to persistent_records"""
+        return self.replace(persistent_records=self.persistent_records.updated(records))
+
+    def without_records(self, names):
+        """Copy of this state with the persistent records of names removed"""
+        return self.replace(persistent_records=self.persistent_records.removed(names))
+
+    def all_records(self):
+        """This session's results, plus remembered matches of names it has no result for"""
+        records = dict(self.matched_records)
+        for name, record in self.persistent_records.items():
+            records.setdefault(name, record)
+        return records
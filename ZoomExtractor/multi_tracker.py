@@ -0,0 +1,192 @@
+"""
+Multi-Region Tracker Module
+Tracks several Zoom participant panels (e.g. two breakout or section meetings)
+from one capture loop with a shared OCR worker pool
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from capture import get_backend, select_backend
+from ocr_engine import OCREngine
+from tracker import ZoomTracker
+
+
+class MultiRegionTracker:
+    def __init__(self, ocr_workers=None, capture_backend=None, interval=0.5, recorder=None):
+        """
+        Initialize multi-region tracker
+
+        Args:
+            ocr_workers: Size of the shared OCR pool (defaults to the CPU count)
+            capture_backend: Capture backend name, or None to auto-select
+            interval: Seconds between capture rounds
+            recorder: Optional FrameRecorder shared by all regions
+        """
+        self.regions = {}  # {region_id: ZoomTracker} - per-region presence state
+        self.ocr = OCREngine(languages=('eng', 'ben'))
+        self.ocr_workers = ocr_workers or os.cpu_count() or 2
+        self.capture_backend = capture_backend
+        self.interval = interval
+        self.running = False
+        self.paused = False
+        self.lock = threading.Lock()
+        self.capture_thread = None
+        self.pool = None
+        self.capture = None
+        self.recorder = recorder
+        self.last_ocr_rows = 0  # Rows sent to OCR in the last round, across all regions
+
+    def add_region(self, region_id, region, callback=None, tile_height=70):
+        """
+        Add a region to track
+
+        Args:
+            region_id: Key used to look the region up later (e.g. meeting name)
+            region: Capture region dict
+            callback: Called as callback(participants_list, event_type, changed) for this region only
+            tile_height: Participant row height in pixels
+
+        Returns:
+            The region's ZoomTracker, which holds its presence state
+        """
+        tracker = ZoomTracker(callback=callback)
+        tracker.set_region(region)
+        tracker.set_tile_height(tile_height)
+        # All regions share one engine so the language models are loaded once
+        tracker.ocr = self.ocr
+        with self.lock:
+            self.regions[region_id] = tracker
+        return tracker
+
+    def remove_region(self, region_id):
+        """Stop tracking a region"""
+        with self.lock:
+            self.regions.pop(region_id, None)
+
+    def get_attendance_data(self):
+        """Get attendance data for every region"""
+        with self.lock:
+            regions = dict(self.regions)
+        return {region_id: tracker.get_attendance_data() for region_id, tracker in regions.items()}
+
+    def process_round(self):
+        """
+        Capture every region once and update their participants
+
+        Only rows whose pixels changed since the previous round are OCR'd,
+        and the rows from all regions go through the pool together.
+        """
+        with self.lock:
+            regions = list(self.regions.items())
+
+        frames = {}
+        futures = []
+        for region_id, tracker in regions:
+            try:
+                screenshot = self.capture.grab(tracker.region)
+            except Exception as e:
+                print(f"Capture error in region '{region_id}': {e}")
+                continue
+            tiles = tracker.crop_tiles(screenshot)
+            cached, changed = tracker.split_changed_rows(tiles)
+            frames[region_id] = (tracker, screenshot, cached, {})
+            for row, digest, tile in changed:
+                futures.append((region_id, row, digest, self.pool.submit(tracker.read_tile, tile)))
+
+        self.last_ocr_rows = len(futures)
+
+        for region_id, row, digest, future in futures:
+            try:
+                frames[region_id][3][row] = (digest, future.result())
+            except Exception as e:
+                print(f"OCR error in region '{region_id}': {e}")
+
+        for region_id, (tracker, screenshot, cached, results) in frames.items():
+            boxes = tracker.tile_boxes(screenshot)
+            names = tracker.merge_rows(len(boxes), cached, results)
+            tracker.update_participants(names)
+            if self.recorder is not None:
+                self.recorder.record(screenshot, boxes, tracker.last_readings, region_id=region_id)
+
+    def capture_loop(self):
+        """Main capture loop (runs in thread)"""
+        if not self.ocr.is_available():
+            print("ERROR: Tesseract OCR is not installed or not in PATH.")
+            return
+
+        if self.ocr.warmup_time is None:
+            self.ocr.warmup()
+
+        try:
+            if self.capture_backend:
+                self.capture = get_backend(self.capture_backend)
+            else:
+                with self.lock:
+                    first = next(iter(self.regions.values()), None)
+                self.capture = select_backend(first.region if first else None)
+        except Exception as e:
+            print(f"ERROR: Could not open a screen capture backend: {e}")
+            return
+
+        while self.running:
+            if self.paused or not self.regions:
+                time.sleep(0.1)
+                continue
+
+            try:
+                self.process_round()
+            except Exception as e:
+                print(f"Capture error: {e}")
+                import traceback
+                traceback.print_exc()
+            time.sleep(self.interval)
+
+        self.capture.close()
+        self.capture = None
+
+    def start(self):
+        """Start tracking all regions"""
+        if not self.regions:
+            raise ValueError("No regions added. Call add_region() first.")
+
+        # stop() closed the shared engine; a restart loads a new one for every region
+        if self.ocr.closed:
+            self.ocr = OCREngine(languages=self.ocr.languages)
+            with self.lock:
+                for tracker in self.regions.values():
+                    tracker.ocr = self.ocr
+
+        self.running = True
+        self.pool = ThreadPoolExecutor(max_workers=self.ocr_workers, thread_name_prefix="ocr")
+        self.capture_thread = threading.Thread(target=self.capture_loop, daemon=True)
+        self.capture_thread.start()
+        print(f"Multi-region tracker started ({len(self.regions)} regions, {self.ocr_workers} OCR workers)")
+
+    def stop(self):
+        """Stop tracking"""
+        self.running = False
+        # The engine can only be closed once no pool thread is inside recognize()
+        if self.capture_thread:
+            self.capture_thread.join()
+        if self.pool:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+        self.ocr.close()
+        print("Multi-region tracker stopped")
+
+    def pause(self):
+        """Pause tracking"""
+        self.paused = True
+
+    def resume(self):
+        """Resume tracking"""
+        self.paused = False
+
+    def reset(self):
+        """Reset all regions' data"""
+        with self.lock:
+            for tracker in self.regions.values():
+                tracker.reset()
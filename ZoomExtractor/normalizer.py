@@ -0,0 +1,136 @@
+"""
+Name Normalizer
+Name cleanup rules shared by the OCR tracker, the matcher and the browser
+scraper, loaded from normalization.json and compiled once
+"""
+
+import json
+import os
+import re
+from functools import lru_cache
+from types import MappingProxyType
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "normalization.json")
+
+
+def load_config(path=CONFIG_FILE):
+    """
+    Read normalization rules
+
+    Args:
+        path: JSON file with corrections, noise patterns and UI labels
+
+    Returns:
+        dict of rules, empty if the file is missing or unreadable
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not load name normalization rules from {path}: {e}")
+        return {}
+
+
+def _alternation(patterns):
+    """One regex source matching any of patterns, or None if there are none"""
+    patterns = list(patterns)
+    if not patterns:
+        return None
+    return '|'.join(f'(?:{pattern})' for pattern in patterns)
+
+
+class NameNormalizer:
+    def __init__(self, config=None, cache_size=4096):
+        """
+        Compile the rules
+
+        Args:
+            config: Rules as in normalization.json (None loads that file)
+            cache_size: Cleaned strings memoized per operation
+        """
+        config = load_config() if config is None else config
+        self.config = MappingProxyType(dict(config))
+        self.cache_size = cache_size
+        self.corrections = MappingProxyType(dict(config.get('corrections', {})))
+        self.strip_chars = config.get('strip_chars', '')
+        self.ocr_trailing_chars = config.get('ocr_trailing_chars', '')
+
+        # "(Host, me)", "(Co-host" and "Host)": an annotation needs at least one parenthesis
+        words = _alternation(re.escape(word) for word in config.get('annotation_words', []))
+        noise = list(config.get('noise_patterns', []))
+        if words:
+            words = rf'\b(?:{words})\b(?:\s*,\s*(?:{words})\b)*'
+            self.annotation_re = re.compile(rf'\(\s*{words}\s*\)?|{words}\s*\)', re.IGNORECASE)
+            noise.insert(0, self.annotation_re.pattern)
+        else:
+            self.annotation_re = None
+        noise = _alternation(noise)
+        self.noise_re = re.compile(noise, re.IGNORECASE) if noise else None
+
+        # Longest first, so one pass prefers "Fahad Akas" over "Akas" and never rewrites its own output
+        wrong = sorted(self.corrections, key=len, reverse=True)
+        corrections = _alternation(re.escape(text) for text in wrong)
+        self.corrections_re = re.compile(corrections) if corrections else None
+
+        # Labels match as whole words, so "NEW" does not reject "Shahnewaz"
+        ui = _alternation([rf'(?<!\w){re.escape(label)}(?!\w)' for label in config.get('ui_labels', [])] +
+                          list(config.get('ui_patterns', [])))
+        self.ui_re = re.compile(ui, re.IGNORECASE) if ui else None
+
+        self.preprocess = lru_cache(maxsize=cache_size)(self._preprocess)
+        self.clean_ocr = lru_cache(maxsize=cache_size)(self._clean_ocr)
+        self.clean_scraped = lru_cache(maxsize=cache_size)(self._clean_scraped)
+
+    def with_corrections(self, corrections):
+        """Copy of this normalizer with another corrections table"""
+        config = dict(self.config)
+        config['corrections'] = dict(corrections)
+        return NameNormalizer(config, self.cache_size)
+
+    def _preprocess(self, name):
+        """
+        Clean a detected name for matching
+
+        Removes "(Host, me)" annotations and short OCR noise words, strips
+        edge noise, collapses whitespace and applies the corrections table.
+        """
+        if not name:
+            return ""
+        if self.noise_re is not None:
+            name = self.noise_re.sub('', name)
+        name = ' '.join(name.strip(self.strip_chars).split())
+        if self.corrections_re is not None:
+            name = self.corrections_re.sub(lambda m: self.corrections[m.group(0)], name)
+        return name.strip()
+
+    def _clean_ocr(self, text):
+        """Fix OCR artifacts in a name read from a participant tile"""
+        # Remove trailing punctuation that might be OCR artifacts
+        text = text.rstrip(self.ocr_trailing_chars)
+
+        # Ensure proper formatting for Zoom participant names
+        if '(' in text and ')' not in text:
+            text = text.replace('(', '(Me)') if 'me' in text.lower() else text.replace('(', '(Host)')
+
+        return text.strip()
+
+    def _clean_scraped(self, text):
+        """
+        Participant name from a web client element
+
+        Returns:
+            Name without "(Host, me)" annotations, or "" for UI labels and
+            counters such as "Participants (3)"
+        """
+        if self.annotation_re is not None:
+            text = self.annotation_re.sub('', text)
+        text = text.strip()
+        if self.ui_re is not None and self.ui_re.search(text):
+            return ""
+        return text
+
+
+@lru_cache(maxsize=1)
+def default_normalizer():
+    """NameNormalizer for normalization.json, shared by every caller"""
+    return NameNormalizer()
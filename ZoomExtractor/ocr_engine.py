@@ -0,0 +1,302 @@
+"""
+OCR Engine Module
+Persistent, script-aware Tesseract wrapper used by the tracker
+"""
+
+import os
+import shlex
+import shutil
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytesseract
+from PIL import Image
+
+# tesserocr keeps a TessBaseAPI (and its language data) alive between calls,
+# which is much cheaper than spawning a tesseract process per image.
+# pytesseract is used as a fallback when it isn't installed.
+try:
+    from tesserocr import PyTessBaseAPI
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+
+# Where the UB-Mannheim installer puts Tesseract on Windows
+WINDOWS_TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+
+def configure_tesseract():
+    """
+    Point pytesseract at the Tesseract executable
+
+    Uses the default Windows install location when it exists there, and
+    whatever 'tesseract' is on PATH everywhere else (Linux, macOS, Xvfb).
+
+    Returns:
+        The command pytesseract will run
+    """
+    if os.name == 'nt' and os.path.isfile(WINDOWS_TESSERACT_CMD):
+        cmd = WINDOWS_TESSERACT_CMD
+    else:
+        cmd = shutil.which('tesseract') or 'tesseract'
+    pytesseract.pytesseract.tesseract_cmd = cmd
+    return cmd
+
+
+LATIN_WHITELIST = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789()- "
+
+# Bengali Unicode block (U+0980-U+09FF) plus the shared ASCII characters
+# that Zoom display names commonly contain
+BENGALI_WHITELIST = ''.join(chr(c) for c in range(0x0980, 0x0A00)) + "0123456789()- "
+
+# Script name -> Tesseract language code
+SCRIPT_LANGUAGES = {
+    'latin': 'eng',
+    'bengali': 'ben',
+}
+
+# Tesseract language code -> character whitelist
+LANGUAGE_WHITELISTS = {
+    'eng': LATIN_WHITELIST,
+    'ben': BENGALI_WHITELIST,
+}
+
+
+def _long_run_coverage(row, min_run):
+    """Total length of the ink runs in a binary row that are at least min_run long"""
+    edges = np.diff(np.concatenate(([0], row, [0])))
+    starts = np.nonzero(edges == 1)[0]
+    ends = np.nonzero(edges == -1)[0]
+    lengths = ends - starts
+    return int(lengths[lengths >= min_run].sum())
+
+
+def detect_script(gray):
+    """
+    Guess the script of a single-line text tile
+
+    Bengali words hang from a continuous headline (matra), so some row in the
+    upper part of the text is covered by ink runs much longer than the text
+    is tall. Latin rows only ever contain short strokes (crossbars, serifs).
+    This only needs a threshold and a few row scans, so it is far cheaper
+    than running Tesseract's script detection.
+
+    Args:
+        gray: Grayscale tile (2D numpy array)
+
+    Returns:
+        'bengali' or 'latin'
+    """
+    if gray is None or gray.size == 0:
+        return 'latin'
+
+    _, binary = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    # Text is the minority colour - flip so that ink is always 1
+    if binary.mean() > 0.5:
+        binary = 1 - binary
+
+    w = binary.shape[1]
+    row_ink = binary.sum(axis=1)
+
+    # Ignore separator lines and borders that span the whole tile
+    binary = binary[row_ink < 0.95 * w]
+    row_ink = row_ink[row_ink < 0.95 * w]
+
+    rows = np.nonzero(row_ink)[0]
+    if len(rows) < 6:
+        return 'latin'
+    cols = np.nonzero(binary[rows[0]:rows[-1] + 1].sum(axis=0))[0]
+    if len(cols) < 10:
+        return 'latin'
+
+    top, bottom = rows[0], rows[-1]
+    text_height = bottom - top + 1
+    text_width = cols[-1] - cols[0] + 1
+
+    # The headline sits in the upper part of the text, below any vowel signs
+    for y in range(top, top + max(1, int(text_height * 0.6))):
+        if row_ink[y] < 0.4 * text_width:
+            continue
+        if _long_run_coverage(binary[y], text_height) >= 0.4 * text_width:
+            return 'bengali'
+    return 'latin'
+
+
+class OCREngine:
+    """
+    Keeps Tesseract loaded for every language the tracker needs and routes
+    each tile to the language model that matches its script
+    """
+
+    def __init__(self, languages=('eng', 'ben')):
+        """
+        Initialize engine
+
+        Args:
+            languages: Tesseract language codes to keep loaded
+        """
+        self.languages = tuple(languages)
+        self.available_languages = set()
+        self.loaded = False
+        self.error = None
+        self._configs = {}  # {(lang, psm): pytesseract config string}
+        self._free = {}  # {(lang, psm): [idle tesserocr APIs]} - shared by all threads
+        self._closed = False  # Set by close(); APIs still in use are ended when checked in
+        self._lock = threading.Lock()
+        self.warmup_time = None
+
+    def load(self):
+        """
+        Load Tesseract and the language data (idempotent)
+
+        Returns:
+            True if OCR is usable
+        """
+        with self._lock:
+            if self.loaded:
+                return self.error is None
+
+            try:
+                installed = set(pytesseract.get_languages(config=''))
+            except Exception as e:
+                self.error = e
+                self.loaded = True
+                return False
+
+            self.available_languages = {lang for lang in self.languages if lang in installed}
+            if 'eng' not in self.available_languages and 'eng' in self.languages:
+                print("Warning: Tesseract 'eng' language data not found")
+            for lang in self.languages:
+                if lang not in self.available_languages:
+                    print(f"Warning: Tesseract language '{lang}' not installed, tiles will fall back to 'eng'")
+
+            self.loaded = True
+            return True
+
+    def is_available(self):
+        """Check whether OCR can run"""
+        return self.load()
+
+    def language_for(self, gray):
+        """Pick the Tesseract language for a grayscale tile"""
+        lang = SCRIPT_LANGUAGES[detect_script(gray)]
+        if lang not in self.available_languages:
+            return 'eng'
+        return lang
+
+    def _config(self, lang, psm):
+        """Cached pytesseract config string"""
+        key = (lang, psm)
+        config = self._configs.get(key)
+        if config is None:
+            whitelist = LANGUAGE_WHITELISTS.get(lang, LATIN_WHITELIST)
+            if os.name == 'nt':
+                # pytesseract splits the config without POSIX quoting on Windows,
+                # so a quoted value would reach Tesseract with the quotes in it;
+                # recognize() applies the whitelist to the text instead
+                config = f"--psm {psm}"
+            else:
+                # Quoted so the whitelisted space survives pytesseract's shlex split
+                config = f"--psm {psm} -c " + shlex.quote(f"tessedit_char_whitelist={whitelist}")
+            self._configs[key] = config
+        return config
+
+    def _checkout(self, lang, psm):
+        """Take an idle persistent tesserocr API for a language/PSM pair, creating one if needed"""
+        key = (lang, psm)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("OCR engine is closed")
+            free = self._free.get(key)
+            if free:
+                return free.pop()
+
+        # One API per concurrent caller; they are reused afterwards
+        api = PyTessBaseAPI(lang=lang, psm=psm)
+        api.SetVariable('tessedit_char_whitelist', LANGUAGE_WHITELISTS.get(lang, LATIN_WHITELIST))
+        return api
+
+    def _checkin(self, lang, psm, api):
+        """Return an API to the pool, or end it if the engine was closed while it was in use"""
+        with self._lock:
+            if not self._closed:
+                self._free.setdefault((lang, psm), []).append(api)
+                return
+        try:
+            api.End()
+        except Exception:
+            pass
+
+    def recognize(self, image, lang='eng', psm=7):
+        """
+        Run OCR on a single image
+
+        Args:
+            image: Grayscale or binary numpy array
+            lang: Tesseract language code
+            psm: Tesseract page segmentation mode
+
+        Returns:
+            Recognized text (stripped)
+        """
+        if TESSEROCR_AVAILABLE:
+            api = self._checkout(lang, psm)
+            try:
+                api.SetImage(Image.fromarray(image))
+                return api.GetUTF8Text().strip()
+            finally:
+                self._checkin(lang, psm, api)
+
+        text = pytesseract.image_to_string(image, lang=lang, config=self._config(lang, psm))
+        if os.name == 'nt':
+            whitelist = LANGUAGE_WHITELISTS.get(lang, LATIN_WHITELIST)
+            text = ''.join(c for c in text if c in whitelist or c == '\n')
+        return text.strip()
+
+    @property
+    def closed(self):
+        """Whether close() was called; a closed engine can't recognize anything"""
+        return self._closed
+
+    def close(self):
+        """
+        Release all persistent Tesseract instances
+
+        Idle instances are ended now; one still inside recognize() is ended
+        when that call checks it back in.
+        """
+        with self._lock:
+            self._closed = True
+            free, self._free = self._free, {}
+        for apis in free.values():
+            for api in apis:
+                try:
+                    api.End()
+                except Exception:
+                    pass
+
+    def warmup(self, psms=(7, 8)):
+        """
+        Load every language model up front by running OCR on a blank line
+
+        Args:
+            psms: Page segmentation modes the caller will use
+
+        Returns:
+            Elapsed seconds
+        """
+        start = time.perf_counter()
+        if self.load():
+            blank = np.full((40, 200), 255, dtype=np.uint8)
+            for lang in sorted(self.available_languages):
+                for psm in psms:
+                    try:
+                        self.recognize(blank, lang=lang, psm=psm)
+                    except Exception as e:
+                        print(f"OCR warmup failed for '{lang}': {e}")
+        self.warmup_time = time.perf_counter() - start
+        return self.warmup_time
@@ -0,0 +1,166 @@
+"""
+Attendance Journal
+Append-only JSON-lines journal with periodic compaction into a snapshot,
+so saving a match costs one short append instead of a full file rewrite
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+
+class AttendanceJournal:
+    def __init__(self, snapshot_path, sync_interval=2.0, sync_batch=64, compact_every=5000):
+        """
+        Initialize journal
+
+        Args:
+            snapshot_path: Snapshot file (the attendance_persistence.json format)
+            sync_interval: Longest time in seconds appended records wait for fsync,
+                checked on every append and by flush_due()
+            sync_batch: Appends after which the journal is fsynced regardless of time
+            compact_every: Journal entries after which it is folded into the snapshot
+        """
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + ".journal"
+        self.sync_interval = sync_interval
+        self.sync_batch = sync_batch
+        self.compact_every = compact_every
+        self.file = None
+        self.entries = 0  # Entries in the journal since the last compaction
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self.lock = threading.RLock()  # append() and flush_due() run on different threads
+
+    def load(self):
+        """
+        Load the snapshot and replay the journal over it
+
+        A torn last line (the process died mid-append) is dropped and cut
+        off the file; a corrupt line elsewhere is skipped with a warning.
+
+        Returns:
+            {detected_name: record}
+        """
+        records = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                records = json.load(f).get('records', {})
+
+        self.entries = 0
+        if not os.path.exists(self.journal_path):
+            return records
+
+        good_end = 0
+        with open(self.journal_path, 'rb') as f:
+            lines = f.readlines()
+        for line_num, line in enumerate(lines, 1):
+            try:
+                if not line.endswith(b'\n'):
+                    raise ValueError("incomplete line")
+                entry = json.loads(line)
+            except ValueError:
+                if line_num == len(lines):
+                    print(f"Warning: Dropping torn record at the end of {self.journal_path}")
+                    with open(self.journal_path, 'r+b') as f:
+                        f.truncate(good_end)
+                    break
+                print(f"Warning: Skipping corrupt record on line {line_num} of {self.journal_path}")
+                good_end += len(line)
+                continue
+
+            good_end += len(line)
+            self.entries += 1
+            if entry.get('op') == 'put':
+                records[entry['name']] = entry['record']
+            elif entry.get('op') == 'delete':
+                records.pop(entry['name'], None)
+
+        return records
+
+    def append(self, name, record):
+        """Journal one detected name's record"""
+        self._write({'op': 'put', 'name': name, 'record': record})
+
+    def remove(self, name):
+        """Journal the removal of one detected name's record"""
+        self._write({'op': 'delete', 'name': name})
+
+    def _write(self, entry):
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.journal_path, 'a', encoding='utf-8')
+            self.file.write(line)
+            # Hand the line to the OS now so a crash loses nothing; fsync is batched
+            self.file.flush()
+            self.entries += 1
+            self.unsynced += 1
+            if self.unsynced >= self.sync_batch or time.monotonic() - self.last_sync >= self.sync_interval:
+                self.sync()
+
+    def sync(self):
+        """fsync appended records to disk"""
+        with self.lock:
+            if self.file is not None and self.unsynced:
+                os.fsync(self.file.fileno())
+            self.unsynced = 0
+            self.last_sync = time.monotonic()
+
+    def flush_due(self):
+        """fsync appended records if sync_interval has passed since the last sync (call periodically)"""
+        with self.lock:
+            if self.unsynced and time.monotonic() - self.last_sync >= self.sync_interval:
+                self.sync()
+
+    def needs_compaction(self):
+        """True once the journal has grown past compact_every entries"""
+        return self.entries >= self.compact_every
+
+    def compact(self, records, session_id=None):
+        """
+        Write all records to the snapshot and empty the journal
+
+        The snapshot is written to a temporary file and renamed over the old
+        one, so a crash leaves either the old snapshot plus journal or the
+        new snapshot.
+
+        Args:
+            records: Current {detected_name: record}
+            session_id: Session saved in the snapshot header
+        """
+        data = {
+            'session_id': session_id,
+            'timestamp': datetime.now().isoformat(),
+            'records': records
+        }
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        with self.lock:
+            os.replace(temp_path, self.snapshot_path)
+            self.close()
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self.entries = 0
+
+    def clear(self):
+        """Delete the snapshot and the journal"""
+        with self.lock:
+            self.close()
+            for path in (self.snapshot_path, self.journal_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.entries = 0
+
+    def close(self):
+        """Sync and close the journal file"""
+        with self.lock:
+            if self.file is not None:
+                self.sync()
+                self.file.close()
+                self.file = None
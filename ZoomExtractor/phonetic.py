@@ -0,0 +1,57 @@
+"""
+Phonetic Keys
+Sound-alike keys for romanized Bengali names, so spellings such as
+"Shail"/"Sahil", "Farhad"/"Fahad" or "Mehedi"/"Mehdi" share a key
+"""
+
+import re
+from functools import lru_cache
+
+# Spelling variants of one Bengali sound, longest first
+_SOUND_RULES = [
+    (re.compile(r'chh|ch'), 'c'),
+    (re.compile(r'sh|ss|x'), 's'),
+    (re.compile(r'jh|zh|z'), 'j'),
+    (re.compile(r'kh|ck|q'), 'k'),
+    (re.compile(r'gh'), 'g'),
+    (re.compile(r'th'), 't'),
+    (re.compile(r'dh'), 'd'),
+    (re.compile(r'bh|v'), 'b'),
+    (re.compile(r'ph'), 'f'),
+    (re.compile(r'w'), 'u'),
+    (re.compile(r'y'), 'i'),
+]
+
+# Silent or swallowed in transliteration: "r" before a consonant (Farhad/Fahad)
+_R_BEFORE_CONSONANT = re.compile(r'r(?=[bcdfghjklmnpqrstz])')
+_NON_LETTERS = re.compile(r'[^a-z]')
+_VOWELS = re.compile(r'[aeiou]')
+_REPEATS = re.compile(r'(.)\1+')
+
+
+@lru_cache(maxsize=65536)
+def token_key(token):
+    """
+    Phonetic key of one word
+
+    The key keeps the first sound (any leading vowel becomes 'a') and the
+    consonant skeleton after it: aspiration and vowels are dropped,
+    spelling variants of one sound are merged and repeats are collapsed.
+    """
+    token = _NON_LETTERS.sub('', token.lower())
+    if not token:
+        return ''
+    for pattern, sound in _SOUND_RULES:
+        token = pattern.sub(sound, token)
+    token = _R_BEFORE_CONSONANT.sub('', token).replace('h', '')
+    if not token:
+        return ''
+
+    first = 'a' if token[0] in 'aeiou' else token[0]
+    rest = _VOWELS.sub('', token[1:])
+    return _REPEATS.sub(r'\1', first + rest)
+
+
+def name_key(name):
+    """Phonetic key of a full name, independent of word order"""
+    return ' '.join(sorted(key for key in (token_key(token) for token in name.split()) if key))
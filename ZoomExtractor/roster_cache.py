@@ -0,0 +1,227 @@
+"""
+Roster Cache
+Parsed rosters and their RosterIndex pickled to disk, keyed by where the
+roster came from, so a warm start skips downloading, parsing and indexing.
+Cache files are signed with a per-user secret and only unpickled when the
+signature matches, since unpickling runs whatever code the file names.
+"""
+
+import gc
+import hashlib
+import hmac
+import os
+import pickle
+import threading
+
+from app_paths import app_data_dir
+from roster_index import INDEX_VERSION, RosterIndex
+
+# Bytes of HMAC-SHA256 signature at the start of every cache file
+SIGNATURE_SIZE = 32
+
+
+def content_key(data):
+    """Cache key for a downloaded roster: hash of its bytes"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def file_key(path):
+    """Cache key for a roster file: its modification time and size"""
+    info = os.stat(path)
+    return f"{info.st_mtime_ns}:{info.st_size}"
+
+
+def load_key(path):
+    """
+    Secret used to sign cache files, created on first use
+
+    The file is only readable by the current user, so other users can
+    not forge cache files that this user would unpickle.
+    """
+    try:
+        with open(path, 'rb') as f:
+            key = f.read()
+        if len(key) >= SIGNATURE_SIZE:
+            return key
+    except FileNotFoundError:
+        pass
+    key = os.urandom(SIGNATURE_SIZE)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    return key
+
+
+class RosterCache:
+    def __init__(self, folder=None, key_file=None):
+        """
+        Initialize cache
+
+        Args:
+            folder: Directory holding one pickle per roster source (defaults
+                to roster_cache in the app data folder)
+            key_file: File holding the signing secret (defaults to
+                roster_cache.key in the app data folder)
+        """
+        self.folder = folder or app_data_dir("roster_cache")
+        self.key = load_key(key_file or os.path.join(app_data_dir(), "roster_cache.key"))
+        self.lock = threading.Lock()
+        self.refreshing = set()  # Sources with a background refresh running
+        self.threads = []  # Background writes and refreshes
+
+    def _path(self, source):
+        name = hashlib.blake2b(source.encode('utf-8'), digest_size=12).hexdigest()
+        return os.path.join(self.folder, name + ".pickle")
+
+    def _sign(self, payload):
+        return hmac.new(self.key, payload, hashlib.sha256).digest()
+
+    def get(self, source, key=None):
+        """
+        Cached roster for a source
+
+        Args:
+            source: Roster file path or sheet URL
+            key: Required cache key (None accepts whatever is cached)
+
+        Returns:
+            (RosterIndex, count, key), or None if there is no usable entry
+        """
+        try:
+            with open(self._path(source), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable roster cache for {source}: {e}")
+            return None
+
+        payload = data[SIGNATURE_SIZE:]
+        if not hmac.compare_digest(data[:SIGNATURE_SIZE], self._sign(payload)):
+            print(f"Warning: Ignoring roster cache for {source} with a bad signature")
+            return None
+
+        # The collector would repeatedly scan the many objects being unpickled
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            entry = pickle.loads(payload)
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable roster cache for {source}: {e}")
+            return None
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if entry.get('version') != INDEX_VERSION or entry.get('source') != source:
+            return None
+        if key is not None and entry.get('key') != key:
+            return None
+        return entry['index'], entry['count'], entry['key']
+
+    def put(self, source, key, index, count):
+        """Write a roster to the cache (atomically, so readers never see half a file)"""
+        entry = {'version': INDEX_VERSION, 'source': source, 'key': key, 'count': count, 'index': index}
+        path = self._path(source)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            payload = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+            os.makedirs(self.folder, exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                f.write(self._sign(payload))
+                f.write(payload)
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"Warning: Could not write roster cache for {source}: {e}")
+
+    def _start(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        with self.lock:
+            self.threads = [t for t in self.threads if t.is_alive()]
+            self.threads.append(thread)
+        thread.start()
+
+    def put_later(self, source, key, index, count):
+        """put() on a background thread, so loading never waits for the write"""
+        self._start(self.put, source, key, index, count)
+
+    def wait(self, timeout=None):
+        """Wait for background writes and refreshes (e.g. before exiting)"""
+        with self.lock:
+            threads = list(self.threads)
+        for thread in threads:
+            thread.join(timeout)
+
+    def load_file(self, path, parse):
+        """
+        Roster index for a file, from the cache while the file is unchanged
+
+        Args:
+            path: Roster file
+            parse: Function path -> ({name: roll}, count) used on a cache miss
+
+        Returns:
+            (RosterIndex, count, from_cache)
+        """
+        source = os.path.abspath(path)
+        key = file_key(path)
+        cached = self.get(source, key)
+        if cached is not None:
+            return cached[0], cached[1], True
+
+        records, count = parse(path)
+        index = RosterIndex(records)
+        self.put_later(source, key, index, count)
+        return index, count, False
+
+    def load_download(self, source, download, parse, on_update=None):
+        """
+        Roster index for a downloaded roster (such as a Google Sheet)
+
+        With a cached copy, that copy is returned at once and the source is
+        downloaded again in the background; if its content changed, the
+        rebuilt index is cached and passed to on_update. Without one, the
+        roster is downloaded and built before returning.
+
+        Args:
+            source: URL identifying the roster
+            download: Function () -> bytes
+            parse: Function bytes -> ({name: roll}, count)
+            on_update: Called with (RosterIndex, count) when a stale copy was replaced
+
+        Returns:
+            (RosterIndex, count, from_cache)
+        """
+        cached = self.get(source)
+        if cached is None:
+            data = download()
+            records, count = parse(data)
+            index = RosterIndex(records)
+            self.put_later(source, content_key(data), index, count)
+            return index, count, False
+
+        with self.lock:
+            refresh = source not in self.refreshing
+            self.refreshing.add(source)
+        if refresh:
+            self._start(self._refresh, source, cached[2], download, parse, on_update)
+        return cached[0], cached[1], True
+
+    def _refresh(self, source, cached_key, download, parse, on_update):
+        """Download a roster again and rebuild its cache entry if it changed"""
+        try:
+            data = download()
+            key = content_key(data)
+            if key == cached_key:
+                return
+            records, count = parse(data)
+            index = RosterIndex(records)
+            self.put(source, key, index, count)
+            print(f"Roster cache for {source} was stale; rebuilt with {count} records")
+            if on_update is not None:
+                on_update(index, count)
+        except Exception as e:
+            print(f"Warning: Could not refresh cached roster {source}: {e}")
+        finally:
+            with self.lock:
+                self.refreshing.discard(source)
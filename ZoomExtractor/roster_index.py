@@ -0,0 +1,381 @@
+"""
+Roster Index
+Immutable lookup structures built once per roster load or change, so
+matching a detected name only has to do the scoring work
+"""
+
+import hashlib
+import json
+from types import MappingProxyType
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from phonetic import name_key
+
+
+def sort_tokens(text):
+    """
+    Token form compared by token_sort_ratio
+
+    token_sort_ratio(a, b) is ratio(sort_tokens(a), sort_tokens(b)), so roster
+    names are stored in this form once and scored with plain ratio.
+    """
+    return ' '.join(sorted(text.split()))
+
+
+def _same(text, other):
+    """other if it is equal to text, else text, so equal strings are stored once"""
+    return other if text == other else text
+
+
+# Bumped whenever RosterIndex's layout changes, so cached indexes are rebuilt
+INDEX_VERSION = 2
+
+# Rosters at least this large get a CandidatePruner; smaller ones are scanned
+PRUNE_MIN_SIZE = 2000
+
+# extractOne applies score_cutoff slightly too strictly for scores like 95.652..,
+# so it is given this much slack and the cutoff is re-checked on the exact score
+CUTOFF_SLACK = 0.5
+
+# Character bins for the overlap bound: each ASCII letter, digits, space, anything else
+BIN_COUNT = 55
+_BIN_TABLE = np.full(128, BIN_COUNT - 1, dtype=np.uint8)
+_BIN_TABLE[ord('a'):ord('z') + 1] = np.arange(26)
+_BIN_TABLE[ord('A'):ord('Z') + 1] = np.arange(26, 52)
+_BIN_TABLE[ord('0'):ord('9') + 1] = 52
+_BIN_TABLE[ord(' ')] = 53
+
+
+def char_bins(text):
+    """Bin of every code point in text, as a uint8 array"""
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    return np.where(codes < 128, _BIN_TABLE[np.minimum(codes, 127)], BIN_COUNT - 1).astype(np.uint8)
+
+
+class CandidatePruner:
+    """
+    Lossless candidate filter for fuzz.ratio over a large choice list
+
+    fuzz.ratio(a, b) is 200 * M / (len(a) + len(b)) where M is the length of
+    an alignment, and M can never exceed the number of characters the two
+    strings share per bin. That bound rules out most names without scoring
+    them, and only names whose bound reaches the best real score so far are
+    scored, so the result is the same as an exhaustive scan.
+    """
+
+    def __init__(self, choices, seed_count=32):
+        """
+        Args:
+            choices: Strings to search (scored exactly as given)
+            seed_count: Names scored first to set the bar the others must reach
+        """
+        self.choices = choices
+        self.seed_count = seed_count
+
+        lengths = np.fromiter((len(choice) for choice in choices), dtype=np.int64, count=len(choices))
+        # Sorted by length so a length window is a contiguous slice
+        self.order = np.argsort(lengths, kind='stable')
+        self.lengths = lengths[self.order]
+
+        bins = char_bins(''.join(choices[i] for i in self.order))
+        rows = np.repeat(np.arange(len(choices)), self.lengths)
+        counts = np.bincount(rows * BIN_COUNT + bins, minlength=len(choices) * BIN_COUNT)
+        # One contiguous row per bin, so a query only touches the bins it uses
+        self.counts = np.ascontiguousarray(
+            np.minimum(counts, 255).astype(np.uint8).reshape(len(choices), BIN_COUNT).T)
+
+        # Names containing each whole word, for cheap first candidates: the
+        # positions for word i are posting_positions[posting_starts[i]:posting_starts[i + 1]]
+        postings = {}
+        for pos, choice in enumerate(choices):
+            for token in set(choice.split()):
+                postings.setdefault(token, []).append(pos)
+        self.words = {word: i for i, word in enumerate(postings)}
+        self.posting_starts = np.cumsum([0] + [len(positions) for positions in postings.values()])
+        self.posting_positions = np.fromiter(
+            (pos for positions in postings.values() for pos in positions), dtype=np.int64,
+            count=int(self.posting_starts[-1]))
+
+    def best(self, query, score_cutoff=0):
+        """
+        Best fuzz.ratio match for query
+
+        Args:
+            query: String to match (already in the choices' form)
+            score_cutoff: Minimum score of interest
+
+        Returns:
+            (choice_position, score), ties going to the lowest position, or
+            None if nothing reaches score_cutoff
+        """
+        size = len(query)
+        # Slack so float rounding can never prune a name that ties the bar
+        bar = max(score_cutoff, 0) - 1e-6
+
+        # Names sharing a word with the query usually include the answer
+        seed = self._score(query, self._word_seeds(query), bar)
+        if seed is not None:
+            bar = max(bar, seed[1] - 1e-6)
+
+        # Names too short or too long to reach the bar whatever they contain
+        start, stop = 0, len(self.lengths)
+        if bar > 0:
+            start = np.searchsorted(self.lengths, size * bar / (200 - bar), side='left')
+            stop = np.searchsorted(self.lengths, size * (200 - bar) / bar, side='right')
+        if start >= stop:
+            return None
+
+        # Upper bound on the alignment length of every remaining name
+        query_counts = np.bincount(char_bins(query), minlength=BIN_COUNT)
+        overlap = np.zeros(stop - start, dtype=np.uint8 if size < 256 else np.uint16)
+        buffer = np.empty_like(overlap)
+        for b in np.flatnonzero(query_counts):
+            np.minimum(self.counts[b, start:stop], query_counts[b], out=buffer, casting='unsafe')
+            overlap += buffer
+        lengths = self.lengths[start:stop]
+        needed = np.ceil(bar * (np.arange(lengths[-1] + 1) + size) / 200)
+        rows = np.flatnonzero(overlap >= needed[lengths])
+
+        if seed is None and len(rows) > self.seed_count:
+            # No word in common: score the highest-bound names to set the bar
+            bound = 200.0 * overlap[rows] / (lengths[rows] + size)
+            top = np.argpartition(-bound, self.seed_count - 1)[:self.seed_count]
+            seed = self._score(query, self.order[rows[top] + start], bar)
+            if seed is not None:
+                rows = rows[bound >= seed[1] - 1e-6]
+
+        result = self._score(query, self.order[rows + start], bar)
+        if result is None or result[1] < score_cutoff:
+            return None
+        return result
+
+    def _word_seeds(self, query):
+        """Up to seed_count positions of names sharing a word with query, rarest words first"""
+        lists = sorted((self._postings(token) for token in set(query.split())), key=len)
+        seeds = []
+        total = 0
+        for positions in lists:
+            if len(positions) and total + len(positions) > self.seed_count:
+                break
+            seeds.append(positions)
+            total += len(positions)
+        return np.concatenate(seeds) if seeds else np.empty(0, dtype=np.int64)
+
+    def _postings(self, word):
+        """Positions of the names containing word"""
+        i = self.words.get(word)
+        if i is None:
+            return self.posting_positions[:0]
+        return self.posting_positions[self.posting_starts[i]:self.posting_starts[i + 1]]
+
+    def _score(self, query, positions, cutoff):
+        """Best (choice_position, score) among some positions, ties to the lowest position"""
+        if len(positions) == 0:
+            return None
+        positions = np.unique(positions)
+        result = process.extractOne(query, [self.choices[pos] for pos in positions],
+                                    scorer=fuzz.ratio, score_cutoff=max(cutoff - CUTOFF_SLACK, 0))
+        if result is None or result[1] < cutoff:
+            return None
+        return int(positions[result[2]]), result[1]
+
+
+class RosterIndex:
+    def __init__(self, database, base=None):
+        """
+        Build the index
+
+        Args:
+            database: {name: roll_number}, in roster order
+            base: Optional previous RosterIndex; the preprocessed forms of names
+                it already has are reused instead of being computed again
+        """
+        database = dict(database)
+        self.database = MappingProxyType(database)
+        self.names = tuple(database.keys())
+        self.rolls = tuple(database.values())
+        self.positions = MappingProxyType({name: pos for pos, name in enumerate(self.names)})
+
+        # Later rows win for duplicate rolls, like {v: k for k, v in db.items()}
+        self.roll_to_name = MappingProxyType({roll: name for name, roll in database.items()})
+
+        # Identifies this exact roster (order included, since ties go to the first name)
+        self.fingerprint = hashlib.blake2b(
+            json.dumps(list(database.items()), ensure_ascii=False).encode('utf-8'), digest_size=8).hexdigest()
+
+        # Preprocessed choice lists for the two fuzzy passes, and each name's phonetic key
+        known = base.positions if base is not None else {}
+        old = [known.get(name) for name in self.names]
+        # (equal forms share one string: most names are already in token order,
+        # and sound-alike names share their key)
+        self.choices = tuple(_same(sort_tokens(name), name) if pos is None else base.choices[pos]
+                             for name, pos in zip(self.names, old))
+        self.choices_lower = tuple(_same(sort_tokens(name.lower()), choice) if pos is None
+                                   else base.choices_lower[pos]
+                                   for name, choice, pos in zip(self.names, self.choices, old))
+        shared_keys = {}
+        self.keys = tuple(shared_keys.setdefault(key, key) for key in (
+            name_key(name) if pos is None else base.keys[pos] for name, pos in zip(self.names, old)))
+
+        # First row wins for names that only differ by case
+        lower_to_name = {}
+        for name, choice in zip(self.names, self.choices_lower):
+            lower_to_name.setdefault(_same(name.lower(), choice), name)
+        self.lower_to_name = MappingProxyType(lower_to_name)
+
+        # Roster positions by phonetic key, for sound-alike spellings
+        phonetic = {}
+        for pos, key in enumerate(self.keys):
+            if key:
+                phonetic.setdefault(key, []).append(pos)
+        self.phonetic = MappingProxyType({key: tuple(positions) for key, positions in phonetic.items()})
+
+        # Large rosters narrow each query to a few candidates before scoring
+        self.pruners = None
+        if len(self.names) >= PRUNE_MIN_SIZE:
+            self.pruners = {
+                False: CandidatePruner(self.choices),
+                True: CandidatePruner(self.choices_lower),
+            }
+
+    # Attributes exposed as read-only mappings (stored as plain dicts when pickled)
+    _READ_ONLY = ('database', 'positions', 'roll_to_name', 'lower_to_name', 'phonetic')
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        for name in self._READ_ONLY:
+            state[name] = dict(state[name])
+        return state
+
+    def __setstate__(self, state):
+        for name in self._READ_ONLY:
+            state[name] = MappingProxyType(state[name])
+        self.__dict__.update(state)
+
+    def __len__(self):
+        return len(self.names)
+
+    def updated(self, database):
+        """Index for a changed roster, reusing the forms of the names kept from this one"""
+        return RosterIndex(database, base=self)
+
+    def __bool__(self):
+        return bool(self.names)
+
+    def find_exact(self, text):
+        """Roster name equal to text ignoring case, or None"""
+        return self.lower_to_name.get(text.lower())
+
+    def find_roll(self, roll):
+        """Roster name for a roll number, or None"""
+        return self.roll_to_name.get(roll)
+
+    def best_phonetic(self, text):
+        """
+        Best spelling match among roster names that sound like text
+
+        Args:
+            text: Detected name
+
+        Returns:
+            (roster_name, score) where score is the case-insensitive
+            token_sort_ratio, or None if no roster name has the same phonetic key
+        """
+        positions = self.phonetic.get(name_key(text))
+        if not positions:
+            return None
+        query = sort_tokens(text.lower())
+        best_pos, best_score = None, -1
+        for pos in positions:
+            score = fuzz.ratio(query, self.choices_lower[pos])
+            if score > best_score:
+                best_pos, best_score = pos, score
+        return self.names[best_pos], best_score
+
+    def best_match(self, text, folded=False, score_cutoff=None):
+        """
+        Best token_sort_ratio match for text
+
+        Args:
+            text: Detected name (already lowercased when folded=True)
+            folded: Score against the lowercased roster names
+            score_cutoff: Only return a match scoring at least this much
+
+        Returns:
+            (roster_name, score) or None if the roster is empty or nothing
+            reaches score_cutoff
+        """
+        if self.pruners is not None:
+            result = self.pruners[folded].best(sort_tokens(text), score_cutoff or 0)
+            if result is None:
+                return None
+            return self.names[result[0]], result[1]
+
+        choices = self.choices_lower if folded else self.choices
+        slack_cutoff = max(score_cutoff - CUTOFF_SLACK, 0) if score_cutoff else None
+        result = process.extractOne(sort_tokens(text), choices, scorer=fuzz.ratio, score_cutoff=slack_cutoff)
+        if result is None or (score_cutoff and result[1] < score_cutoff):
+            return None
+        return self.names[result[2]], result[1]
+
+    def best_matches(self, texts, folded=False, score_cutoff=None, workers=-1):
+        """
+        best_match for many texts with one all-pairs scoring call
+
+        Scores every text against every roster choice with process.cdist on
+        all cores. Ties go to the first roster name, as with extractOne.
+        Large (pruned) rosters look each text up separately instead, which
+        is cheaper than scoring every pair.
+
+        Args:
+            texts: Detected names (already lowercased when folded=True)
+            folded: Score against the lowercased roster names
+            score_cutoff: Only return matches scoring at least this much
+            workers: Scoring threads (-1 uses every core)
+
+        Returns:
+            List of (roster_name, score), or None per text if the roster is
+            empty or nothing reaches score_cutoff
+        """
+        texts = list(texts)
+        if not self.names or not texts:
+            return [None] * len(texts)
+        if self.pruners is not None:
+            return [self.best_match(text, folded, score_cutoff) for text in texts]
+
+        choices = self.choices_lower if folded else self.choices
+        # float64 keeps the scores bit-identical to extractOne's
+        scores = process.cdist([sort_tokens(text) for text in texts], choices,
+                               scorer=fuzz.ratio, dtype=np.float64, workers=workers)
+        best = scores.argmax(axis=1)
+        results = []
+        for row, col in enumerate(best):
+            score = float(scores[row, col])
+            results.append((self.names[col], score) if score_cutoff is None or score >= score_cutoff else None)
+        return results
+
+    def score_matrix(self, texts, folded=False, score_cutoff=None, workers=-1):
+        """
+        token_sort_ratio of every text against every roster name
+
+        Args:
+            texts: Detected names (already lowercased when folded=True)
+            folded: Score against the lowercased roster names
+            score_cutoff: Scores below this are set to 0
+            workers: Scoring threads (-1 uses every core)
+
+        Returns:
+            float64 array of shape (len(texts), len(roster)), columns in roster order
+        """
+        texts = list(texts)
+        if not self.names or not texts:
+            return np.zeros((len(texts), len(self.names)))
+        choices = self.choices_lower if folded else self.choices
+        slack_cutoff = max(score_cutoff - CUTOFF_SLACK, 0) if score_cutoff else None
+        scores = process.cdist([sort_tokens(text) for text in texts], choices, scorer=fuzz.ratio,
+                               dtype=np.float64, score_cutoff=slack_cutoff, workers=workers)
+        if score_cutoff:
+            scores[scores < score_cutoff] = 0
+        return scores
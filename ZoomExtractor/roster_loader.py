@@ -0,0 +1,151 @@
+"""
+Roster Loader
+Builds the {name: roll_number} roster from Google Sheet exports, CSV, TSV,
+Excel and plain text files with column-wise pandas operations
+"""
+
+import os
+import re
+
+import pandas as pd
+
+# Rows searched for a header naming the name and roll columns
+HEADER_SEARCH_ROWS = 5
+
+# A plain text roster line: "1. Name" / "1<TAB>Name" / "1 Name", otherwise
+# "Name Roll" where the roll is a number or at most three characters
+_SPACE = r'[^\S\n]'
+ROSTER_LINE = re.compile(
+    rf'^{_SPACE}*(?:(\d+)(?:\.|{_SPACE})+(\S.*?)|(\S.*?){_SPACE}+(\d+|\S{{1,3}})){_SPACE}*$', re.MULTILINE)
+
+TABLE_EXTENSIONS = {'.csv': ',', '.tsv': '\t', '.tab': '\t'}
+EXCEL_EXTENSIONS = {'.xlsx', '.xlsm', '.xls'}
+
+
+def find_columns(df):
+    """
+    Locate the header row and the name and roll columns
+
+    Looks for a row among the first HEADER_SEARCH_ROWS with a cell containing
+    "name" and one containing "roll" or "id". Without one, the first two
+    columns are used and every row is data.
+
+    Args:
+        df: Sheet read without a header row
+
+    Returns:
+        (header_row, name_col, roll_col) with header_row -1 if there is none
+    """
+    head = df.iloc[:HEADER_SEARCH_ROWS]
+    cells = head.apply(lambda col: col.astype('string').str.strip().str.lower())
+    for row in range(len(head)):
+        values = cells.iloc[row]
+        is_name = values.str.contains('name', regex=False).fillna(False).to_numpy(dtype=bool)
+        is_roll = (~is_name & (values.str.contains('roll', regex=False) |
+                               values.str.contains('id', regex=False)).fillna(False).to_numpy(dtype=bool))
+        if is_name.any() and is_roll.any():
+            # The last matching cell wins, as when scanning left to right
+            return row, int(is_name.nonzero()[0][-1]), int(is_roll.nonzero()[0][-1])
+    return -1, 0, min(1, len(df.columns) - 1)
+
+
+def roster_from_frame(df):
+    """
+    Roster from a sheet of cells
+
+    Args:
+        df: Sheet read with header=None and dtype=str
+
+    Returns:
+        ({name: roll}, rows_loaded); later rows win for repeated names
+
+    Raises:
+        ValueError: If the sheet has no data
+    """
+    # Remove completely empty rows and columns
+    df = df.dropna(how='all').dropna(axis=1, how='all')
+    if df.empty:
+        raise ValueError("No data found in sheet")
+    df = df.reset_index(drop=True)
+
+    header_row, name_col, roll_col = find_columns(df)
+    data = df.iloc[header_row + 1:]
+
+    # Rows with both cells filled, then without blank or placeholder values
+    pairs = data.iloc[:, [name_col, roll_col]].dropna().astype(str)
+    names = pairs.iloc[:, 0].str.strip()
+    rolls = pairs.iloc[:, 1].str.strip()
+    keep = ((names.str.len() > 1) & (rolls != '')
+            & (names != 'None') & (rolls != 'None')
+            & (names.str.lower() != 'nan') & (rolls.str.lower() != 'nan')).to_numpy(dtype=bool)
+    names, rolls = names[keep], rolls[keep]
+    return dict(zip(names.tolist(), rolls.tolist())), int(keep.sum())
+
+
+def roster_from_text(text):
+    """
+    Roster from plain text
+
+    Every line is parsed by one pass of ROSTER_LINE over the whole text.
+
+    Args:
+        text: Lines such as "1. Jahid", "1<TAB>Jahid" or "Fahad Akash 08"
+
+    Returns:
+        ({name: roll}, rows_loaded, skipped_lines)
+    """
+    records = {}
+    count = 0
+    for listed_roll, listed_name, name, roll in ROSTER_LINE.findall(text):
+        if listed_roll:
+            records[listed_name] = listed_roll
+        else:
+            records[name] = roll
+        count += 1
+
+    lines = [line.strip() for line in text.split('\n')]
+    skipped = []
+    if count < sum(1 for line in lines if line):
+        skipped = [line for line in lines if line and not ROSTER_LINE.match(line)]
+    return records, count, skipped
+
+
+def read_sheet(path):
+    """
+    Read a CSV, TSV or Excel file as cells, without treating any row as a header
+
+    Args:
+        path: File path
+
+    Returns:
+        DataFrame of strings (NaN for empty cells)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in EXCEL_EXTENSIONS:
+        return pd.read_excel(path, header=None, dtype=str)
+    return pd.read_csv(path, header=None, dtype=str, sep=TABLE_EXTENSIONS.get(extension, ','),
+                       skip_blank_lines=True)
+
+
+def load_roster_file(path):
+    """
+    Roster from a file
+
+    Spreadsheets and delimited tables (.csv, .tsv, .xlsx, ...) use their
+    name and roll columns; anything else is read as text lines.
+
+    Args:
+        path: File path
+
+    Returns:
+        ({name: roll}, rows_loaded)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in TABLE_EXTENSIONS or extension in EXCEL_EXTENSIONS:
+        return roster_from_frame(read_sheet(path))
+
+    with open(path, 'r', encoding='utf-8') as f:
+        records, count, skipped = roster_from_text(f.read())
+    if skipped:
+        print(f"  Skipped {len(skipped)} lines in an unrecognized format, e.g.: {skipped[0]}")
+    return records, count
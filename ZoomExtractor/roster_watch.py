@@ -0,0 +1,117 @@
+"""
+Roster Watcher
+Polls a roster file and applies its edits to a RollMatcher as incremental
+changes, so a late enrolment does not need a full reload
+"""
+
+import threading
+
+from roster_cache import file_key
+from roster_loader import load_roster_file
+
+
+def roster_changes(old, new):
+    """
+    Differences between two rosters
+
+    A name that disappeared and a name that appeared with the same roll
+    number (the only ones with that roll on each side) count as a rename.
+
+    Args:
+        old: {name: roll} before
+        new: {name: roll} after
+
+    Returns:
+        (added, removed, renamed): {name: roll} of new or re-numbered names,
+        removed names, and {old_name: new_name}
+    """
+    added = {name: roll for name, roll in new.items() if old.get(name) != roll}
+    removed = [name for name in old if name not in new]
+
+    gone_by_roll = {}
+    for name in removed:
+        gone_by_roll.setdefault(old[name], []).append(name)
+    appeared_by_roll = {}
+    for name, roll in added.items():
+        if name not in old:
+            appeared_by_roll.setdefault(roll, []).append(name)
+
+    renamed = {}
+    for roll, names in gone_by_roll.items():
+        appeared = appeared_by_roll.get(roll, [])
+        if len(names) == 1 and len(appeared) == 1:
+            renamed[names[0]] = appeared[0]
+    for new_name in renamed.values():
+        del added[new_name]
+    removed = [name for name in removed if name not in renamed]
+    return added, removed, renamed
+
+
+class RosterWatcher:
+    def __init__(self, matcher, path, interval=2.0, on_change=None):
+        """
+        Initialize watcher
+
+        Args:
+            matcher: RollMatcher whose roster was loaded from path
+            path: Roster file to watch
+            interval: Seconds between checks of the file's modification time and size
+            on_change: Called from the watcher thread with the dict returned by check()
+        """
+        self.matcher = matcher
+        self.path = path
+        self.interval = interval
+        self.on_change = on_change
+        self.key = file_key(path)
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def check(self):
+        """
+        Apply the file's changes if it was modified since the last check
+
+        Returns:
+            {'added', 'removed', 'renamed', 'rematched'} (see
+            RollMatcher.update_roster), or None if nothing changed
+        """
+        try:
+            key = file_key(self.path)
+            if key == self.key:
+                return None
+            records, count = load_roster_file(self.path)
+            if file_key(self.path) != key:
+                return None  # Still being written; read it on the next check
+        except Exception as e:
+            print(f"Warning: Could not read roster {self.path}: {e}")
+            return None
+        self.key = key
+
+        added, removed, renamed = roster_changes(self.matcher.database, records)
+        if not added and not removed and not renamed:
+            return None
+        try:
+            rematched = self.matcher.update_roster(added, removed, renamed)
+        except KeyError as e:
+            # Another roster was loaded since this check read the matcher's
+            print(f"Warning: Could not apply changes from {self.path}: {e}")
+            return None
+        return {'added': added, 'removed': removed, 'renamed': renamed, 'rematched': rematched}
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            changes = self.check()
+            if changes is not None and self.on_change is not None:
+                self.on_change(changes)
+
+    def start(self):
+        """Check the file every interval seconds on a background thread"""
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop watching (waits for a check in progress)"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,165 @@
+"""
+Sheet Fetcher
+Downloads roster exports (Google Sheets CSV) with timeouts, streaming and
+ETag / If-Modified-Since revalidation, keeping a local copy for offline starts
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
+
+
+class SheetFetcher:
+    def __init__(self, folder="sheet_cache", timeout=(5, 30), total_timeout=120, chunk_size=64 * 1024,
+                 max_bytes=50 * 1024 * 1024):
+        """
+        Initialize fetcher
+
+        Args:
+            folder: Directory for the local copy of each URL (None keeps no copies)
+            timeout: (connect, read) timeouts in seconds; the read timeout
+                applies to each read, not to the whole download
+            total_timeout: Longest time in seconds a whole download may take
+            chunk_size: Bytes read per streamed chunk
+            max_bytes: Largest response accepted
+        """
+        self.folder = folder
+        self.timeout = timeout
+        self.total_timeout = total_timeout
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        # requests.Session is not thread-safe, and the GUI thread and the
+        # roster cache's background refresh both fetch
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    @property
+    def session(self):
+        """requests.Session of the calling thread"""
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        return session
+
+    def _paths(self, url):
+        """(data, metadata) file paths of the local copy of url"""
+        name = hashlib.blake2b(url.encode('utf-8'), digest_size=12).hexdigest()
+        return os.path.join(self.folder, name + ".csv"), os.path.join(self.folder, name + ".json")
+
+    def _local_copy(self, url):
+        """(data, metadata) of the local copy, or (None, {})"""
+        if self.folder is None:
+            return None, {}
+        data_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(data_path, 'rb') as f:
+                return f.read(), meta
+        except (OSError, ValueError):
+            return None, {}
+
+    def fetch(self, url):
+        """
+        Download url, or revalidate the local copy
+
+        Args:
+            url: Export URL
+
+        Returns:
+            (data, status) where status is 'downloaded', 'not_modified' (the
+            server confirmed the local copy) or 'offline' (the server could not
+            be reached, timed out or failed with a 5xx error, and the local
+            copy was used)
+
+        Raises:
+            requests.RequestException: If the download failed and there is no local copy
+            ValueError: If the response is larger than max_bytes
+        """
+        deadline = time.monotonic() + self.total_timeout
+        local, meta = self._local_copy(url)
+        headers = {}
+        if local is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                if response.status_code == 304 and local is not None:
+                    return local, 'not_modified'
+                if response.status_code >= 500 and local is not None:
+                    print(f"Warning: {url} failed with HTTP {response.status_code}; "
+                          f"using the local copy from {meta.get('url', url)}")
+                    return local, 'offline'
+                response.raise_for_status()
+                data = self._read(response, deadline)
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if local is None:
+                raise
+            print(f"Warning: Could not reach {url} ({e}); using the local copy from {meta.get('url', url)}")
+            return local, 'offline'
+
+        if self.folder is not None:
+            self._save(url, data, {'url': url, 'etag': etag, 'last_modified': last_modified})
+        return data, 'downloaded'
+
+    def _chunks(self, response):
+        """
+        Decoded body chunks as they arrive
+
+        read1() returns whatever has been received, so a server trickling
+        data in cannot hold one read open until a whole chunk_size arrived.
+        urllib3 1.x has no read1(); iter_content is used there.
+        """
+        read1 = getattr(response.raw, 'read1', None)
+        if read1 is None:
+            yield from response.iter_content(chunk_size=self.chunk_size)
+            return
+        try:
+            while True:
+                chunk = read1(self.chunk_size, decode_content=True)
+                if not chunk:
+                    return
+                yield chunk
+        except ReadTimeoutError as e:
+            raise requests.Timeout(e)
+        except ProtocolError as e:
+            raise requests.ConnectionError(e)
+        except DecodeError as e:
+            raise requests.exceptions.ContentDecodingError(e)
+
+    def _read(self, response, deadline):
+        """Body of a streamed response, refusing more than max_bytes or reading past deadline"""
+        chunks = []
+        size = 0
+        for chunk in self._chunks(response):
+            if time.monotonic() > deadline:
+                raise requests.Timeout(f"Download took longer than {self.total_timeout} seconds")
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise ValueError(f"Response is larger than {self.max_bytes} bytes")
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def _save(self, url, data, meta):
+        """Replace the local copy (data first, so metadata never describes a missing file)"""
+        data_path, meta_path = self._paths(url)
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            with self.lock:
+                for path, content in ((data_path, data), (meta_path, json.dumps(meta).encode('utf-8'))):
+                    temp_path = path + ".tmp"
+                    with open(temp_path, 'wb') as f:
+                        f.write(content)
+                    os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not save a local copy of {url}: {e}")
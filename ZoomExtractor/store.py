@@ -0,0 +1,414 @@
+"""
+Attendance Store
+Embedded SQLite database of sessions, roster snapshots, detections, matches
+and presence intervals, so per-session numbers are indexed queries and a
+new session does not have to load earlier sessions' history
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from persistence import AttendanceJournal
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    started TEXT NOT NULL,
+    ended TEXT,
+    roster TEXT
+);
+CREATE TABLE IF NOT EXISTS roster_snapshots (
+    fingerprint TEXT PRIMARY KEY,
+    created TEXT NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS roster_entries (
+    fingerprint TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    roll TEXT NOT NULL,
+    PRIMARY KEY (fingerprint, position)
+);
+CREATE TABLE IF NOT EXISTS detections (
+    session_id TEXT NOT NULL,
+    detected_name TEXT NOT NULL,
+    matched_name TEXT,
+    roll TEXT,
+    confidence REAL,
+    status TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    seen_count INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (session_id, detected_name)
+);
+CREATE TABLE IF NOT EXISTS matches (
+    session_id TEXT NOT NULL,
+    detected_name TEXT NOT NULL,
+    matched_name TEXT NOT NULL,
+    roll TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    method TEXT,
+    roster TEXT,
+    learned_session TEXT,
+    learned TEXT,
+    matched_at TEXT NOT NULL,
+    PRIMARY KEY (session_id, detected_name)
+);
+CREATE TABLE IF NOT EXISTS presence_intervals (
+    session_id TEXT NOT NULL,
+    detected_name TEXT NOT NULL,
+    joined TEXT NOT NULL,
+    left TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_roster_entries_roll ON roster_entries (roll);
+CREATE INDEX IF NOT EXISTS idx_detections_roll ON detections (roll, session_id);
+CREATE INDEX IF NOT EXISTS idx_matches_roll ON matches (roll, session_id);
+CREATE INDEX IF NOT EXISTS idx_matches_alias ON matches (detected_name, matched_at);
+CREATE INDEX IF NOT EXISTS idx_presence_session ON presence_intervals (session_id, detected_name, left);
+"""
+
+
+class AttendanceStore:
+    def __init__(self, path="attendance.db", batch_size=200, flush_interval=1.0):
+        """
+        Open (or create) the store
+
+        Args:
+            path: SQLite database file
+            batch_size: Queued writes after which they are committed together
+            flush_interval: Longest time in seconds a queued write waits for commit
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = threading.RLock()
+        self.pending = []  # [(sql, params)] not yet committed
+        self.pending_matches = {}  # {detected_name: record} of match writes in pending, for find_alias
+        self.pending_forgets = {}  # {detected_name: session_id} of match deletes in pending
+        self.last_flush = time.monotonic()
+        self.present = {}  # {session_id: set of names with an open presence interval}
+
+        # The matcher and GUI threads share the connection, serialized by self.lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    # Write batching
+    def _queue(self, sql, params):
+        """Queue a write, committing the batch when it is full or old enough"""
+        with self.lock:
+            self.pending.append((sql, params))
+            if len(self.pending) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self):
+        """Commit all queued writes in one transaction"""
+        with self.lock:
+            if self.pending:
+                with self.conn:
+                    for sql, params in self.pending:
+                        self.conn.execute(sql, params)
+                self.pending = []
+                self.pending_matches = {}
+                self.pending_forgets = {}
+            self.last_flush = time.monotonic()
+
+    def flush_due(self):
+        """Commit queued writes if flush_interval has passed since the last commit (call periodically)"""
+        with self.lock:
+            if self.pending and time.monotonic() - self.last_flush >= self.flush_interval:
+                self.flush()
+
+    def _query(self, sql, params=()):
+        """Run a read after committing queued writes, so reads see them"""
+        with self.lock:
+            self.flush()
+            return self.conn.execute(sql, params).fetchall()
+
+    def close(self):
+        """Commit queued writes and close the database"""
+        with self.lock:
+            self.flush()
+            self.conn.close()
+
+    # Sessions and rosters
+    def start_session(self, session_id):
+        """Register a session (no-op if it already exists)"""
+        self._queue("INSERT OR IGNORE INTO sessions (session_id, started) VALUES (?, ?)",
+                    (session_id, datetime.now().isoformat()))
+
+    def end_session(self, session_id):
+        """Close the session's open presence intervals and stamp its end time (the first one is kept)"""
+        now = datetime.now().isoformat()
+        self.update_presence(session_id, [], now)
+        self._queue("UPDATE sessions SET ended = COALESCE(ended, ?) WHERE session_id = ?", (now, session_id))
+        self.flush()
+
+    def save_roster(self, session_id, database, fingerprint):
+        """
+        Snapshot a roster (stored once per distinct roster) and link it to the session
+
+        Args:
+            session_id: Session the roster was loaded in
+            database: {name: roll_number}
+            fingerprint: RosterIndex.fingerprint of the roster
+        """
+        with self.lock:
+            exists = self._query("SELECT 1 FROM roster_snapshots WHERE fingerprint = ?", (fingerprint,))
+            if not exists:
+                self._queue("INSERT INTO roster_snapshots (fingerprint, created, size) VALUES (?, ?, ?)",
+                            (fingerprint, datetime.now().isoformat(), len(database)))
+                for position, (name, roll) in enumerate(database.items()):
+                    self._queue("INSERT INTO roster_entries (fingerprint, position, name, roll) VALUES (?, ?, ?, ?)",
+                                (fingerprint, position, name, str(roll)))
+            self._queue("UPDATE sessions SET roster = ? WHERE session_id = ?", (fingerprint, session_id))
+
+    def get_roster(self, fingerprint):
+        """{name: roll_number} of a stored roster snapshot, in roster order"""
+        rows = self._query("SELECT name, roll FROM roster_entries WHERE fingerprint = ? ORDER BY position",
+                           (fingerprint,))
+        return {row['name']: row['roll'] for row in rows}
+
+    # Detections, matches and presence
+    def record_detections(self, session_id, results, when=None):
+        """
+        Record one refresh's detected names with their latest match result
+
+        Args:
+            session_id: Current session
+            results: {detected_name: match_result} as returned by RollMatcher.match_batch
+            when: ISO timestamp (defaults to now)
+        """
+        when = when or datetime.now().isoformat()
+        for name, result in results.items():
+            self._queue(
+                "INSERT INTO detections (session_id, detected_name, matched_name, roll, confidence, status, "
+                "first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (session_id, detected_name) DO UPDATE SET matched_name = excluded.matched_name, "
+                "roll = excluded.roll, confidence = excluded.confidence, status = excluded.status, "
+                "last_seen = excluded.last_seen, seen_count = seen_count + 1",
+                (session_id, name, result.get('matched_name'), str(result.get('roll')),
+                 float(result.get('confidence', 0)), result.get('status'), when, when))
+
+    def update_results(self, session_id, results):
+        """
+        Replace the latest result of detections already recorded (e.g. after a threshold change)
+
+        Args:
+            session_id: Current session
+            results: {detected_name: match_result}
+        """
+        for name, result in results.items():
+            self._queue(
+                "UPDATE detections SET matched_name = ?, roll = ?, confidence = ?, status = ? "
+                "WHERE session_id = ? AND detected_name = ?",
+                (result.get('matched_name'), str(result.get('roll')), float(result.get('confidence', 0)),
+                 result.get('status'), session_id, name))
+
+    def record_match(self, session_id, detected_name, record):
+        """
+        Record an accepted match with its provenance
+
+        Args:
+            session_id: Current session
+            detected_name: Name as detected
+            record: Persistent record (match result plus method, roster, session_id, learned)
+        """
+        with self.lock:
+            # Alias lookups read it from here until the batch is committed
+            self.pending_forgets.pop(detected_name, None)
+            self.pending_matches[detected_name] = {
+                'matched_name': record['matched_name'],
+                'roll': str(record['roll']),
+                'confidence': float(record['confidence']),
+                'status': 'matched',
+                'method': record.get('method'),
+                'roster': record.get('roster'),
+                'session_id': record.get('session_id') or session_id,
+                'learned': record.get('learned'),
+            }
+            self._queue(
+                "INSERT OR REPLACE INTO matches (session_id, detected_name, matched_name, roll, confidence, method, "
+                "roster, learned_session, learned, matched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (session_id, detected_name, record['matched_name'], str(record['roll']), float(record['confidence']),
+                 record.get('method'), record.get('roster'), record.get('session_id'), record.get('learned'),
+                 datetime.now().isoformat()))
+
+    def update_presence(self, session_id, present_names, when=None):
+        """
+        Open intervals for names that appeared and close them for names that left
+
+        Args:
+            session_id: Current session
+            present_names: Every name in the participant list right now
+            when: ISO timestamp (defaults to now)
+        """
+        when = when or datetime.now().isoformat()
+        with self.lock:
+            before = self.present.get(session_id, set())
+            now = set(present_names)
+            for name in now - before:
+                self._queue("INSERT INTO presence_intervals (session_id, detected_name, joined) VALUES (?, ?, ?)",
+                            (session_id, name, when))
+            for name in before - now:
+                self._queue("UPDATE presence_intervals SET left = ? "
+                            "WHERE session_id = ? AND detected_name = ? AND left IS NULL",
+                            (when, session_id, name))
+            self.present[session_id] = now
+
+    def forget_match(self, session_id, detected_name):
+        """Remove a session's accepted match for a detected name (earlier sessions' stay)"""
+        with self.lock:
+            self.pending_matches.pop(detected_name, None)
+            self.pending_forgets[detected_name] = session_id
+            self._queue("DELETE FROM matches WHERE session_id = ? AND detected_name = ?",
+                        (session_id, detected_name))
+
+    def clear_matches(self):
+        """Forget every accepted match (the alias history), keeping detections"""
+        with self.lock:
+            self.pending_matches = {}
+            self.pending_forgets = {}
+            self._queue("DELETE FROM matches", ())
+            self.flush()
+
+    # Queries
+    def find_alias(self, detected_name):
+        """
+        Most recent accepted match for this exact detected string, in any session
+
+        Matches still queued are newer than any committed row, so they are
+        answered without committing the batch (this runs for every name
+        matched).
+
+        Returns:
+            Persistent-record dict (with provenance), or None
+        """
+        with self.lock:
+            record = self.pending_matches.get(detected_name)
+            if record is not None:
+                return dict(record)
+            # A queued delete hides the committed row it removes
+            forgotten = self.pending_forgets.get(detected_name)
+            row = self.conn.execute(
+                "SELECT * FROM matches WHERE detected_name = ? AND session_id IS NOT ? "
+                "ORDER BY matched_at DESC LIMIT 1",
+                (detected_name, forgotten)).fetchone()
+        if row is None:
+            return None
+        return self._record(row)
+
+    @staticmethod
+    def _record(row):
+        """Persistent-record dict for a matches row"""
+        return {
+            'matched_name': row['matched_name'],
+            'roll': row['roll'],
+            'confidence': row['confidence'],
+            'status': 'matched',
+            'method': row['method'],
+            'roster': row['roster'],
+            'session_id': row['learned_session'] or row['session_id'],
+            'learned': row['learned'],
+        }
+
+    def session_records(self, session_id):
+        """
+        Every detected name of a session with its final result
+
+        The latest refresh-time result takes precedence over the accepted
+        match, as MatcherState.all_records takes matched_records over
+        persistent records; names only matched outside a refresh come from
+        their accepted match.
+
+        Returns:
+            {detected_name: record}
+        """
+        records = {}
+        for row in self._query("SELECT * FROM detections WHERE session_id = ?", (session_id,)):
+            records[row['detected_name']] = {
+                'matched_name': row['matched_name'],
+                'roll': row['roll'],
+                'confidence': row['confidence'],
+                'status': row['status'],
+            }
+        for row in self._query("SELECT * FROM matches WHERE session_id = ?", (session_id,)):
+            records.setdefault(row['detected_name'], self._record(row))
+        return records
+
+    def session_stats(self, session_id):
+        """Matching statistics for one session (same keys as RollMatcher.get_statistics)"""
+        rows = self._query(
+            "SELECT COUNT(*) AS total, COALESCE(SUM(status = 'matched'), 0) AS matched FROM ("
+            " SELECT detected_name, status FROM detections WHERE session_id = ?"
+            " UNION ALL"
+            " SELECT m.detected_name, 'matched' FROM matches m WHERE m.session_id = ? AND NOT EXISTS"
+            "  (SELECT 1 FROM detections d WHERE d.session_id = m.session_id AND d.detected_name = m.detected_name))",
+            (session_id, session_id))
+        total, matched = rows[0]['total'], rows[0]['matched']
+        return {
+            'total_detected': total,
+            'matched': matched,
+            'unknown': total - matched,
+            'match_rate': (matched / total * 100) if total > 0 else 0
+        }
+
+    def presence(self, session_id):
+        """[(detected_name, joined, left)] for a session, left is None while still present"""
+        rows = self._query("SELECT detected_name, joined, left FROM presence_intervals "
+                           "WHERE session_id = ? ORDER BY joined", (session_id,))
+        return [(row['detected_name'], row['joined'], row['left']) for row in rows]
+
+    def sessions_for_roll(self, roll):
+        """Session ids in which a roll number was matched, oldest first"""
+        rows = self._query("SELECT DISTINCT m.session_id FROM matches m JOIN sessions s USING (session_id) "
+                           "WHERE m.roll = ? ORDER BY s.started", (str(roll),))
+        return [row['session_id'] for row in rows]
+
+    # Migration
+    def import_legacy_json(self, path="attendance_persistence.json"):
+        """
+        Import records from the old JSON persistence file (once per store)
+
+        The snapshot's records, with its journal of later matches replayed
+        over them, become the matches of a session named after the
+        snapshot's session_id, so they keep working as aliases.
+
+        Returns:
+            Number of records imported (0 if already imported or no file)
+        """
+        journal = AttendanceJournal(path)
+        if (self._query("SELECT 1 FROM meta WHERE key = 'legacy_import'")
+                or not (os.path.exists(path) or os.path.exists(journal.journal_path))):
+            return 0
+
+        data = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        records = journal.load()
+        session_id = f"legacy_{data.get('session_id') or 'import'}"
+        self._queue("INSERT OR IGNORE INTO sessions (session_id, started, ended) VALUES (?, ?, ?)",
+                    (session_id, data.get('timestamp') or datetime.now().isoformat(), data.get('timestamp')))
+
+        count = 0
+        for name, record in records.items():
+            if record.get('status') == 'matched':
+                self.record_match(session_id, name, record)
+                count += 1
+        self._queue("INSERT INTO meta (key, value) VALUES ('legacy_import', ?)",
+                    (json.dumps({'path': os.path.abspath(path), 'records': count}),))
+        self.flush()
+        print(f"Imported {count} records from {path}")
+        return count
@@ -0,0 +1,200 @@
+"""
+Test script for the screen capture backends and the frame recorder.
+"""
+
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Every file the tests write goes under this folder, removed when they exit
+TEST_FOLDER = tempfile.mkdtemp(prefix="zoom_attendance_tests_")
+atexit.register(shutil.rmtree, TEST_FOLDER, ignore_errors=True)
+
+def temp_folder():
+    """Create a new empty folder for one test."""
+    return tempfile.mkdtemp(dir=TEST_FOLDER)
+
+def test_capture_backends():
+    """Check that the fastest working capture backend is selected, with fallback, and the benchmark result shape."""
+    print("\n" + "=" * 80)
+    print("CAPTURE BACKEND TEST")
+    print("=" * 80)
+    
+    import time
+    import numpy as np
+    import capture
+    
+    events = []
+    
+    class FakeBackend(capture.CaptureBackend):
+        delay = 0
+        available = True
+        @classmethod
+        def is_available(cls):
+            return cls.available
+        def open(self):
+            self.grabs = 0
+            events.append(("open", self.name))
+        def grab(self, region):
+            self.grabs += 1
+            time.sleep(self.delay)
+            return np.zeros((region['height'], region['width'], 4), dtype=np.uint8)
+        def close(self):
+            events.append(("close", self.name))
+    
+    class FastBackend(FakeBackend):
+        name = 'fast'
+    class SlowBackend(FakeBackend):
+        name = 'slow'
+        delay = 0.005
+    class BrokenBackend(FakeBackend):
+        name = 'broken'
+        def grab(self, region):
+            raise OSError("no display")
+    class MissingBackend(FakeBackend):
+        name = 'missing'
+        available = False
+    
+    # The benchmark grabs once untimed, then repeats times
+    backend = SlowBackend()
+    backend.open()
+    result = backend.benchmark({"top": 0, "left": 0, "width": 8, "height": 4}, repeats=4)
+    assert set(result) == {'backend', 'median_ms', 'best_ms'} and result['backend'] == 'slow'
+    assert backend.grabs == 5 and 0 < result['best_ms'] <= result['median_ms']
+    
+    original = capture.BACKENDS
+    try:
+        # The fastest backend is returned open; the others are closed and unavailable ones never opened
+        capture.BACKENDS = [SlowBackend, BrokenBackend, MissingBackend, FastBackend]
+        events.clear()
+        best = capture.select_backend(repeats=3)
+        assert best.name == 'fast' and ("close", 'fast') not in events
+        assert ("close", 'slow') in events and ("close", 'broken') in events
+        assert all(name != 'missing' for _, name in events)
+        
+        # A failing backend falls back to the next working one
+        capture.BACKENDS = [BrokenBackend, SlowBackend]
+        assert capture.select_backend(repeats=1).name == 'slow'
+        capture.BACKENDS = [BrokenBackend, MissingBackend]
+        try:
+            capture.select_backend(repeats=1)
+            assert False, "no working backend should raise RuntimeError"
+        except RuntimeError:
+            pass
+        
+        # Backends are opened by name
+        capture.BACKENDS = [FastBackend, MissingBackend]
+        events.clear()
+        assert capture.get_backend('fast').name == 'fast' and events == [("open", 'fast')]
+        for name in ('missing', 'nonexistent'):
+            try:
+                capture.get_backend(name)
+                assert False, f"backend '{name}' should raise ValueError"
+            except ValueError:
+                pass
+    finally:
+        capture.BACKENDS = original
+    
+    # The X11 backend grabs BGRA frames when there is a display to grab from
+    if not os.environ.get("DISPLAY") or not capture.X11Backend.is_available():
+        print("Skipping the X11 backend: $DISPLAY is not set")
+        return
+    backend = capture.get_backend('x11')
+    try:
+        frame = backend.grab({"top": 0, "left": 0, "width": 32, "height": 16})
+        assert frame.shape == (16, 32, 4) and frame.dtype == np.uint8
+        assert backend.benchmark({"top": 0, "left": 0, "width": 32, "height": 16}, repeats=2)['backend'] == 'x11'
+    finally:
+        backend.close()
+
+def test_x11_error_handler():
+    """Check that the X11 backend only ignores X errors around its own calls and restores the previous handler."""
+    print("\n" + "=" * 80)
+    print("X11 ERROR HANDLER TEST")
+    print("=" * 80)
+    
+    import capture
+    
+    class FakeXlib:
+        def __init__(self):
+            self.handler = 'tk'
+            self.calls = []
+        def XSetErrorHandler(self, handler):
+            previous, self.handler = self.handler, handler
+            self.calls.append(('handler', handler))
+            return previous
+        def XSync(self, display, discard):
+            self.calls.append(('sync', self.handler))
+    
+    backend = capture.X11Backend()
+    backend.xlib = FakeXlib()
+    
+    # Pending errors are flushed while still ignored, then the old handler is back
+    with backend._x_errors_ignored():
+        assert backend.xlib.handler is capture._ignore_x_errors
+    assert backend.xlib.handler == 'tk'
+    assert backend.xlib.calls == [('handler', capture._ignore_x_errors), ('sync', capture._ignore_x_errors),
+                                  ('handler', 'tk')]
+    
+    # Also restored when the block raises; reply requests skip the sync
+    backend.xlib.calls = []
+    try:
+        with backend._x_errors_ignored(sync=False):
+            raise RuntimeError("XGetImage failed")
+    except RuntimeError:
+        pass
+    assert backend.xlib.handler == 'tk' and [call[0] for call in backend.xlib.calls] == ['handler', 'handler']
+
+def test_frame_recorder():
+    """Check that the frame buffer stays within its frame and byte limits and that dumps round-trip."""
+    print("\n" + "=" * 80)
+    print("FRAME RECORDER TEST")
+    print("=" * 80)
+    
+    import json
+    import zipfile
+    import numpy as np
+    from frame_log import FrameRecorder
+    
+    rng = np.random.default_rng(0)
+    boxes = [(0, 0, 64, 32), (0, 32, 64, 64)]
+    readings = [{'lang': 'eng', 'candidates': ["Jahid", "Jahld", "", ""], 'text': "Jahid", 'name': "Jahid"},
+                None]
+    
+    # Oldest frames are dropped once capacity is reached
+    recorder = FrameRecorder(capacity=3, scale=1)
+    for _ in range(5):
+        recorder.record(rng.integers(0, 256, (64, 64, 3), dtype=np.uint8), boxes, readings)
+    assert len(recorder) == 3 and [entry['seq'] for entry in recorder.frames] == [3, 4, 5]
+    assert recorder.stored_bytes == sum(len(entry['data']) for entry in recorder.frames)
+    
+    # Noise barely compresses, so the byte budget holds fewer frames than the capacity
+    frame_bytes = len(recorder.frames[0]['data'])
+    recorder = FrameRecorder(capacity=10, scale=1, max_bytes=int(frame_bytes * 2.5))
+    for _ in range(6):
+        recorder.record(rng.integers(0, 256, (64, 64, 3), dtype=np.uint8), boxes, readings)
+    assert len(recorder) == 2 and recorder.stored_bytes <= recorder.max_bytes
+    assert recorder.stored_bytes == sum(len(entry['data']) for entry in recorder.frames)
+    
+    # The dump has one PNG and one manifest entry per buffered frame, with the match attached
+    recorder.record_matches({"Jahid": {'matched_name': "Jahid", 'roll': "1", 'confidence': 100, 'status': 'matched'}})
+    path = recorder.dump(os.path.join(temp_folder(), "frames.zip"))
+    with zipfile.ZipFile(path) as archive:
+        manifest = json.loads(archive.read('manifest.json'))
+        images = [name for name in archive.namelist() if name.endswith('.png')]
+        assert sorted(images) == sorted(frame['image'] for frame in manifest['frames'])
+    assert len(images) == len(manifest['frames']) == 2
+    assert [frame['seq'] for frame in manifest['frames']] == [5, 6]
+    newest = manifest['frames'][-1]
+    assert newest['rows'][0]['candidates'] == ["Jahid", "Jahld", "", ""] and newest['rows'][1]['name'] is None
+    assert newest['matches'] == {"Jahid": {'matched_name': "Jahid", 'roll': "1", 'confidence': 100, 'status': 'matched'}}
+    assert manifest['frames'][0]['matches'] == {}
+
+if __name__ == "__main__":
+    test_capture_backends()
+    test_x11_error_handler()
+    test_frame_recorder()
+    print("\nCapture tests completed!")
@@ -0,0 +1,149 @@
+"""
+Test script for the single- and multi-region trackers.
+"""
+
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from matcher import RollMatcher
+from store import AttendanceStore
+
+# Every file the tests write goes under this folder, removed when they exit
+TEST_FOLDER = tempfile.mkdtemp(prefix="zoom_attendance_tests_")
+atexit.register(shutil.rmtree, TEST_FOLDER, ignore_errors=True)
+
+def temp_folder():
+    """Create a new empty folder for one test."""
+    return tempfile.mkdtemp(dir=TEST_FOLDER)
+
+def new_matcher(**kwargs):
+    """Create a matcher whose persistent records start empty and stay out of the working directory."""
+    kwargs.setdefault('persistence_file', os.path.join(temp_folder(), "attendance_persistence.json"))
+    return RollMatcher(**kwargs)
+
+def create_test_database():
+    """Create a small roster for the tracker tests."""
+    return {"Jahid": "1", "Emon": "3", "Fahad Akash": "8", "Mehedi": "10", "Shihab": "11"}
+
+def test_multi_region_tracker():
+    """Check that each region gets its own callback and only changed rows are sent to OCR."""
+    print("\n" + "=" * 80)
+    print("MULTI-REGION TRACKER TEST")
+    print("=" * 80)
+    
+    import numpy as np
+    from concurrent.futures import ThreadPoolExecutor
+    from multi_tracker import MultiRegionTracker
+    
+    # Every row is a flat gray tile; its gray level says which name it shows
+    names = {10: "Jahid", 20: "Emon", 30: "Mehedi", 40: "Shihab"}
+    
+    def frame(levels):
+        return np.repeat(np.array(levels, dtype=np.uint8), 10)[:, None, None].repeat(40, axis=1).repeat(3, axis=2)
+    
+    class StubCapture:
+        def __init__(self):
+            self.frames = {}
+        def grab(self, region):
+            return self.frames[region['left']]
+    
+    class StubOCR:
+        def __init__(self):
+            self.read = []
+        def language_for(self, gray):
+            return 'eng'
+        def recognize(self, image, lang='eng', psm=7):
+            level = int(image[0, 0])
+            if level in names:
+                self.read.append(level)
+            return names.get(level, "")
+    
+    multi = MultiRegionTracker(ocr_workers=2)
+    multi.ocr = StubOCR()
+    events = {'a': [], 'b': []}
+    for region_id, left in (('a', 0), ('b', 100)):
+        region = {"top": 0, "left": left, "width": 40, "height": 20}
+        callback = lambda participants, event, changed, region_id=region_id: events[region_id].append((event, sorted(changed)))
+        multi.add_region(region_id, region, callback=callback, tile_height=10)
+    multi.capture = StubCapture()
+    multi.pool = ThreadPoolExecutor(max_workers=2)
+    
+    try:
+        multi.capture.frames = {0: frame([10, 20]), 100: frame([30])}
+        multi.process_round()
+        assert multi.last_ocr_rows == 3
+        assert events == {'a': [('joined', ["Emon", "Jahid"])], 'b': [('joined', ["Mehedi"])]}
+        
+        # Only the changed row of region 'a' goes to OCR; region 'b' reports nothing new
+        multi.ocr.read = []
+        multi.capture.frames = {0: frame([10, 40]), 100: frame([30])}
+        multi.process_round()
+        assert multi.last_ocr_rows == 1 and set(multi.ocr.read) == {40}
+        assert events['a'][1:] == [('joined', ["Shihab"]), ('left', ["Emon"])]
+        assert events['b'] == [('joined', ["Mehedi"])]
+        
+        data = multi.get_attendance_data()
+        assert sorted(data['a']['current']) == ["Jahid", "Shihab"] and data['b']['current'] == ["Mehedi"]
+    finally:
+        multi.pool.shutdown(wait=True)
+
+def test_warmup():
+    """Check that warmup returns its timings and leaves records, the match cache, the journal and the store alone."""
+    print("\n" + "=" * 80)
+    print("WARMUP TEST")
+    print("=" * 80)
+    
+    from tracker import ZoomTracker
+    
+    folder = temp_folder()
+    
+    def files_state(matcher):
+        paths = [matcher.persistence_file, matcher.persistence_file + ".journal"]
+        return {path: open(path, "rb").read() if os.path.exists(path) else None for path in paths}
+    
+    def store_state(store):
+        tables = ('sessions', 'detections', 'matches', 'presence_intervals', 'roster_snapshots')
+        store.flush()
+        return {table: store.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables}
+    
+    # Journal-backed matcher with a remembered match
+    matcher = new_matcher()
+    matcher.database = create_test_database()
+    matcher.match_batch(["Fahad Akas", "3. Emon"])
+    matcher.flush_persistent_records()
+    records, cache, files = dict(matcher.persistent_records), matcher.cache_stats(), files_state(matcher)
+    elapsed = matcher.warmup()
+    assert elapsed >= 0 and matcher.warmup_time == elapsed
+    assert dict(matcher.persistent_records) == records and matcher.cache_stats() == cache
+    matcher.flush_persistent_records()
+    assert files_state(matcher) == files
+    
+    # Store-backed matcher, warmed up through the tracker
+    store = AttendanceStore(os.path.join(folder, "attendance.db"))
+    matcher = RollMatcher(store=store)
+    matcher.database = create_test_database()
+    matcher.match_batch(["Fahad Akas", "John Smith"])
+    records, cache, rows = dict(matcher.persistent_records), matcher.cache_stats(), store_state(store)
+    
+    class StubOCR:
+        def warmup(self):
+            return 0.0
+        def is_available(self):
+            return False
+    tracker = ZoomTracker()
+    tracker.ocr = StubOCR()
+    timings = tracker.warmup(matcher)
+    assert set(timings) == {'ocr_ms', 'matcher_ms', 'dummy_frame_ms', 'total_ms'}
+    assert all(value >= 0 for value in timings.values()) and tracker.warmup_timings == timings
+    assert dict(matcher.persistent_records) == records and matcher.cache_stats() == cache
+    assert not store.pending and store_state(store) == rows
+    store.close()
+
+if __name__ == "__main__":
+    test_multi_region_tracker()
+    test_warmup()
+    print("\nTracker tests completed!")
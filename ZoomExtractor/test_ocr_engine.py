@@ -0,0 +1,113 @@
+"""
+Test script for the OCR engine: script detection, language routing and the Tesseract config.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+def test_script_routing():
+    """Check that Bengali tiles are detected and routed to 'ben', and that only English readings are OCR-cleaned."""
+    print("\n" + "=" * 80)
+    print("SCRIPT ROUTING TEST")
+    print("=" * 80)
+    
+    import shlex
+    import cv2
+    import numpy as np
+    from ocr_engine import OCREngine, detect_script
+    from tracker import ZoomTracker
+    
+    # Bengali letters hang from one continuous headline; Latin text has no such row
+    bengali = np.full((40, 200), 255, dtype=np.uint8)
+    bengali[10:13, 20:180] = 0
+    for x in range(24, 176, 16):
+        bengali[10:30, x:x + 3] = 0
+        cv2.circle(bengali, (x + 8, 24), 4, 0, 2)
+    latin = np.full((40, 200), 255, dtype=np.uint8)
+    cv2.putText(latin, "Jahid Hasan", (5, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+    assert detect_script(bengali) == 'bengali'
+    assert detect_script(latin) == 'latin'
+    assert detect_script(np.full((40, 200), 255, dtype=np.uint8)) == 'latin'
+    
+    # Without the 'ben' model installed, Bengali tiles fall back to 'eng'
+    engine = OCREngine()
+    engine.available_languages = {'eng'}
+    assert engine.language_for(bengali) == 'eng' and engine.language_for(latin) == 'eng'
+    engine.available_languages = {'eng', 'ben'}
+    assert engine.language_for(bengali) == 'ben' and engine.language_for(latin) == 'eng'
+    
+    # The whitelisted space survives pytesseract's config splitting
+    if os.name != 'nt':
+        assert shlex.split(engine._config('eng', 7))[-1].endswith("()- ")
+    
+    # The OCR correction table is only applied to English readings
+    class StubOCR:
+        lang = 'eng'
+        def language_for(self, gray):
+            return self.lang
+        def recognize(self, image, lang='eng', psm=7):
+            return {'eng': "Jahid (Hasan.", 'ben': "জাহিদ (হাসান."}[lang]
+    
+    tracker = ZoomTracker()
+    tracker.ocr = StubOCR()
+    tile = np.full((40, 200, 3), 255, dtype=np.uint8)
+    reading = tracker.read_tile(tile)
+    assert reading['lang'] == 'eng' and reading['name'] == "Jahid (Host)Hasan"
+    tracker.ocr.lang = 'ben'
+    reading = tracker.read_tile(tile)
+    assert reading['lang'] == 'ben' and reading['name'] == "জাহিদ (হাসান."
+
+def test_engine_close():
+    """Check that close() ends idle Tesseract instances and that one still in use is ended on check-in, never pooled."""
+    print("\n" + "=" * 80)
+    print("OCR ENGINE CLOSE TEST")
+    print("=" * 80)
+    
+    import numpy as np
+    import ocr_engine
+    
+    class FakeAPI:
+        created = []
+        def __init__(self, lang, psm):
+            self.ended = False
+            FakeAPI.created.append(self)
+        def SetVariable(self, name, value):
+            pass
+        def SetImage(self, image):
+            assert not self.ended, "an ended API was reused"
+        def GetUTF8Text(self):
+            return "Jahid"
+        def End(self):
+            self.ended = True
+    
+    original = ocr_engine.TESSEROCR_AVAILABLE, getattr(ocr_engine, 'PyTessBaseAPI', None)
+    ocr_engine.TESSEROCR_AVAILABLE, ocr_engine.PyTessBaseAPI = True, FakeAPI
+    try:
+        engine = ocr_engine.OCREngine()
+        tile = np.full((20, 60), 255, dtype=np.uint8)
+        busy = engine._checkout('eng', 7)
+        assert engine.recognize(tile) == "Jahid" and len(FakeAPI.created) == 2
+        
+        # close() ends the idle API; the one checked out before is ended when it comes back, not pooled
+        idle = FakeAPI.created[1]
+        engine.close()
+        assert engine.closed and idle.ended and not busy.ended
+        engine._checkin('eng', 7, busy)
+        assert busy.ended and engine._free == {}
+        
+        # A closed engine refuses new work
+        try:
+            engine.recognize(tile)
+            assert False, "a closed engine should raise RuntimeError"
+        except RuntimeError:
+            pass
+    finally:
+        ocr_engine.TESSEROCR_AVAILABLE, ocr_engine.PyTessBaseAPI = original
+        if original[1] is None:
+            del ocr_engine.PyTessBaseAPI
+
+if __name__ == "__main__":
+    test_script_routing()
+    test_engine_close()
+    print("\nOCR engine tests completed!")
@@ -5,29 +5,44 @@ Handles screen capture, OCR, and participant detection
 
 import cv2
 import numpy as np
-from mss import mss
 import pytesseract
-import pygetwindow as gw
-from pynput import mouse
 from datetime import datetime
 import threading
 import time
-import os
+import hashlib
+from normalizer import default_normalizer
+from ocr_engine import OCREngine, configure_tesseract
+from capture import X11Backend, get_backend, select_backend
 
-# Configure pytesseract to use the Tesseract executable directly
+# pygetwindow only supports Windows and macOS (it raises NotImplementedError
+# on import under Linux), so window lookup falls back to Xlib there
+try:
+    import pygetwindow as gw
+except (ImportError, NotImplementedError):
+    gw = None
+
+# pynput needs a display at import time; it's only used for manual selection
 try:
-    pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-except:
-    pass  # If this fails, pytesseract will try to find tesseract in PATH
+    from pynput import mouse
+except Exception:
+    mouse = None
+
+# Configure pytesseract to use the Tesseract executable directly
+# (the default install folder on Windows, PATH everywhere else)
+configure_tesseract()
 
 
 class ZoomTracker:
-    def __init__(self, callback=None):
+    def __init__(self, callback=None, capture_backend=None, recorder=None):
         """
         Initialize tracker
         
         Args:
             callback: Function to call with updates (participants_list, event_type)
+            capture_backend: Capture backend name ('mss', 'x11'), or None to
+                benchmark the available backends and use the fastest
+            recorder: Optional FrameRecorder that keeps recent frames and OCR
+                decisions for post-mortem dumps
         """
         self.tile_height = 70
         self.running = False
@@ -38,7 +53,15 @@ class ZoomTracker:
         self.callback = callback
         self.lock = threading.Lock()
         self.capture_thread = None
-        self.sct = None
+        self.capture_backend = capture_backend
+        self.capture = None
+        self.ocr = OCREngine(languages=('eng', 'ben'))
+        self.normalizer = default_normalizer()
+        self.row_cache = {}  # {row_index: (tile_digest, reading)} - skips OCR for unchanged rows
+        self.last_readings = []  # read_tile() result for every row of the last frame
+        self.recorder = recorder
+        self.warmup_timings = None
+        self._warmup_thread = None
         
     def find_zoom_window(self):
         """Auto-detect Zoom window"""
@@ -54,6 +77,9 @@ class ZoomTracker:
             # Try different patterns to find Zoom window
             zoom_patterns = ["zoom", "Zoom", "ZOOM", "zoom meeting", "zoom webinar"]
             
+            if gw is None:
+                return self._find_zoom_window_x11(zoom_patterns)
+            
             for w in gw.getAllTitles():
                 # Check if window title contains any zoom pattern
                 if any(pattern in w.lower() for pattern in zoom_patterns) and w.strip():
@@ -103,9 +129,50 @@ class ZoomTracker:
         print("Zoom window NOT found.")
         return None
     
+    def _list_x11_windows(self):
+        """List (title, region) for visible X11 windows"""
+        # Reuse the capture thread's display connection when we're on it
+        if isinstance(self.capture, X11Backend) and threading.current_thread() is self.capture_thread:
+            return self.capture.list_windows()
+        
+        if not X11Backend.is_available():
+            return []
+        backend = X11Backend()
+        try:
+            backend.open()
+            return backend.list_windows()
+        finally:
+            backend.close()
+    
+    def _find_zoom_window_x11(self, zoom_patterns):
+        """Auto-detect Zoom window through Xlib (Linux, including Xvfb)"""
+        windows = self._list_x11_windows()
+        
+        for title, region in windows:
+            if any(pattern in title.lower() for pattern in zoom_patterns) and title.strip():
+                print(f"Found Zoom window: {title}")
+                self._last_window_title = title
+                return region
+        
+        print("Trying alternative detection methods...")
+        for title, region in windows:
+            if title.strip() and region['width'] > 800 and region['height'] > 600:
+                print(f"Found potential window: {title} ({region['width']}x{region['height']})")
+                self._last_window_title = title
+                return region
+        
+        print("Zoom window NOT found.")
+        return None
+    
     def find_zoom_window_by_title(self, title):
         """Find Zoom window by specific title for dynamic tracking"""
         try:
+            if title.strip() and gw is None:
+                for window_title, region in self._list_x11_windows():
+                    if window_title == title:
+                        return region
+                return None
+            
             if title.strip():
                 windows = gw.getWindowsWithTitle(title)
                 if windows:
@@ -129,6 +196,10 @@ class ZoomTracker:
         selection_start = None
         selection_end = None
         
+        if mouse is None:
+            print("Manual selection needs pynput and a desktop session; use set_region() instead.")
+            return None
+        
         # Try to show a simple visual indicator using console output
         print("Visual feedback: Click and drag to select region...")
         print("(A visual selection box will appear on screen during dragging)")
@@ -177,6 +248,7 @@ class ZoomTracker:
         """Update tile height"""
         with self.lock:
             self.tile_height = max(10, height)
+            self.row_cache = {}
 
     def crop_tiles(self, img):
         """Crop image into participant tiles"""
@@ -198,99 +270,149 @@ class ZoomTracker:
             
         return tiles
 
+    def tile_boxes(self, img):
+        """(x1, y1, x2, y2) for every tile crop_tiles() produces from img"""
+        h, w = img.shape[:2]
+        th = max(10, self.tile_height)
+        return [(0, i * th, w, (i + 1) * th) for i in range(h // th)]
+
     def extract_names(self, tiles):
         """Extract names from tiles using OCR"""
         names = []
         
-        # Check if Tesseract is available
-        try:
-            pytesseract.get_tesseract_version()
-        except pytesseract.TesseractNotFoundError:
-            # Try to set the path directly
-            try:
-                pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-                pytesseract.get_tesseract_version()  # Test if this works
-                print("Tesseract found at default location and configured.")
-            except Exception:
-                print("ERROR: Tesseract OCR is not installed or not in PATH.")
-                print("Please install Tesseract OCR and make sure it's in your system PATH.")
-                print("Download from: https://github.com/UB-Mannheim/tesseract/wiki")
-                return names  # Return empty list if Tesseract is not available
-        except Exception as e:
-            print(f"Error checking Tesseract: {e}")
-            return names
+        # Check if Tesseract is available (only checked once per engine)
+        if not self.ocr.is_available():
+            print("ERROR: Tesseract OCR is not installed or not in PATH.")
+            print("Please install Tesseract OCR and make sure it's in your system PATH.")
+            print("Download from: https://github.com/UB-Mannheim/tesseract/wiki")
+            return names  # Return empty list if Tesseract is not available
         
-        for tile in tiles:
+        cached, changed = self.split_changed_rows(tiles)
+        results = {}
+        for row, digest, tile in changed:
             try:
-                # Convert to grayscale
-                gray = cv2.cvtColor(tile, cv2.COLOR_BGR2GRAY)
-                
-                # Try multiple preprocessing techniques to improve OCR
-                # Technique 1: Simple threshold
-                _, thresh1 = cv2.threshold(gray, 140, 255, cv2.THRESH_BINARY)
-                text1 = pytesseract.image_to_string(thresh1, config="--psm 7 -c tessedit_char_whitelist=abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789()- ").strip()
-                
-                # Technique 2: Adaptive threshold
-                thresh2 = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-                text2 = pytesseract.image_to_string(thresh2, config="--psm 7 -c tessedit_char_whitelist=abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789()- ").strip()
-                
-                # Technique 3: No preprocessing
-                text3 = pytesseract.image_to_string(gray, config="--psm 7 -c tessedit_char_whitelist=abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789()- ").strip()
-                
-                # Technique 4: Try with different PSM mode for single line text
-                text4 = pytesseract.image_to_string(gray, config="--psm 8 -c tessedit_char_whitelist=abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789()- ").strip()
-                
-                # Use the best result (longest valid name)
-                candidates = [text1, text2, text3, text4]
-                best_text = ""
-                for text in candidates:
-                    # Filter for valid names (avoid empty or whitespace-only)
-                    if text and not text.isspace() and len(text) > len(best_text):
-                        # Additional validation - check if it looks like a name
-                        if any(c.isalpha() for c in text):  # Must contain at least one letter
-                            best_text = text
-                
-                # Filter valid names
-                if 1 < len(best_text) < 50 and not best_text.isspace():
-                    # Clean up the text
-                    cleaned_text = ' '.join(best_text.split())  # Remove extra whitespace
-                    if cleaned_text:  # Only add non-empty names
-                        # Apply some common corrections for better accuracy
-                        corrected_text = self.correct_common_ocr_errors(cleaned_text)
-                        names.append(corrected_text)
-                        print(f"Detected name: '{cleaned_text}' -> Corrected to: '{corrected_text}'")  # Debug output
+                results[row] = (digest, self.read_tile(tile))
             except Exception as e:
                 print(f"OCR error: {e}")
-                
-        return names
+        
+        return self.merge_rows(len(tiles), cached, results)
+    
+    def split_changed_rows(self, tiles):
+        """
+        Separate rows whose pixels are unchanged since the last frame
+        
+        Returns:
+            (cached, changed) where cached is {row: reading} for unchanged rows
+            and changed is a list of (row, digest, tile) that need OCR
+        """
+        cached = {}
+        changed = []
+        for row, tile in enumerate(tiles):
+            digest = hashlib.blake2b(np.ascontiguousarray(tile).data, digest_size=16).digest()
+            entry = self.row_cache.get(row)
+            if entry and entry[0] == digest:
+                cached[row] = entry[1]
+            else:
+                changed.append((row, digest, tile))
+        return cached, changed
+    
+    def merge_rows(self, num_rows, cached, results):
+        """
+        Combine cached and freshly OCR'd rows into the frame's name list
+        
+        Args:
+            num_rows: Number of tiles in the frame
+            cached: {row: reading} from split_changed_rows()
+            results: {row: (digest, reading)} for the rows that were OCR'd
+        
+        Returns:
+            Names in row order
+        """
+        row_cache = {row: entry for row, entry in self.row_cache.items() if row < num_rows}
+        row_cache.update(results)
+        self.row_cache = row_cache
+        
+        readings = []
+        for row in range(num_rows):
+            reading = cached[row] if row in cached else results.get(row, (None, None))[1]
+            readings.append(reading)
+        self.last_readings = readings
+        return [reading['name'] for reading in readings if reading and reading['name']]
+    
+    def extract_name(self, tile):
+        """
+        OCR a single participant tile
+        
+        Returns:
+            Cleaned name or None
+        """
+        return self.read_tile(tile)['name']
+    
+    def read_tile(self, tile):
+        """
+        OCR a single participant tile and keep every intermediate result
+        
+        The tile's script is detected first so that Bengali display names are
+        read with the 'ben' model and its whitelist instead of being mangled
+        by the English one.
+        
+        Returns:
+            dict with 'lang', 'candidates' (one per preprocessing technique),
+            'text' (chosen candidate) and 'name' (cleaned name or None)
+        """
+        # Convert to grayscale
+        gray = cv2.cvtColor(tile, cv2.COLOR_BGR2GRAY)
+        lang = self.ocr.language_for(gray)
+        
+        # Try multiple preprocessing techniques to improve OCR
+        # Technique 1: Simple threshold
+        _, thresh1 = cv2.threshold(gray, 140, 255, cv2.THRESH_BINARY)
+        text1 = self.ocr.recognize(thresh1, lang=lang, psm=7)
+        
+        # Technique 2: Adaptive threshold
+        thresh2 = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+        text2 = self.ocr.recognize(thresh2, lang=lang, psm=7)
+        
+        # Technique 3: No preprocessing
+        text3 = self.ocr.recognize(gray, lang=lang, psm=7)
+        
+        # Technique 4: Try with different PSM mode for single line text
+        text4 = self.ocr.recognize(gray, lang=lang, psm=8)
+        
+        # Use the best result (longest valid name)
+        candidates = [text1, text2, text3, text4]
+        best_text = ""
+        for text in candidates:
+            # Filter for valid names (avoid empty or whitespace-only)
+            if text and not text.isspace() and len(text) > len(best_text):
+                # Additional validation - check if it looks like a name
+                if any(c.isalpha() for c in text):  # Must contain at least one letter
+                    best_text = text
+        
+        reading = {'lang': lang, 'candidates': candidates, 'text': best_text, 'name': None}
+        
+        # Filter valid names
+        if 1 < len(best_text) < 50 and not best_text.isspace():
+            # Clean up the text
+            cleaned_text = ' '.join(best_text.split())  # Remove extra whitespace
+            if cleaned_text:  # Only add non-empty names
+                # The correction table only knows Latin-script OCR mistakes
+                if lang == 'eng':
+                    corrected_text = self.correct_common_ocr_errors(cleaned_text)
+                else:
+                    corrected_text = cleaned_text
+                print(f"Detected name ({lang}): '{cleaned_text}' -> Corrected to: '{corrected_text}'")  # Debug output
+                reading['name'] = corrected_text
+        return reading
     
     def correct_common_ocr_errors(self, text):
-        """Correct common OCR errors in names"""
-        # Common OCR corrections
-        corrections = {
-            'Farhad': 'Fahad',
-            'Akas': 'Akash',
-            'Fahad Akas': 'Fahad Akash',
-            'Fahad Akash (': 'Fahad Akash',
-            'Fahad Akash (Hose': 'Fahad Akash (Host)',
-            'Fahad Akash (Me': 'Fahad Akash (Me)',
-            'Fahad Akash (Host': 'Fahad Akash (Host)',
-            'Fahad Akash Me': 'Fahad Akash (Me)',
-        }
-        
-        # Apply corrections
-        for wrong, correct in corrections.items():
-            if wrong in text:
-                text = text.replace(wrong, correct)
-        
-        # Remove trailing punctuation that might be OCR artifacts
-        text = text.rstrip('.,:;')
-        
-        # Ensure proper formatting for Zoom participant names
-        if '(' in text and ')' not in text:
-            text = text.replace('(', '(Me)') if 'me' in text.lower() else text.replace('(', '(Host)')
-        
-        return text.strip()
+        """
+        Correct common OCR errors in names
+        
+        Misspelled names are left alone; the matcher's phonetic index maps
+        spelling variants to roster names.
+        """
+        return self.normalizer.clean_ocr(text)
 
     def update_participants(self, detected_names):
         """Update participant list and detect changes"""
@@ -335,18 +457,16 @@ class ZoomTracker:
 
     def capture_loop(self):
         """Main capture loop (runs in thread)"""
-        self.sct = mss()
-        
         # Check if Tesseract is available before starting capture loop
         try:
             pytesseract.get_tesseract_version()
             print("Tesseract OCR is available and ready.")
         except pytesseract.TesseractNotFoundError:
-            # Try to set the path directly
+            # Look it up again in case it was installed after startup
             try:
-                pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+                cmd = configure_tesseract()
                 pytesseract.get_tesseract_version()  # Test if this works
-                print("Tesseract found at default location and configured.")
+                print(f"Tesseract found at '{cmd}' and configured.")
             except Exception:
                 print("ERROR: Tesseract OCR is not installed or not in PATH.")
                 print("Please install Tesseract OCR and make sure it's in your system PATH.")
@@ -357,6 +477,22 @@ class ZoomTracker:
             print(f"Error checking Tesseract: {e}")
             return
         
+        # Finish (or run) warmup first so the first frame runs at steady-state speed
+        if self._warmup_thread:
+            self._warmup_thread.join()
+        elif self.warmup_timings is None:
+            self.warmup()
+        
+        # Capture handles are per-thread, so the backend is chosen and opened here
+        try:
+            if self.capture_backend:
+                self.capture = get_backend(self.capture_backend)
+            else:
+                self.capture = select_backend(self.region)
+        except Exception as e:
+            print(f"ERROR: Could not open a screen capture backend: {e}")
+            return
+        
         capture_count = 0
         
         while self.running:
@@ -392,7 +528,7 @@ class ZoomTracker:
                 capture_count += 1
                 print(f"Capture #{capture_count} started")
                 
-                screenshot = np.array(self.sct.grab(self.region))
+                screenshot = self.capture.grab(self.region)
                 print(f"Screenshot captured: {screenshot.shape}")
                 
                 tiles = self.crop_tiles(screenshot)
@@ -403,6 +539,9 @@ class ZoomTracker:
                 
                 self.update_participants(names)
                 
+                if self.recorder is not None:
+                    self.recorder.record(screenshot, self.tile_boxes(screenshot), self.last_readings)
+                
                 print(f"Capture #{capture_count} completed\n")
                 time.sleep(0.5)  # Adjust capture frequency
                 
@@ -411,11 +550,64 @@ class ZoomTracker:
                 import traceback
                 traceback.print_exc()
                 time.sleep(1)
+        
+        self.capture.close()
+        self.capture = None
+
+    def warmup(self, matcher=None):
+        """
+        Pay the one-off startup costs before the first real frame
+        
+        Loads the OCR engine and every language model, optionally builds the
+        matcher's lookup structures, and runs a dummy frame through the tile
+        pipeline (script detection, thresholding, OCR).
+        
+        Args:
+            matcher: Optional RollMatcher to warm up as well
+        
+        Returns:
+            dict of timings in milliseconds
+        """
+        start = time.perf_counter()
+        timings = {'ocr_ms': self.ocr.warmup() * 1000}
+        
+        if matcher is not None:
+            timings['matcher_ms'] = matcher.warmup() * 1000
+        
+        frame_start = time.perf_counter()
+        th = max(10, self.tile_height)
+        frame = np.full((th, 320, 4), 255, dtype=np.uint8)
+        cv2.putText(frame, "Warmup", (10, th * 2 // 3), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0, 255), 2)
+        if self.ocr.is_available():
+            try:
+                self.read_tile(frame)
+            except Exception as e:
+                print(f"Warmup frame failed: {e}")
+        timings['dummy_frame_ms'] = (time.perf_counter() - frame_start) * 1000
+        timings['total_ms'] = (time.perf_counter() - start) * 1000
+        
+        self.warmup_timings = timings
+        print(f"Tracker warmup finished in {timings['total_ms']:.0f} ms "
+              f"(OCR {timings['ocr_ms']:.0f} ms, dummy frame {timings['dummy_frame_ms']:.0f} ms)")
+        return timings
+    
+    def start_warmup(self, matcher=None):
+        """
+        Run warmup() in a background thread, e.g. while the user is still on
+        the setup tab. capture_loop() waits for it before the first frame.
+        """
+        self._warmup_thread = threading.Thread(target=self.warmup, args=(matcher,), daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
 
     def start(self):
         """Start tracking"""
         if not self.region:
             raise ValueError("Region not set. Call find_zoom_window() or get_manual_region() first.")
+        
+        # stop() closed the engine; a restarted tracker loads a new one
+        if self.ocr.closed:
+            self.ocr = OCREngine(languages=self.ocr.languages)
             
         self.running = True
         self.capture_thread = threading.Thread(target=self.capture_loop, daemon=True)
@@ -425,8 +617,10 @@ class ZoomTracker:
     def stop(self):
         """Stop tracking"""
         self.running = False
+        # The engine can only be closed once the capture thread is out of recognize()
         if self.capture_thread:
-            self.capture_thread.join(timeout=2)
+            self.capture_thread.join()
+        self.ocr.close()
         print("Tracker stopped")
 
     def pause(self):
@@ -441,4 +635,5 @@ class ZoomTracker:
         """Reset all data"""
         with self.lock:
             self.current_participants = set()
-            self.participants_history = {}
\ No newline at end of file
+            self.participants_history = {}
+            self.row_cache = {}
\ No newline at end of file
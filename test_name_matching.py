@@ -2,13 +2,34 @@
 """
 Comprehensive test script for the Zoom Attendance System name matching functionality.
 Tests various name variations and edge cases to verify matching accuracy.
+
+Run with --benchmark to measure speed and accuracy on generated rosters
+instead (see ZoomExtractor/bench_matcher.py for the options), e.g.
+    python test_name_matching.py --benchmark --sizes 50,5000 --output results.json
 """
 
 import sys
 import os
+import atexit
+import shutil
+import tempfile
 sys.path.append(os.path.join(os.path.dirname(__file__), 'ZoomExtractor'))
 
 from ZoomExtractor.matcher import RollMatcher
+from ZoomExtractor.store import AttendanceStore
+
+# Every file the tests write goes under this folder, removed when they exit
+TEST_FOLDER = tempfile.mkdtemp(prefix="zoom_attendance_tests_")
+atexit.register(shutil.rmtree, TEST_FOLDER, ignore_errors=True)
+
+def temp_folder():
+    """Create a new empty folder for one test."""
+    return tempfile.mkdtemp(dir=TEST_FOLDER)
+
+def new_matcher(**kwargs):
+    """Create a matcher whose persistent records start empty and stay out of the working directory."""
+    kwargs.setdefault('persistence_file', os.path.join(temp_folder(), "attendance_persistence.json"))
+    return RollMatcher(**kwargs)
 
 def create_test_database():
     """Create a test database with sample student data."""
@@ -54,7 +75,7 @@ def run_comprehensive_tests():
     print("=" * 80)
     
     # Initialize the matcher
-    matcher = RollMatcher()
+    matcher = new_matcher()
     matcher.database = create_test_database()
     
     # Test cases with expected matches
@@ -156,7 +177,7 @@ def test_edge_cases():
     print("EDGE CASE TESTING")
     print("=" * 80)
     
-    matcher = RollMatcher()
+    matcher = new_matcher()
     matcher.database = create_test_database()
     
     # Test empty and invalid inputs
@@ -186,7 +207,959 @@ def test_edge_cases():
         except Exception as e:
             print(f"{str(input_value):<20} {description:<25} ERROR ({str(e)})")
 
+def test_batch_matching():
+    """Check that match_batch gives the same results as matching one name at a time."""
+    print("\n" + "=" * 80)
+    print("BATCH MATCHING TEST")
+    print("=" * 80)
+    
+    matcher = new_matcher()
+    matcher.database = create_test_database()
+    
+    names = ["Fahad Akash", "fahad akash", "Fahad Akas", "Akash", "3. Emon", "Emon 3",
+             "Participants (3)", "| GBR Mehedi ED", "Sahil (Host, me)", "Jim", "John Smith",
+             "Umme-Hani-Bithe", "Farhad Akash", "", "Fahad Akash"]
+    
+    single = {name: matcher.match_name(name) for name in names}
+    batch = matcher.match_batch(names)
+    
+    mismatches = [name for name in single if single[name] != batch.get(name)]
+    for name in mismatches:
+        print(f"  MISMATCH '{name}': single={single[name]} batch={batch.get(name)}")
+    print(f"Batch Results: {len(single) - len(mismatches)} identical, {len(mismatches)} different")
+    
+    assert not mismatches
+    assert list(batch) == list(single)
+
+def test_match_cache():
+    """Check that repeated names are served from the cache and that changes invalidate it."""
+    print("\n" + "=" * 80)
+    print("MATCH CACHE TEST")
+    print("=" * 80)
+    
+    matcher = new_matcher()
+    matcher.database = create_test_database()
+    
+    names = ["Fahad Akas", "Emon", "Akash", "John Smith"]
+    for _ in range(10):
+        matcher.match_batch(names)
+    stats = matcher.cache_stats()
+    print(f"After 10 refreshes: {stats['hits']} hits, {stats['misses']} misses")
+    assert stats['misses'] == len(names)
+    assert stats['hits'] == 9 * len(names)
+    
+    # Changing the threshold must not return the cached result
+    matcher.threshold = 70
+    assert matcher.match_name("Akash")['status'] == 'unknown'
+    matcher.threshold = 60
+    assert matcher.match_name("Akash")['status'] == 'matched'
+    
+    # Reloading the roster must not return the cached roll number
+    database = create_test_database()
+    database["Emon"] = "99"
+    matcher.database = database
+    assert matcher.match_name("Emon")['roll'] == "99"
+
+def test_alias_index():
+    """Check that a name matched in an earlier session is reused without fuzzy scoring."""
+    print("\n" + "=" * 80)
+    print("ALIAS INDEX TEST")
+    print("=" * 80)
+    
+    persistence_file = os.path.join(temp_folder(), "attendance_persistence.json")
+    
+    first = RollMatcher(persistence_file=persistence_file)
+    first.database = create_test_database()
+    learned = first.match_name("Fahad Akas")
+    
+    second = RollMatcher(persistence_file=persistence_file)
+    second.load_persistent_records()
+    second.database = create_test_database()
+    
+    def no_scoring(*args, **kwargs):
+        raise AssertionError("alias hit should not be scored")
+    second.index.best_match = no_scoring
+    second.index.best_matches = no_scoring
+    
+    assert second.match_name("Fahad Akas") == learned
+    assert second.match_batch(["Fahad Akas"])["Fahad Akas"] == learned
+    record = second.persistent_records["Fahad Akas"]
+    print(f"Alias 'Fahad Akas' -> {record['matched_name']} ({record['method']}, session {record['session_id']})")
+    assert record['method'] == 'phonetic'
+    assert record['session_id'] == first.session_id
+    
+    # An alias for a student whose roll changed is not trusted
+    database = create_test_database()
+    database["Fahad Akash"] = "99"
+    first.database = database
+    assert first.match_name("Fahad Akas")['roll'] == "99"
+
+def test_persistence_journal():
+    """Check that matches are journaled, survive a torn last line and compact into the snapshot."""
+    print("\n" + "=" * 80)
+    print("PERSISTENCE JOURNAL TEST")
+    print("=" * 80)
+    
+    persistence_file = os.path.join(temp_folder(), "attendance_persistence.json")
+    
+    matcher = RollMatcher(persistence_file=persistence_file)
+    matcher.database = create_test_database()
+    matcher.match_batch(["Fahad Akas", "Emon", "3. Emon", "John Smith"])
+    matcher.flush_persistent_records()
+    assert not os.path.exists(persistence_file)
+    
+    # Simulate a crash in the middle of an append
+    with open(matcher.journal.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"op": "put", "name": "Jah')
+    
+    reloaded = RollMatcher(persistence_file=persistence_file)
+    reloaded.load_persistent_records()
+    print(f"Replayed {len(reloaded.persistent_records)} records from the journal")
+    assert reloaded.persistent_records == matcher.persistent_records
+    
+    reloaded.save_persistent_records()
+    assert os.path.exists(persistence_file)
+    assert not os.path.exists(reloaded.journal.journal_path)
+    
+    compacted = RollMatcher(persistence_file=persistence_file)
+    compacted.load_persistent_records()
+    assert compacted.persistent_records == matcher.persistent_records
+    
+    # Records appended just after a sync are fsynced by the periodic flush_due(), not only on the next append
+    compacted.database = create_test_database()
+    journal = compacted._get_journal()
+    journal.sync_interval = 60
+    journal.sync()
+    compacted.match_name("Mehdi")
+    pending = journal.unsynced
+    assert pending > 0
+    compacted.flush_due()
+    assert journal.unsynced == pending
+    journal.last_sync -= journal.sync_interval
+    compacted.flush_due()
+    assert journal.unsynced == 0
+
+def test_attendance_store():
+    """Check that a store-backed matcher keeps per-session numbers and reuses earlier sessions' matches."""
+    print("\n" + "=" * 80)
+    print("ATTENDANCE STORE TEST")
+    print("=" * 80)
+    
+    store = AttendanceStore(os.path.join(temp_folder(), "attendance.db"))
+    
+    first = RollMatcher(store=store)
+    first.database = create_test_database()
+    first.match_batch(["Fahad Akas", "FARIA", "John Smith"])
+    store.update_presence(first.session_id, ["Fahad Akas", "FARIA", "John Smith"])
+    store.update_presence(first.session_id, ["FARIA"])
+    stats = first.get_statistics()
+    print(f"Session 1: {stats['matched']} matched, {stats['unknown']} unknown")
+    assert (stats['total_detected'], stats['matched']) == (3, 2)
+    
+    left = {name: end for name, start, end in store.presence(first.session_id)}
+    assert left["Fahad Akas"] is not None and left["FARIA"] is None
+    
+    # Stopping tracking ends the session; the next meeting starts a new one
+    store.end_session(first.session_id)
+    ended = store.conn.execute("SELECT ended FROM sessions WHERE session_id = ?", (first.session_id,)).fetchone()[0]
+    first_session = first.session_id
+    first.new_session()
+    assert first.session_id != first_session
+    assert store.conn.execute("SELECT ended FROM sessions WHERE session_id = ?", (first_session,)).fetchone()[0] == ended
+    first.match_batch(["Fahad Akas"])
+    stats = first.get_statistics()
+    print(f"Session 2: {stats['matched']} matched, {stats['unknown']} unknown")
+    assert (stats['total_detected'], stats['matched']) == (1, 1)
+    assert first.persistent_records["Fahad Akas"]['method'] == 'phonetic'
+    assert len(store.sessions_for_roll("8")) == 2
+    store.close()
+    
+    # Matching a snapshot commits nothing until the batch is due; aliases come from the queue
+    store = AttendanceStore(os.path.join(temp_folder(), "attendance.db"), flush_interval=3600)
+    matcher = RollMatcher(store=store)
+    matcher.database = create_test_database()
+    flushes = []
+    flush = store.flush
+    def counting_flush():
+        flushes.append(len(store.pending))
+        flush()
+    store.flush = counting_flush
+    matcher.match_batch(["Fahad Akas", "FARIA", "John Smith", "3. Emon", "Mehedi Hasan"])
+    matcher.clear_cache()
+    matcher.match_batch(["Fahad Akas", "FARIA", "John Smith", "3. Emon", "Mehedi Hasan"])
+    print(f"Queued {len(store.pending)} writes, {len(flushes)} commits")
+    assert flushes == [] and store.pending
+    assert store.find_alias("3. Emon")['matched_name'] == "Emon"
+    store.flush_due()
+    assert flushes == []
+    store.flush_interval = 0
+    store.flush_due()
+    assert len(flushes) == 1 and not store.pending and not store.pending_matches
+    assert store.find_alias("3. Emon")['matched_name'] == "Emon"
+    store.close()
+    
+    # The legacy import includes matches only in the JSON journal
+    folder = temp_folder()
+    legacy = RollMatcher(persistence_file=os.path.join(folder, "attendance_persistence.json"))
+    legacy.database = create_test_database()
+    legacy.match_batch(["Fahad Akas", "3. Emon"])
+    legacy.save_persistent_records()
+    legacy.match_batch(["Mehedi Hasan"])
+    legacy.flush_persistent_records()
+    store = AttendanceStore(os.path.join(folder, "attendance.db"))
+    assert store.import_legacy_json(legacy.persistence_file) == 3
+    assert store.find_alias("Mehedi Hasan")['matched_name'] == "Mehedi"
+    assert store.import_legacy_json(legacy.persistence_file) == 0
+    store.close()
+
+def test_large_roster_pruning():
+    """Check that the pruned lookup used for large rosters finds the same matches as a full scan."""
+    print("\n" + "=" * 80)
+    print("LARGE ROSTER PRUNING TEST")
+    print("=" * 80)
+    
+    from ZoomExtractor.bench_roster_index import main as bench_roster_index
+    assert bench_roster_index(roster_size=5000, query_count=200, threshold=60)
+    assert bench_roster_index(roster_size=5000, query_count=200, threshold=85)
+
+def test_phonetic_matching():
+    """Check that transliteration variants match by sound without a corrections table."""
+    print("\n" + "=" * 80)
+    print("PHONETIC MATCHING TEST")
+    print("=" * 80)
+    
+    from ZoomExtractor.phonetic import name_key
+    assert name_key("Shail") == name_key("Sahil")
+    assert name_key("Farhad") == name_key("Fahad")
+    assert name_key("Zahid") == name_key("Jahid")
+    assert name_key("Mehdi") == name_key("Mehedi")
+    assert name_key("Akas Fahad") == name_key("Fahad Akash")
+    assert name_key("Akash") != name_key("Fahad Akash")
+    
+    matcher = new_matcher()
+    matcher.database = create_test_database()
+    assert matcher.corrections == {}
+    
+    for detected, expected in [("Shail", "Sahil"), ("Zahid", "Jahid"), ("Rokaiya", "Rukaiya"),
+                               ("Fahad Akas", "Fahad Akash")]:
+        result = matcher.match_name(detected)
+        method = matcher.persistent_records[detected]['method']
+        print(f"'{detected}' -> {result['matched_name']} ({method}, {result['confidence']:.1f})")
+        assert result['matched_name'] == expected
+        assert method == 'phonetic'
+    
+    # Sounding like one word of a name is not enough
+    matcher.match_name("Akash")
+    assert matcher.persistent_records["Akash"]['method'] != 'phonetic'
+    
+def test_snapshot_assignment():
+    """Check that one snapshot's detections are assigned to distinct students."""
+    print("\n" + "=" * 80)
+    print("SNAPSHOT ASSIGNMENT TEST")
+    print("=" * 80)
+    
+    import itertools
+    import numpy as np
+    from ZoomExtractor.assignment import max_weight_assignment
+    
+    # The solver finds the best total weight, leaving zero-weight pairs out
+    rng = np.random.default_rng(7)
+    for _ in range(50):
+        weights = rng.integers(0, 100, size=(4, 3)).astype(float)
+        weights[weights < 40] = 0
+        assigned = max_weight_assignment(weights)
+        assert len(set(assigned.values())) == len(assigned)
+        best = max(sum(weights[row, col] for row, col in enumerate(cols) if col is not None)
+                   for cols in itertools.product([None, 0, 1, 2], repeat=4)
+                   if len({col for col in cols if col is not None}) == sum(col is not None for col in cols))
+        assert sum(weights[row, col] for row, col in assigned.items()) == best
+    
+    matcher = new_matcher()
+    matcher.database = {"Mitu": "26", "Mithu": "27", "Fahad Akash": "8"}
+    
+    # Matched alone, both names claim Mitu
+    independent = matcher.match_batch(["Mitu", "Mittu"])
+    assert independent["Mitu"]['roll'] == independent["Mittu"]['roll'] == "26"
+    
+    results = matcher.match_batch(["Mitu", "Mittu"], assign=True)
+    print(f"Mitu -> {results['Mitu']['matched_name']}, Mittu -> {results['Mittu']['matched_name']}")
+    assert results["Mitu"]['roll'] == "26" and results["Mittu"]['roll'] == "27"
+    
+    # A detection with no other student left above the threshold becomes unknown
+    results = matcher.match_batch(["Fahad Akash", "Fahad Akas"], assign=True)
+    assert results["Fahad Akash"]['roll'] == "8"
+    assert results["Fahad Akas"]['status'] == 'unknown'
+    matcher.flush_persistent_records()
+    reloaded = RollMatcher(persistence_file=matcher.persistence_file)
+    assert "Fahad Akas" not in matcher.persistent_records and "Fahad Akas" not in reloaded.persistent_records
+    
+    # Several aliases per student can be allowed
+    results = matcher.match_batch(["Fahad Akash", "Fahad Akas"], assign=True, max_aliases=2)
+    assert results["Fahad Akash"]['roll'] == results["Fahad Akas"]['roll'] == "8"
+    
+    # Saved records and exports hold the assigned results, which are not reused as aliases
+    assert matcher.persistent_records["Mittu"]['matched_name'] == "Mithu"
+    assert matcher.persistent_records["Mittu"]['method'] == 'assigned'
+    assert matcher._alias_record(matcher.index, "Mittu") is None
+    exported = {row['Detected Name']: row for row in matcher.export_attendance()}
+    assert exported["Mittu"]['Roll Number'] == "27" and exported["Mitu"]['Roll Number'] == "26"
+    
+    # Matched alone again, the detection gets its own best student back
+    assert matcher.match_batch(["Mittu"], assign=True)["Mittu"]['roll'] == "26"
+    assert matcher.persistent_records["Mittu"]['roll'] == "26"
+    
+    # The same with a store: a lost student's record is removed, and only settled records are saved
+    store = AttendanceStore(os.path.join(temp_folder(), "attendance.db"))
+    matcher = RollMatcher(store=store)
+    matcher.database = {"Mitu": "26", "Mithu": "27", "Fahad Akash": "8"}
+    matcher.match_batch(["Fahad Akas"])
+    results = matcher.match_batch(["Fahad Akash", "Fahad Akas", "Mitu", "Mittu"], assign=True)
+    assert results["Fahad Akas"]['status'] == 'unknown' and "Fahad Akas" not in matcher.persistent_records
+    assert store.find_alias("Fahad Akas") is None and store.find_alias("Mittu")['method'] == 'assigned'
+    records = store.session_records(matcher.session_id)
+    assert records["Fahad Akas"]['status'] == 'unknown' and records["Mittu"]['roll'] == "27"
+    assert matcher.get_statistics()['matched'] == 3
+    store.close()
+
+def test_name_normalization():
+    """Check the shared name cleanup rules used by the tracker, matcher and scraper."""
+    print("\n" + "=" * 80)
+    print("NAME NORMALIZATION TEST")
+    print("=" * 80)
+    
+    from ZoomExtractor.normalizer import NameNormalizer, default_normalizer
+    normalizer = default_normalizer()
+    
+    # Annotations and noise words go, names containing "me" or "host" stay whole
+    for raw, clean in [("Fahad Akash (Host, me)", "Fahad Akash"), ("Emon (me", "Emon"),
+                       ("| GBR Jahid ED", "Jahid"), ("Mehedi", "Mehedi"), ("Umme Hani Bithe", "Umme Hani Bithe")]:
+        print(f"'{raw}' -> '{normalizer.preprocess(raw)}'")
+        assert normalizer.preprocess(raw) == clean
+    
+    assert normalizer.clean_scraped("Sahil (Host)") == "Sahil"
+    assert normalizer.clean_scraped("Participants (3)") == ""
+    assert normalizer.clean_scraped("Shahnewaz") == "Shahnewaz"
+    
+    # Corrections are applied in one pass, longest first
+    custom = NameNormalizer({'corrections': {'Akas': 'Akash', 'Fahad Akas': 'Fahad Akash'}})
+    assert custom.preprocess("Fahad Akas") == "Fahad Akash"
+    assert custom.preprocess("Akas") == "Akash"
+    
+    matcher = new_matcher()
+    matcher.corrections = {'Mitthu': 'Mitu'}
+    assert matcher.preprocess_name("Mitthu (Me)") == "Mitu"
+    assert default_normalizer().corrections == {}
+
+def test_roster_loader():
+    """Check that roster files load the same names and rolls in every format."""
+    print("\n" + "=" * 80)
+    print("ROSTER LOADER TEST")
+    print("=" * 80)
+    
+    folder = temp_folder()
+    expected = {"Jahid": "1", "Fahad Akash": "8", "Umme Hani Bithe": "41"}
+    
+    # A title row and an extra column before the header; blank and placeholder rows are skipped
+    csv_path = os.path.join(folder, "roster.csv")
+    with open(csv_path, "w", encoding="utf-8") as f:
+        f.write("Batch 72,,\nTimestamp,Student Name,Roll\n,,\n"
+                "x,Jahid,1\ny,Fahad Akash,8\nz,nan,9\nw,Umme Hani Bithe,41\nv,None,7\n")
+    text_path = os.path.join(folder, "roster.txt")
+    with open(text_path, "w", encoding="utf-8") as f:
+        f.write("1. Jahid\nFahad Akash 8\n\nnot a roster line\n41\tUmme Hani Bithe\n")
+    
+    matcher = new_matcher()
+    for path in (csv_path, text_path):
+        assert matcher.load_from_file(path) == 3
+        assert dict(matcher.database) == expected
+    
+    from ZoomExtractor.bench_roster_loader import main as bench_roster_loader
+    assert bench_roster_loader(rows=2000)
+
+def test_roster_cache():
+    """Check that cached rosters are reused while their source is unchanged and rebuilt when it changes."""
+    print("\n" + "=" * 80)
+    print("ROSTER CACHE TEST")
+    print("=" * 80)
+    
+    from ZoomExtractor.roster_cache import RosterCache
+    
+    folder = temp_folder()
+    key_file = os.path.join(folder, "cache.key")
+    cache = RosterCache(os.path.join(folder, "cache"), key_file=key_file)
+    path = os.path.join(folder, "roster.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("1. Jahid\n8. Fahad Akash\n")
+    
+    first = new_matcher(roster_cache=cache)
+    assert first.load_from_file(path) == 2
+    cache.wait()
+    
+    def no_parsing(path):
+        raise AssertionError("unchanged roster should come from the cache")
+    index, count, from_cache = cache.load_file(path, no_parsing)
+    assert from_cache and dict(index.database) == dict(first.database)
+    assert index.fingerprint == first.index.fingerprint
+    assert new_matcher(roster_cache=cache).load_from_file(path) == 2
+    
+    # A changed file is parsed again
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("18. Sahil\n")
+    assert first.load_from_file(path) == 3
+    assert first.match_name("Shail")['roll'] == "18"
+    
+    # A downloaded roster is served from the cache and refreshed in the background
+    sheet = {"data": b"Name,Roll\nJahid,1\n"}
+    updates = []
+    parse = lambda data: ({line.split(b",")[0].decode(): line.split(b",")[1].decode()
+                           for line in data.splitlines()[1:]}, len(data.splitlines()) - 1)
+    index, count, from_cache = cache.load_download("sheet", lambda: sheet["data"], parse)
+    assert (count, from_cache) == (1, False)
+    cache.wait()
+    sheet["data"] = b"Name,Roll\nJahid,1\nEmon,3\n"
+    index, count, from_cache = cache.load_download("sheet", lambda: sheet["data"], parse,
+                                                   lambda index, count: updates.append(count))
+    assert (count, from_cache) == (1, True)
+    cache.wait()
+    assert updates == [2]
+    assert cache.get("sheet")[1] == 2
+    
+    # Files not signed with this user's key are never unpickled
+    import pickle
+    unpickled = []
+    class Payload:
+        def __reduce__(self):
+            return unpickled.append, ("unpickled",)
+    with open(cache._path("sheet"), "wb") as f:
+        f.write(b"\0" * 32 + pickle.dumps(Payload()))
+    assert cache.get("sheet") is None and unpickled == []
+    other = RosterCache(os.path.join(folder, "cache"), key_file=os.path.join(folder, "other.key"))
+    assert other.get(os.path.abspath(path)) is None and cache.get(os.path.abspath(path)) is not None
+    if os.name != 'nt':
+        assert os.stat(key_file).st_mode & 0o077 == 0
+
+def test_sheet_fetch():
+    """Check sheet downloads against a local HTTP server: revalidation, changed sheets, offline starts, server errors and timeouts."""
+    print("\n" + "=" * 80)
+    print("SHEET FETCH TEST")
+    print("=" * 80)
+    
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    import requests
+    from ZoomExtractor.sheet_fetch import SheetFetcher
+    
+    sheet = {"data": b"Name,Roll\nJahid,1\n", "version": 1}
+    requests_seen = []
+    
+    class SheetHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/slow"):
+                # Never answers within the fetcher's read timeout (the client is gone by then)
+                time.sleep(1)
+                return
+            if self.path.startswith("/trickle"):
+                # Every byte arrives within the read timeout, but the whole body takes 3 seconds
+                self.send_response(200)
+                self.send_header("Content-Length", "30")
+                self.end_headers()
+                try:
+                    for _ in range(30):
+                        self.wfile.write(b"x")
+                        self.wfile.flush()
+                        time.sleep(0.1)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                return
+            if sheet.get("failing"):
+                self.send_response(503)
+                self.end_headers()
+                return
+            etag = '"v%d"' % sheet["version"]
+            requests_seen.append(self.headers.get("If-None-Match"))
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("Content-Length", str(len(sheet["data"])))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(sheet["data"])
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SheetHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/d/roster/export?format=csv"
+    fetcher = SheetFetcher(os.path.join(temp_folder(), "sheets"), timeout=(2, 0.3), total_timeout=1)
+    
+    try:
+        assert fetcher.fetch(url) == (sheet["data"], "downloaded")
+        # The second download is a revalidation answered with 304
+        assert fetcher.fetch(url) == (sheet["data"], "not_modified")
+        assert requests_seen == [None, '"v1"']
+        
+        sheet["data"], sheet["version"] = b"Name,Roll\nJahid,1\nEmon,3\n", 2
+        assert fetcher.fetch(url) == (sheet["data"], "downloaded")
+        
+        # The matcher downloads export URLs through its fetcher
+        matcher = new_matcher(sheet_fetcher=fetcher)
+        assert matcher.load_from_google_sheet(url) == 2
+        assert matcher.match_name("Emon")['roll'] == "3"
+        
+        # A server slower than the read timeout fails instead of hanging
+        slow_url = url.replace("/d/", "/slow/")
+        try:
+            fetcher.fetch(slow_url)
+            assert False, "slow download should time out"
+        except requests.Timeout:
+            pass
+        
+        # A server trickling data in is cut off at the total timeout
+        started = time.monotonic()
+        try:
+            fetcher.fetch(url.replace("/d/", "/trickle/"))
+            assert False, "trickled download should time out"
+        except requests.Timeout:
+            pass
+        assert time.monotonic() - started < 2.5
+        
+        # A server error falls back to the local copy, and raises without one
+        sheet["failing"] = True
+        assert fetcher.fetch(url) == (sheet["data"], "offline")
+        try:
+            fetcher.fetch(url + "&gid=1")
+            assert False, "server error without a local copy should raise"
+        except requests.HTTPError:
+            pass
+        sheet["failing"] = False
+        
+        # Each thread downloads through a session of its own
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(fetcher.session))
+        thread.start()
+        thread.join()
+        assert sessions[0] is not fetcher.session and fetcher.session is fetcher.session
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    # With the server gone, the local copy is used
+    assert fetcher.fetch(url) == (sheet["data"], "offline")
+    assert new_matcher(sheet_fetcher=fetcher).load_from_google_sheet(url) == 2
+
+def test_roster_updates():
+    """Check incremental roster changes and the roster file watcher."""
+    print("\n" + "=" * 80)
+    print("ROSTER UPDATE TEST")
+    print("=" * 80)
+    
+    from ZoomExtractor.roster_index import RosterIndex
+    from ZoomExtractor.roster_watch import RosterWatcher, roster_changes
+    
+    matcher = new_matcher()
+    matcher.database = {"Nusrat Jahan": "21", "Tanvir Ahmed": "22", "Mahin Chowdhury": "23"}
+    assert matcher.match_name("Tanvir")['status'] == 'matched'
+    assert matcher.match_name("Mahin C")['roll'] == "23"
+    assert matcher.match_name("Rafiul Karim")['status'] == 'unknown'
+    
+    # A late enrolment re-matches the unknown detection it fits and keeps the rest
+    rematched = matcher.add_student("Rafiul Karim", "24")
+    assert list(rematched) == ["Rafiul Karim"] and rematched["Rafiul Karim"]['roll'] == "24"
+    assert "Tanvir" in matcher.cache and "Mahin C" in matcher.cache
+    assert matcher.match_name("Rafiul Karim")['roll'] == "24"
+    
+    # Renames keep the roll number; results for the old name are dropped
+    matcher.rename_student("Mahin Chowdhury", "Mahin Chowdhury Rafi")
+    assert "Mahin C" not in matcher.cache and "Tanvir" in matcher.cache
+    assert list(matcher.database) == ["Nusrat Jahan", "Tanvir Ahmed", "Mahin Chowdhury Rafi", "Rafiul Karim"]
+    assert matcher.match_name("Mahin Chowdhury Rafi")['roll'] == "23"
+    
+    matcher.remove_student("Tanvir Ahmed")
+    assert matcher.match_name("Tanvir")['status'] == 'unknown'
+    assert matcher.index.fingerprint == RosterIndex(matcher.database).fingerprint
+    try:
+        matcher.remove_student("Tanvir Ahmed")
+        assert False, "removing a missing student should fail"
+    except KeyError:
+        pass
+    
+    assert roster_changes({"A Khan": "1", "B Das": "2", "C Roy": "3"},
+                          {"A Khan": "1", "Bithi Das": "2", "C Roy": "9", "D Sen": "4"}) == (
+        {"C Roy": "9", "D Sen": "4"}, [], {"B Das": "Bithi Das"})
+    
+    # Edits to a loaded roster file are applied by the watcher
+    path = os.path.join(temp_folder(), "roster.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("21. Nusrat Jahan\n22. Tanvir Ahmed\n")
+    matcher.load_from_file(path)
+    watcher = RosterWatcher(matcher, path)
+    assert watcher.check() is None
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("21. Nusrat Jahan\n22. Tanvir Ahmed Khan\n25. Sadia Islam\n")
+    changes = watcher.check()
+    assert changes['added'] == {"Sadia Islam": "25"}
+    assert changes['renamed'] == {"Tanvir Ahmed": "Tanvir Ahmed Khan"}
+    assert dict(matcher.database) == {"Nusrat Jahan": "21", "Tanvir Ahmed Khan": "22", "Sadia Islam": "25"}
+    assert watcher.check() is None
+
+def test_matcher_benchmark():
+    """Check that the benchmark harness reports throughput, latency and accuracy as JSON and flags regressions."""
+    print("\n" + "=" * 80)
+    print("MATCHER BENCHMARK TEST")
+    print("=" * 80)
+    
+    import copy
+    import json
+    from ZoomExtractor.bench_matcher import compare, main
+    
+    report = main(sizes=(50,), query_count=80, thresholds=(60, 80))
+    report = json.loads(json.dumps(report))
+    assert [(r['roster_size'], r['threshold']) for r in report['results']] == [(50, 60), (50, 80)]
+    for result in report['results']:
+        assert result['queries'] == 80
+        assert result['match_name']['throughput_per_s'] > 0
+        assert result['match_name']['latency_ms']['p50'] <= result['match_name']['latency_ms']['p99']
+        assert result['accuracy']['recall'] >= 0.9
+        # Snapshots are matched the same way as single names
+        assert result['batch_accuracy'] == result['accuracy']
+    
+    assert compare(report, report) == []
+    worse = copy.deepcopy(report)
+    worse['results'][1]['accuracy']['precision'] -= 0.1
+    worse['results'][0]['match_batch']['throughput_per_s'] /= 10
+    assert len(compare(report, worse)) == 2
+
+def test_matcher_snapshots():
+    """Check that snapshots stay consistent and unchanged while another thread keeps matching."""
+    print("\n" + "=" * 80)
+    print("MATCHER SNAPSHOT TEST")
+    print("=" * 80)
+    
+    import threading
+    
+    matcher = new_matcher()
+    matcher.database = create_test_database()
+    before = matcher.snapshot()
+    matcher.match_batch(["Jahid", "Emon", "Nobody Here"])
+    after = matcher.snapshot()
+    assert dict(before.matched_records) == {} and len(after.matched_records) == 3
+    assert set(after.persistent_records) == {"Jahid", "Emon"} and not before.persistent_records
+    assert after.database is matcher.database
+    try:
+        after.matched_records["Someone"] = {}
+        assert False, "snapshots should be read-only"
+    except TypeError:
+        pass
+    
+    # Reports read snapshots while the monitor thread keeps matching new names
+    names = list(create_test_database())
+    stop = threading.Event()
+    errors = []
+    
+    def monitor():
+        try:
+            for i in range(300):
+                matcher.match_batch([f"{names[i % len(names)]} {i}x", names[i % len(names)].upper()])
+        except Exception as e:
+            errors.append(e)
+        finally:
+            stop.set()
+    
+    thread = threading.Thread(target=monitor)
+    thread.start()
+    reads = 0
+    while not stop.is_set():
+        state = matcher.snapshot()
+        count = len(state.matched_records)
+        stats = matcher.get_statistics(state)
+        rolls = [record['roll'] for record in state.matched_records.values()]
+        assert len(rolls) == count
+        assert stats['total_detected'] == len(state.all_records())
+        reads += 1
+    thread.join()
+    assert not errors, errors
+    assert reads > 0
+    assert len(matcher.snapshot().matched_records) > len(after.matched_records)
+    matcher.persistent_records = {}
+
+def test_threshold_reclassification():
+    """Check that a threshold change re-classifies earlier detections, scoring only those decided below it again."""
+    print("\n" + "=" * 80)
+    print("THRESHOLD RECLASSIFICATION TEST")
+    print("=" * 80)
+    
+    folder = temp_folder()
+    
+    def fresh_matcher(threshold):
+        matcher = RollMatcher(threshold=threshold, store=AttendanceStore(os.path.join(folder, f"{threshold}.db")))
+        matcher.database = create_test_database()
+        return matcher
+    
+    names = ["Fahad Akas", "Fahad Akssh", "Akash", "Mehedi Hasan", "Shail", "Rukaiya 33",
+             "3. Emon", "JANNATUL FERDOUS", "John Smith", "Umme Hni Bithe", "Soumik"]
+    matcher = fresh_matcher(60)
+    original = matcher.match_batch(names)
+    
+    def no_scoring(*args, **kwargs):
+        raise AssertionError("re-classification should not score names again")
+    index = matcher.index
+    index.best_match = index.best_matches = index.best_phonetic = no_scoring
+    
+    def check(threshold):
+        matcher.threshold = threshold
+        expected = fresh_matcher(threshold)
+        for name in names:
+            assert matcher.matched_records[name] == expected.match_name(name), (threshold, name)
+            assert matcher.match_name(name) == matcher.matched_records[name]
+    
+    # Lower thresholds are decided by the candidates already found
+    check(55)
+    
+    # Pipelines stopped at a match below a higher threshold are the only ones run again
+    del index.best_match, index.best_matches, index.best_phonetic
+    scored = []
+    def counting_match(text, *args, **kwargs):
+        scored.append(text)
+        return type(index).best_match(index, text, *args, **kwargs)
+    index.best_match = counting_match
+    for threshold in (75, 90):
+        resumed = {name for name, entry in matcher.cache.items() if entry.ceiling < threshold}
+        scored.clear()
+        check(threshold)
+        forms = resumed | {matcher.preprocess_name(name) for name in resumed}
+        assert scored and set(scored) <= forms | {text.lower() for text in forms}, threshold
+        assert "3. Emon" not in resumed and "John Smith" not in resumed
+    del index.best_match
+    
+    # Back at the original threshold, every result is what it was
+    matcher.threshold = 60
+    assert dict(matcher.matched_records) == original
+    assert original["Fahad Akssh"]['status'] == 'matched' and original["John Smith"]['status'] == 'unknown'
+    
+    # Statistics and exports follow the threshold, and nothing is saved while re-classifying
+    for store in (None, AttendanceStore(os.path.join(folder, "stats.db"))):
+        matcher = new_matcher(store=store)
+        matcher.database = create_test_database()
+        matcher.match_batch(["Fahd Akas", "John Smith"])
+        saved = dict(matcher.persistent_records)
+        assert list(saved) == ["Fahd Akas"] and matcher.get_statistics()['matched'] == 1
+        matcher.threshold = 97
+        assert matcher.get_statistics()['matched'] == 0
+        assert [row['Status'] for row in matcher.export_attendance()] == ['Unknown', 'Unknown']
+        matcher.threshold = 50
+        assert matcher.get_statistics()['matched'] == 2
+        assert [row['Status'] for row in matcher.export_attendance()] == ['Matched', 'Matched']
+        matcher.threshold = 60
+        assert dict(matcher.persistent_records) == saved
+        if store is None:
+            matcher.flush_persistent_records()
+            assert "John Smith" not in RollMatcher(persistence_file=matcher.persistence_file).persistent_records
+        else:
+            assert store.find_alias("John Smith") is None
+            store.close()
+
+def test_compact_records():
+    """Check that column-wise record tables give back the records they were given, and stay immutable."""
+    print("\n" + "=" * 80)
+    print("COMPACT RECORDS TEST")
+    print("=" * 80)
+    
+    from ZoomExtractor.compact_records import COMPACT_MIN_GARBAGE, OVERLAY_MIN_SIZE, MatchEntry, RecordTable
+    
+    records = {
+        "Fahad Akas": {'matched_name': "Fahad Akash", 'roll': "08", 'confidence': 95.65, 'status': 'matched',
+                       'session_id': "20250101_090000", 'learned': "2025-01-01T09:00:00", 'method': 'fuzzy',
+                       'roster': "abc123"},
+        "3. Emon": {'matched_name': "Emon", 'roll': "3", 'confidence': 100, 'status': 'matched',
+                    'session_id': "20250101_090000", 'learned': None, 'method': 'roll'},
+        "Nobody": {'matched_name': "Nobody", 'roll': 'N/A', 'confidence': 0, 'status': 'unknown'},
+        "Odd": {'matched_name': "Odd", 'roll': 7, 'confidence': 50, 'status': 'matched', 'note': "kept as is"},
+    }
+    table = RecordTable(records)
+    assert table == records and len(table) == 4 and "Odd" in table and "Jahid" not in table
+    assert list(table["Fahad Akas"]) == list(records["Fahad Akas"])
+    assert table["Odd"]['roll'] == 7 and 'roster' not in table["3. Emon"]
+    table["Nobody"]['status'] = 'matched'
+    assert table["Nobody"]['status'] == 'unknown'
+    
+    # Confidences come back with the type they were stored as
+    assert type(table["3. Emon"]['confidence']) is int and type(table["Fahad Akas"]['confidence']) is float
+    
+    # Derived tables share rows with the one they came from, which stays as it was
+    first = table.updated({"Nobody": dict(records["3. Emon"])})
+    second = table.updated({"Jahid": dict(records["3. Emon"], matched_name="Jahid", roll="13")})
+    assert table == records
+    assert first["Nobody"]['matched_name'] == "Emon" and "Jahid" not in first
+    assert second["Jahid"]['roll'] == "13" and second["Nobody"] == records["Nobody"]
+    
+    # Unchanged records add no rows, and superseded rows are eventually dropped
+    assert first.updated(records)._length == first._length + 1
+    for i in range(COMPACT_MIN_GARBAGE * 2):
+        first = first.updated({"Nobody": dict(records["Nobody"], confidence=i)})
+    assert first["Nobody"]['confidence'] == COMPACT_MIN_GARBAGE * 2 - 1
+    assert first._length <= COMPACT_MIN_GARBAGE * 2 and len(first) == 4
+    
+    # One record at a time, each write copies a small overlay while the base map is shared and folded in now and then
+    grown = RecordTable()
+    for i in range(OVERLAY_MIN_SIZE * 20):
+        previous = grown
+        grown = grown.updated({f"Student {i}": dict(records["3. Emon"], roll=str(i))})
+        assert len(grown._overlay) <= OVERLAY_MIN_SIZE + 1
+        assert grown._rows is previous._rows or not grown._overlay
+        assert "Student 0" in grown and f"Student {i}" not in previous
+    assert len(grown) == OVERLAY_MIN_SIZE * 20 and grown[f"Student {OVERLAY_MIN_SIZE * 20 - 1}"]['roll'] == str(OVERLAY_MIN_SIZE * 20 - 1)
+    assert sorted(grown.removed(["Student 0"])) == sorted(set(grown) - {"Student 0"})
+    
+    entry = MatchEntry(records["Nobody"], ((), 50, float('inf')))
+    assert entry.result() == records["Nobody"] and entry.candidates == ((), 50, float('inf'))
+    
+    # Matcher snapshots hold tables, and results read back are the ones returned
+    matcher = new_matcher()
+    matcher.database = create_test_database()
+    results = matcher.match_batch(["Fahad Akas", "3. Emon", "John Smith", "Jahid"])
+    state = matcher.snapshot()
+    assert type(state.matched_records).__name__ == 'RecordTable'
+    assert dict(state.matched_records) == results
+    assert state.persistent_records["3. Emon"]['method'] == 'roll'
+    assert matcher.match_name("Fahad Akas") == results["Fahad Akas"]
+    matcher.persistent_records = {}
+
+def test_match_worker():
+    """Check that the match worker returns the same matches as match_batch, in order, also when scoring in a process."""
+    print("\n" + "=" * 80)
+    print("MATCH WORKER TEST")
+    print("=" * 80)
+    
+    from ZoomExtractor.match_worker import MatchWorker
+    
+    folder = temp_folder()
+    snapshots = [["Fahad Akas", "3. Emon", "John Smith"], ["Jahid", "Fahad Akssh", "Fahad Akas"],
+                 ["Mehedi Hasan", "Shail", "Umme Hni Bithe", "JANNATUL FERDOUS"]]
+    
+    def fresh_matcher(name):
+        matcher = RollMatcher(store=AttendanceStore(os.path.join(folder, name + ".db")))
+        matcher.database = create_test_database()
+        return matcher
+    
+    expected = fresh_matcher("expected")
+    expected_results = [expected.match_batch(snapshot, assign=True) for snapshot in snapshots]
+    
+    # Scored on the worker thread, then (any roster size) in the scoring process
+    for use_process in (False, True):
+        worker = MatchWorker(fresh_matcher(f"worker_{use_process}"), use_process=use_process,
+                             process_min_texts=1, process_min_roster=0)
+        worker.start()
+        for snapshot in snapshots:
+            worker.submit(snapshot)
+        results = [worker.results.get(timeout=60) for _ in snapshots]
+        worker.stop()
+        stats = worker.stats()
+        print(f"use_process={use_process}: {stats}")
+        assert [participants for participants, _, _ in results] == snapshots
+        assert [matches for _, matches, _ in results] == expected_results
+        assert all(error is None for _, _, error in results)
+        assert stats['processed'] == 3 and stats['depth'] == 0 and stats['max_depth'] >= 1
+        assert (stats['process_calls'] > 0) == use_process
+    
+    # A failed match comes back as the snapshot's error
+    worker = MatchWorker(fresh_matcher("failing"), use_process=False)
+    def failing_batch(*args, **kwargs):
+        raise ValueError("no roster")
+    worker.matcher.match_batch = failing_batch
+    worker.start()
+    worker.submit(["Jahid"])
+    participants, matches, error = worker.results.get(timeout=60)
+    worker.stop()
+    assert participants == ["Jahid"] and matches is None and isinstance(error, ValueError)
+    
+    # Snapshots submitted after stop() are dropped until the worker is started again
+    assert worker.submit(["Emon"]) is False and worker.snapshots.empty() and worker.depth() == 0
+    worker.start()
+    assert worker.submit(["Emon"]) is True
+    worker.results.get(timeout=60)
+    worker.stop()
+    
+    # The scoring process is sent the roster as a dict and builds its own index from it
+    import ZoomExtractor.match_worker as match_worker
+    from ZoomExtractor.roster_index import RosterIndex
+    index = RosterIndex(create_test_database())
+    texts = ["fahad akas", "emon"]
+    expected_scores = index.best_matches(texts, folded=True, score_cutoff=60)
+    assert match_worker._process_best_matches(index.fingerprint, dict(index.database), texts, True, 60) == expected_scores
+    assert match_worker._process_index[0] == index.fingerprint and match_worker._process_index[1].names == index.names
+    assert match_worker._process_best_matches(index.fingerprint, None, texts, True, 60) == expected_scores
+    assert match_worker._process_best_matches("other roster", None, texts, True, 60) is None
+
+def test_match_strategies():
+    """Check that match strategies can be counted, reordered and disabled."""
+    print("\n" + "=" * 80)
+    print("MATCH STRATEGIES TEST")
+    print("=" * 80)
+    
+    from ZoomExtractor.matcher import DEFAULT_STRATEGIES
+    
+    folder = temp_folder()
+    names = ["3. Emon", "Fahad Akas", "Shail", "mehedi", "John Smith", "Umme Hni Bithe"]
+    
+    def fresh_matcher(name, **kwargs):
+        matcher = RollMatcher(store=AttendanceStore(os.path.join(folder, name + ".db")), **kwargs)
+        matcher.database = create_test_database()
+        return matcher
+    
+    # Every matched result is a hit of exactly one strategy
+    matcher = fresh_matcher("default")
+    assert matcher.strategies == DEFAULT_STRATEGIES
+    results = matcher.match_batch(names)
+    stats = matcher.strategy_stats()
+    print(stats)
+    assert list(stats)[:3] == ['alias', 'roll_prefix', 'roll_suffix'] and stats['alias']['runs'] == len(names)
+    assert stats['roll_prefix']['hits'] == 1 and stats['exact']['hits'] == 1
+    assert stats['roll_prefix']['runs'] == len(names) and stats['roll_suffix']['runs'] == len(names) - 1
+    assert sum(s['hits'] for s in stats.values()) == sum(r['status'] == 'matched' for r in results.values())
+    assert all(s['runs'] >= s['hits'] and s['total_ms'] >= 0 for s in stats.values())
+    matcher.reset_strategy_stats()
+    assert matcher.strategy_stats() == {}
+    
+    # An accepted fuzzy match still lets its phonetic step run, then the pipeline stops
+    assert matcher.match_name("Umme Hni Bithe (Host)")['matched_name'] == "Umme Hani Bithe"
+    assert list(matcher.strategy_stats()) == ['alias', 'roll_prefix', 'roll_suffix', 'exact', 'fuzzy', 'phonetic']
+    matcher.reset_strategy_stats()
+    
+    # Without the roll steps "3. Emon" is matched by name; without fuzzy steps nothing is scored
+    matcher = fresh_matcher("no_roll", strategies=['exact', 'fuzzy', 'exact_raw', 'fuzzy_raw'])
+    assert matcher.match_name("3. Emon")['matched_name'] == "Emon"
+    assert matcher.persistent_records["3. Emon"]['method'] != 'roll'
+    matcher = fresh_matcher("no_fuzzy", strategies=['roll_prefix', 'exact', 'phonetic'])
+    def no_scoring(*args, **kwargs):
+        raise AssertionError("no fuzzy strategy should score names")
+    matcher.index.best_match = matcher.index.best_matches = no_scoring
+    results = matcher.match_batch(names)
+    assert results["3. Emon"]['status'] == 'matched' and results["Umme Hni Bithe"]['status'] == 'unknown'
+    assert 'fuzzy' not in matcher.strategy_stats()
+    
+    # Changing the pipeline drops memoized results; unknown steps are refused
+    matcher.strategies = DEFAULT_STRATEGIES
+    assert len(matcher.cache) == 0
+    try:
+        matcher.strategies = ['exact', 'soundex']
+        assert False, "unknown strategy should raise ValueError"
+    except ValueError:
+        pass
+    assert matcher.strategies == DEFAULT_STRATEGIES
+
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["--benchmark"]:
+        # python test_name_matching.py --benchmark [bench_matcher.py options]
+        import runpy
+        sys.argv = [os.path.join(os.path.dirname(__file__), 'ZoomExtractor', 'bench_matcher.py')] + sys.argv[2:]
+        runpy.run_path(sys.argv[0], run_name="__main__")
+        sys.exit(0)
+    
     print("Zoom Attendance System - Name Matching Test Suite")
     print("This script tests the accuracy of the name detection and matching system.")
     
@@ -196,9 +1169,66 @@ if __name__ == "__main__":
     # Run edge case tests
     test_edge_cases()
     
+    # Run batch matching test
+    test_batch_matching()
+    
+    # Run match cache test
+    test_match_cache()
+    
+    # Run alias index test
+    test_alias_index()
+    
+    # Run persistence journal test
+    test_persistence_journal()
+    
+    # Run attendance store test
+    test_attendance_store()
+    
+    # Run large roster pruning test
+    test_large_roster_pruning()
+    
+    # Run phonetic matching test
+    test_phonetic_matching()
+    
+    # Run snapshot assignment test
+    test_snapshot_assignment()
+    
+    # Run name normalization test
+    test_name_normalization()
+    
+    # Run roster loader test
+    test_roster_loader()
+    
+    # Run roster cache test
+    test_roster_cache()
+    
+    # Run sheet fetch test
+    test_sheet_fetch()
+    
+    # Run roster update test
+    test_roster_updates()
+    
+    # Run matcher benchmark test
+    test_matcher_benchmark()
+    
+    # Run matcher snapshot test
+    test_matcher_snapshots()
+    
+    # Run threshold reclassification test
+    test_threshold_reclassification()
+    
+    # Run compact records test
+    test_compact_records()
+    
+    # Run match worker test
+    test_match_worker()
+    
+    # Run match strategies test
+    test_match_strategies()
+    
     print("\n" + "=" * 80)
     print("TEST SUMMARY")
     print("=" * 80)
     print(f"Comprehensive Tests: {passed} passed, {failed} failed")
     print(f"Overall Success Rate: {passed/(passed+failed)*100:.1f}%" if (passed+failed) > 0 else "No tests run")
-    print("\nNote: You can modify this script to test with your own data and scenarios.")
\ No newline at end of file
+    print("\nNote: You can modify this script to test with your own data and scenarios.")